@@ -1,41 +1,85 @@
 # backend/app/api/executions.py
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
+import os
+import shutil
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.dependencies import get_db
+from app.api.pagination import (
+    cursor_datetime,
+    decode_cursor,
+    encode_cursor,
+    list_response,
+    load_columns,
+    parse_fields
+)
+from app.dependencies import get_db, get_read_db
 from app.schemas.execution import (
     ExecutionCreate,
+    ExecutionQueueResponse,
     ExecutionResponse,
     ExecutionUpdate,
     NodeExecutionResponse
 )
 from app.services.execution_engine import ExecutionEngine
-from app.models.database import Execution, NodeExecution
+from app.services.execution.artifacts import (
+    ArtifactNotFound,
+    JSONL_ENCODING,
+    collect_garbage,
+    get_artifact_store,
+    referenced_digests
+)
+from app.services.execution.dispatcher import ExecutionDispatcher, get_execution_dispatcher
+from app.services.execution.node_writer import get_node_writer
+from app.services.execution.events import TERMINAL_EXECUTION_STATUSES, execution_event_data, get_event_bus, sse_events
+from app.services.execution.resource_monitor import resource_timeseries
+from app.services.execution.workflow_state import LiveWorkflowState, get_workflow_states
+from app.services.execution.utils import execution_log_dir
+from app.models.database import Execution, NodeExecution, ResourceSample, ServerLease, Workflow
 
 router = APIRouter()
 
+OUTPUT_SIZE_HEADER = "X-Output-Size"
+OUTPUT_LINES_HEADER = "X-Output-Lines"
+
 
 @router.get("", response_model=List[ExecutionResponse])
 def list_executions(
+    response: Response,
     workflow_id: Optional[int] = None,
     status: Optional[str] = None,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """列出所有执行记录，支持可选过滤条件"""
+    """列出执行记录（按创建时间倒序），支持过滤、游标分页（X-Next-Cursor）和字段投影（fields）"""
+    selected = parse_fields(fields, ExecutionResponse)
+    before = decode_cursor(cursor, 2)
+    options = load_columns(Execution, selected, "created_at")
     engine = ExecutionEngine(db)
-    executions = engine.list_executions(workflow_id=workflow_id, status=status, limit=limit)
-    return executions
+    executions = engine.list_executions(
+        workflow_id=workflow_id,
+        status=status,
+        limit=limit,
+        before=(cursor_datetime(before[0]), int(before[1])) if before else None,
+        options=[options] if options is not None else ()
+    )
+    next_cursor = None
+    if len(executions) == limit:
+        next_cursor = encode_cursor(executions[-1].created_at, executions[-1].id)
+    return list_response(response, executions, ExecutionResponse, selected, next_cursor)
 
 
 @router.post("", response_model=ExecutionResponse, status_code=201)
 def create_execution(
     execution_data: ExecutionCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    dispatcher: ExecutionDispatcher = Depends(get_execution_dispatcher)
 ):
-    """创建并启动新的执行"""
+    """创建新的执行并提交到执行队列"""
     # Check if workflow exists
     from app.models.database import Workflow
     workflow = db.query(Workflow).filter(Workflow.id == execution_data.workflow_id).first()
@@ -49,14 +93,19 @@ def create_execution(
         triggered_by=execution_data.triggered_by
     )
 
-    # Start execution in background
-    background_tasks.add_task(engine.execute_workflow, execution.id)
+    dispatcher.submit(execution.id, priority=execution_data.priority)
 
     return execution
 
 
+@router.get("/queue", response_model=ExecutionQueueResponse)
+def get_execution_queue(dispatcher: ExecutionDispatcher = Depends(get_execution_dispatcher)):
+    """获取执行队列状态：排队数、运行数、等待时间与并发上限"""
+    return dispatcher.stats()
+
+
 @router.get("/{execution_id}", response_model=ExecutionResponse)
-def get_execution(execution_id: int, db: Session = Depends(get_db)):
+def get_execution(execution_id: int, db: Session = Depends(get_read_db)):
     """根据 ID 获取执行记录"""
     engine = ExecutionEngine(db)
     execution = engine.get_execution(execution_id)
@@ -66,38 +115,209 @@ def get_execution(execution_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/{execution_id}/stop", response_model=ExecutionResponse)
-def stop_execution(execution_id: int, db: Session = Depends(get_db)):
-    """停止正在运行的执行"""
+def stop_execution(
+    execution_id: int,
+    db: Session = Depends(get_db),
+    dispatcher: ExecutionDispatcher = Depends(get_execution_dispatcher)
+):
+    """停止正在运行或排队中的执行"""
     engine = ExecutionEngine(db)
     execution = engine.stop_execution(execution_id)
     if not execution:
         raise HTTPException(status_code=404, detail="执行记录不存在")
+    if dispatcher.discard(execution_id):
+        # Never reaches a runner, so nothing else will drop its token or close its event stream
+        engine.cancellation.discard(execution_id)
+        engine.events.close(execution_id)
     return execution
 
 
 @router.delete("/{execution_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_execution(execution_id: int, db: Session = Depends(get_db)):
-    """删除执行记录及其节点记录"""
+    """删除执行记录及其节点记录，并清理不再被引用的输出产物"""
     execution = db.query(Execution).filter(Execution.id == execution_id).first()
     if not execution:
         raise HTTPException(status_code=404, detail="执行记录不存在")
 
+    artifact_digests = referenced_digests(db, execution_id)
     db.query(NodeExecution).filter(
         NodeExecution.execution_id == execution_id
     ).delete(synchronize_session=False)
+    db.query(ServerLease).filter(
+        ServerLease.execution_id == execution_id
+    ).delete(synchronize_session=False)
+    db.query(ResourceSample).filter(
+        ResourceSample.execution_id == execution_id
+    ).delete(synchronize_session=False)
     db.delete(execution)
     db.commit()
+    get_event_bus().discard(execution_id)
+    shutil.rmtree(execution_log_dir(execution_id), ignore_errors=True)
+    if artifact_digests:
+        collect_garbage(db, get_artifact_store(), artifact_digests)
     return None
 
 
 @router.get("/{execution_id}/nodes", response_model=List[NodeExecutionResponse])
-def get_node_executions(execution_id: int, db: Session = Depends(get_db)):
-    """获取某次执行的所有节点执行记录"""
+def get_node_executions(
+    execution_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """获取某次执行的节点执行记录（按 id 升序），支持游标分页（X-Next-Cursor）和字段投影（fields）"""
+    execution = db.query(Execution.id).filter(Execution.id == execution_id).first()
+    if not execution:
+        raise HTTPException(status_code=404, detail="执行记录不存在")
+
+    selected = parse_fields(fields, NodeExecutionResponse)
+    after = decode_cursor(cursor, 1)
+    query = db.query(NodeExecution).filter(NodeExecution.execution_id == execution_id)
+    if after:
+        query = query.filter(NodeExecution.id > int(after[0]))
+    options = load_columns(NodeExecution, selected)
+    if options is not None:
+        query = query.options(options)
+    query = query.order_by(NodeExecution.id.asc())
+    if limit is not None:
+        query = query.limit(limit)
+    node_executions = query.all()
+    next_cursor = None
+    if limit is not None and len(node_executions) == limit:
+        next_cursor = encode_cursor(node_executions[-1].id)
+    # 节点结束状态由后台写线程批量提交，尚未落库的部分在这里补上
+    pending = get_node_writer().pending(execution_id)
+    return list_response(response, node_executions, NodeExecutionResponse, selected, next_cursor, pending)
+
+
+@router.get("/{execution_id}/events")
+def stream_execution_events(
+    execution_id: int,
+    request: Request,
+    after: int = Query(0, ge=0, description="只推送序号大于该值的事件"),
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    dispatcher: ExecutionDispatcher = Depends(get_execution_dispatcher)
+):
+    """以 SSE 推送执行事件（执行状态、节点状态变化、输出片段），支持按序号续传"""
     execution = db.query(Execution).filter(Execution.id == execution_id).first()
     if not execution:
         raise HTTPException(status_code=404, detail="执行记录不存在")
+    if last_event_id and last_event_id.isdigit():
+        # EventSource 断线重连时自动带上 Last-Event-ID
+        after = max(after, int(last_event_id))
+
+    bus = get_event_bus()
+    stream = bus.get(execution_id)
+    # 只有本进程排队或运行中的执行才会有人发布并关闭事件流；其余（已结束、重启前遗留）
+    # 不新建事件流，只推送当前状态后结束，由前端改为轮询
+    active = dispatcher.is_active(execution_id) or get_workflow_states().get(execution_id) is not None
+    if stream is None and active and execution.status not in TERMINAL_EXECUTION_STATUSES:
+        stream = bus.stream(execution_id)
+    return StreamingResponse(
+        sse_events(
+            stream,
+            after,
+            is_disconnected=request.is_disconnected,
+            current=execution_event_data(execution)
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    node_executions = db.query(NodeExecution).filter(
+
+@router.get("/{execution_id}/state")
+def get_execution_state(execution_id: int, db: Session = Depends(get_read_db)):
+    """获取执行的 workflow_state 快照：运行中取内存中的实时状态，否则取 summary 中最近一次写入的快照"""
+    live_state = get_workflow_states().get(execution_id)
+    if live_state is not None:
+        return live_state.snapshot()
+    execution = db.query(Execution).filter(Execution.id == execution_id).first()
+    if not execution:
+        raise HTTPException(status_code=404, detail="执行记录不存在")
+    workflow_state = (execution.summary or {}).get("workflow_state")
+    if workflow_state:
+        return workflow_state
+    # 尚未开始（或旧记录没有快照）：按工作流定义返回全部未运行的状态
+    workflow = db.query(Workflow).filter(Workflow.id == execution.workflow_id).first()
+    if not workflow:
+        raise HTTPException(status_code=404, detail="工作流不存在")
+    return LiveWorkflowState(workflow.nodes or [], workflow.edges or []).snapshot()
+
+
+@router.get("/{execution_id}/resources")
+def get_execution_resources(execution_id: int, db: Session = Depends(get_read_db)):
+    """获取执行期间各服务器的资源采样时间序列（按采样时刻对齐）及节点运行区间"""
+    execution = db.query(Execution).filter(Execution.id == execution_id).first()
+    if not execution:
+        raise HTTPException(status_code=404, detail="执行记录不存在")
+    return resource_timeseries(db, execution_id)
+
+
+@router.get("/{execution_id}/nodes/{node_execution_id}/log")
+def get_node_execution_log(execution_id: int, node_execution_id: int, db: Session = Depends(get_read_db)):
+    """下载节点执行的完整输出日志"""
+    node_execution = db.query(NodeExecution).filter(
+        NodeExecution.id == node_execution_id,
+        NodeExecution.execution_id == execution_id
+    ).first()
+    if not node_execution:
+        raise HTTPException(status_code=404, detail="节点执行记录不存在")
+    if not node_execution.log_path or not os.path.isfile(node_execution.log_path):
+        raise HTTPException(status_code=404, detail="节点没有输出日志")
+
+    return FileResponse(node_execution.log_path, media_type="text/plain; charset=utf-8")
+
+
+@router.get("/{execution_id}/nodes/{node_execution_id}/output/{field}")
+def get_node_execution_output(
+    execution_id: int,
+    node_execution_id: int,
+    field: str,
+    offset: int = Query(0, ge=0, description="字节偏移"),
+    length: int = Query(1024 * 1024, ge=1, le=16 * 1024 * 1024, description="最多返回的字节数"),
+    start_line: Optional[int] = Query(None, ge=0, description="起始行号（从 0 开始），指定时按行读取"),
+    line_count: int = Query(1000, ge=1, le=100000, description="按行读取时最多返回的行数"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    按字节或行范围读取节点输出字段的完整内容。
+
+    超过阈值的 stdout/stderr、results 等字段只在 output_data 中保留预览，
+    完整内容在压缩的产物存储中，引用位于 ``output_data.artifacts``。
+    文本字段按 UTF-8 返回，列表字段每行一个 JSON；未卸载的字段也可按同样方式读取。
+    响应头 ``X-Output-Size``、``X-Output-Lines`` 给出字段的总字节数和总行数。
+    """
+    node_execution = db.query(NodeExecution).filter(
+        NodeExecution.id == node_execution_id,
         NodeExecution.execution_id == execution_id
-    ).order_by(NodeExecution.id.asc()).all()
-    return node_executions
+    ).first()
+    if not node_execution:
+        raise HTTPException(status_code=404, detail="节点执行记录不存在")
+    if start_line is not None and offset:
+        raise HTTPException(status_code=400, detail="不能同时指定字节范围和行范围")
+    output = node_execution.output_data or {}
+    pending = get_node_writer().pending(execution_id).get(node_execution_id, {})
+    if "output_data" in pending:
+        output = pending["output_data"] or {}
+
+    try:
+        if start_line is not None:
+            content, meta = get_artifact_store().read_field(
+                output, field, start_line=start_line, line_count=line_count
+            )
+        else:
+            content, meta = get_artifact_store().read_field(output, field, offset=offset, length=length)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="节点输出中没有该字段")
+    except ArtifactNotFound:
+        raise HTTPException(status_code=404, detail="节点输出的产物文件不存在")
+
+    media_type = "application/x-ndjson" if meta["encoding"] == JSONL_ENCODING else "text/plain; charset=utf-8"
+    return Response(
+        content,
+        media_type=media_type,
+        headers={OUTPUT_SIZE_HEADER: str(meta["size"]), OUTPUT_LINES_HEADER: str(meta["lines"])}
+    )
@@ -1,5 +1,6 @@
 # backend/app/api/iotdb.py
 import asyncio
+from contextlib import ExitStack
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
@@ -189,7 +190,7 @@ async def cli_session(websocket: WebSocket, db: Session = Depends(get_db)):
     await websocket.accept()
 
     ssh_service = SSHService()
-    client = None
+    session = ExitStack()
     channel = None
 
     try:
@@ -211,13 +212,13 @@ async def cli_session(websocket: WebSocket, db: Session = Depends(get_db)):
             await websocket.close(code=1008)
             return
 
-        client, _ssh_port, connect_error = ssh_service._connect_client(
+        client, _ssh_port, connect_error = session.enter_context(ssh_service.client_session(
             host=server.host,
             username=server.username,
             password=server.password,
             port=server.port,
             timeout=10
-        )
+        ))
         if client is None:
             await websocket.send_json({"type": "error", "message": f"Failed to connect: {connect_error}"})
             await websocket.close(code=1011)
@@ -294,8 +295,7 @@ async def cli_session(websocket: WebSocket, db: Session = Depends(get_db)):
             except Exception:
                 pass
             channel.close()
-        if client is not None:
-            client.close()
+        session.close()
 
 
 @router.post("/logs/list", response_model=List[FileInfo])
@@ -400,15 +400,15 @@ def stream_log(request: LogStreamRequest, db: Session = Depends(get_db)):
     command = f"tail -n {tail_lines} -F {ssh_service.quote(target_path)}"
 
     def generate():
-        client = None
-        try:
-            client, _ssh_port, connect_error = ssh_service._connect_client(
-                host=server.host,
-                username=server.username,
-                password=server.password,
-                port=server.port,
-                timeout=10
-            )
+        # tail -F keeps running until its connection closes, so the client is not reused
+        with ssh_service.client_session(
+            host=server.host,
+            username=server.username,
+            password=server.password,
+            port=server.port,
+            timeout=10,
+            reusable=False
+        ) as (client, _ssh_port, connect_error):
             if client is None:
                 yield f"Failed to connect: {connect_error}\n"
                 return
@@ -425,9 +425,6 @@ def stream_log(request: LogStreamRequest, db: Session = Depends(get_db)):
                 if channel.exit_status_ready():
                     break
                 time.sleep(0.5)
-        finally:
-            if client is not None:
-                client.close()
 
     return StreamingResponse(generate(), media_type="text/plain; charset=utf-8")
 
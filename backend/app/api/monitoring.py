@@ -3,6 +3,7 @@
 API endpoints for system monitoring.
 Provides both local and remote monitoring capabilities.
 """
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional
@@ -10,6 +11,8 @@ import logging
 
 from ..dependencies import get_db
 from ..models.database import Server
+from ..services.metrics_collector import get_metrics_collector
+from ..services.metrics_history import get_metrics_history
 from ..services.monitoring_service import MonitoringService
 
 router = APIRouter()
@@ -83,13 +86,17 @@ def get_remote_status(
     server_id: int,
     db: Session = Depends(get_db)
 ):
-    """Get remote server status via SSH.
+    """Get remote server status from the background metrics collector.
+
+    Served from the in-memory cache; the server is only sampled on demand
+    when the collector has no sample for it yet.
 
     Args:
         server_id: ID of the server to monitor.
 
     Returns:
-        Dict containing server info and system status (CPU, memory, disk).
+        Dict containing server info, system status (CPU, memory, disk) and
+        ``sampled_at`` (None if the server could not be sampled).
     """
     logger.info(f"API call: GET /api/monitoring/remote/{server_id}/status")
 
@@ -102,22 +109,67 @@ def get_remote_status(
             detail=f"Server with id {server_id} not found"
         )
 
-    logger.info(f"Getting remote status for server: {server.name} ({server.host})")
+    status = get_metrics_collector().get_status(server)
 
-    service = MonitoringService()
-    status = service.get_remote_status(
-        host=server.host,
-        username=server.username,
-        password=server.password,
-        port=server.port,
-        server_id=server.id,
-        server_name=server.name
-    )
-
-    logger.debug(f"Returning remote status for server {server.name}")
+    logger.debug(f"Returning remote status for server {server.name} sampled at {status['sampled_at']}")
     return status
 
 
+@router.get("/remote/{server_id}/history")
+def get_remote_history(
+    server_id: int,
+    from_: Optional[datetime] = Query(None, alias="from", description="Range start (ISO 8601 or epoch seconds), defaults to now - 1h"),
+    to: Optional[datetime] = Query(None, description="Range end (ISO 8601 or epoch seconds), defaults to now"),
+    step: Optional[int] = Query(None, ge=1, le=86400, description="Bucket size in seconds, default chosen from the range"),
+    db: Session = Depends(get_db)
+):
+    """Get CPU/memory/disk history collected for a remote server.
+
+    Points come from the finest retained tier (raw 5s, 1m, 10m) that covers
+    the range and are averaged into ``step``-second buckets.
+
+    Args:
+        server_id: ID of the server to query.
+        from_: Range start; naive datetimes are treated as UTC.
+        to: Range end; naive datetimes are treated as UTC.
+        step: Bucket size in seconds.
+
+    Returns:
+        Dict with the chosen tier, step, ``timestamps`` (epoch seconds) and
+        one value list per metric under ``series``.
+    """
+    logger.info(f"API call: GET /api/monitoring/remote/{server_id}/history (from={from_}, to={to}, step={step})")
+
+    server = db.query(Server).filter(Server.id == server_id).first()
+    if not server:
+        logger.warning(f"Server with ID {server_id} not found")
+        raise HTTPException(
+            status_code=404,
+            detail=f"Server with id {server_id} not found"
+        )
+
+    end = _as_utc(to) if to is not None else datetime.now(timezone.utc)
+    start = _as_utc(from_) if from_ is not None else end - timedelta(hours=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+
+    history = get_metrics_history().query(server.id, start.timestamp(), end.timestamp(), step)
+    logger.debug(f"Returning {len(history['timestamps'])} history points for server {server.name}")
+    return {
+        "server_id": server.id,
+        "server_name": server.name,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        **history,
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
 @router.get("/remote/{server_id}/processes")
 def get_remote_processes(
     server_id: int,
@@ -0,0 +1,112 @@
+# backend/app/api/pagination.py
+"""
+列表接口的游标分页与字段投影。
+
+游标是上一页最后一条记录排序键的不透明编码，下一页从该键之后继续，
+不需要 OFFSET 逐行跳过前面的记录。还有下一页时响应头 ``X-Next-Cursor``
+给出下一页的游标，响应体仍是数组。
+
+``fields`` 为逗号分隔的字段名：只从数据库读取并返回这些字段（``id`` 总会返回），
+列表页可以只取状态和时间，大字段（summary、nodes/edges、input/output）按需单独加载。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import load_only
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """把排序键编码为游标。"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """解码游标为排序键列表，格式不对时返回 400。"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="分页游标无效")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="分页游标无效")
+    return values
+
+
+def cursor_datetime(value: Any) -> datetime:
+    """游标中的时间键，要求带时区。"""
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="分页游标无效")
+    if parsed.tzinfo is None:
+        raise HTTPException(status_code=400, detail="分页游标无效")
+    return parsed
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """解析 ``fields`` 参数；未指定时返回 None（返回完整记录），含未知字段时返回 400。"""
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in schema.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+    return ["id", *[field for field in dict.fromkeys(requested) if field != "id"]]
+
+
+def load_columns(model: Any, fields: Optional[Sequence[str]], *required: str):
+    """只加载投影字段和排序键所需列的查询选项；未投影时返回 None。"""
+    if fields is None:
+        return None
+    return load_only(*[getattr(model, name) for name in dict.fromkeys([*fields, *required])])
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(schema: Type[BaseModel], field: str) -> TypeAdapter:
+    return TypeAdapter(schema.model_fields[field].annotation)
+
+
+def project(
+    item: Any,
+    schema: Type[BaseModel],
+    fields: Sequence[str],
+    overrides: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """按 schema 的字段类型序列化记录的部分字段，与完整响应的格式一致。"""
+    overrides = overrides or {}
+    projected = {}
+    for field in fields:
+        adapter = _field_adapter(schema, field)
+        value = overrides[field] if field in overrides else getattr(item, field)
+        projected[field] = adapter.dump_python(adapter.validate_python(value), mode="json", by_alias=True)
+    return projected
+
+
+def list_response(
+    response: Response,
+    items: Sequence[Any],
+    schema: Type[BaseModel],
+    fields: Optional[Sequence[str]],
+    next_cursor: Optional[str],
+    overrides: Optional[Dict[int, Dict[str, Any]]] = None
+):
+    """组装列表响应：完整记录交给 response_model，投影时直接返回 JSON；``overrides`` 按 id 覆盖字段值。"""
+    overrides = overrides or {}
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    if fields is None:
+        if headers:
+            response.headers.update(headers)
+        return [schema.model_validate(item).model_copy(update=overrides.get(item.id, {})) for item in items]
+    return JSONResponse([project(item, schema, fields, overrides.get(item.id)) for item in items], headers=headers)
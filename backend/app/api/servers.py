@@ -1,43 +1,24 @@
 # backend/app/api/servers.py
+import time
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Any, Dict, List, Set
-from ..dependencies import get_db
-from ..models.database import Server, Execution, NodeExecution, Workflow
-from ..schemas.server import ServerCreate, ServerUpdate, ServerResponse
-from ..services.ssh_service import SSHService
+from typing import Any, Dict, List
+from ..dependencies import get_db, get_read_db
+from ..models.database import Server, Workflow
+from ..schemas.server import (
+    BatchExecuteRequest,
+    BatchExecuteResponse,
+    ServerCreate,
+    ServerResponse,
+    ServerUpdate,
+)
+from ..services.server_leases import ServerLeaseManager
+from ..services.ssh_service import SSHService, SSHTarget, get_circuit_breaker, get_port_cache
 
 router = APIRouter()
 
 
-def _compute_busy_servers(db: Session) -> Set[int]:
-    """计算当前正在使用中的服务器 ID 集合"""
-    # Find all running executions
-    running_executions = db.query(Execution.id).filter(
-        Execution.status == "running"
-    ).all()
-    running_exec_ids = [e.id for e in running_executions]
-
-    if not running_exec_ids:
-        return set()
-
-    # Find all running node_executions in these executions
-    running_node_execs = db.query(NodeExecution).filter(
-        NodeExecution.execution_id.in_(running_exec_ids),
-        NodeExecution.status == "running"
-    ).all()
-
-    # Extract server_ids from input_data
-    busy_server_ids = set()
-    for ne in running_node_execs:
-        if ne.input_data and isinstance(ne.input_data, dict):
-            server_id = ne.input_data.get("server_id")
-            if server_id is not None:
-                busy_server_ids.add(int(server_id))
-
-    return busy_server_ids
-
-
 def _build_server_response(server: Server, is_busy: bool) -> ServerResponse:
     """根据 Server 模型和 is_busy 计算字段构建 ServerResponse"""
     server_dict = {
@@ -45,6 +26,7 @@ def _build_server_response(server: Server, is_busy: bool) -> ServerResponse:
         "name": server.name,
         "host": server.host,
         "port": server.port,
+        "ssh_port": server.ssh_port,
         "username": server.username,
         "description": server.description,
         "tags": server.tags,
@@ -58,6 +40,16 @@ def _build_server_response(server: Server, is_busy: bool) -> ServerResponse:
     return ServerResponse.model_validate(server_dict)
 
 
+def _remember_ssh_port(server: Server, ssh_port: Any) -> None:
+    """将实际连接成功的 SSH 端口持久化到 Server 行，失败时清除。"""
+    if ssh_port:
+        server.ssh_port = int(ssh_port)
+        get_port_cache().remember(server.host, server.port or 22, int(ssh_port))
+    else:
+        server.ssh_port = None
+        get_port_cache().invalidate(server.host, server.port or 22)
+
+
 def _matches_server_id(value: Any, server_id: int) -> bool:
     if value in (None, ""):
         return False
@@ -100,10 +92,10 @@ def _workflows_referencing_server(db: Session, server_id: int) -> List[Workflow]
 
 
 @router.get("", response_model=List[ServerResponse])
-def list_servers(db: Session = Depends(get_db)):
+def list_servers(db: Session = Depends(get_read_db)):
     """列出所有服务器，包含 is_busy 计算字段"""
     servers = db.query(Server).all()
-    busy_server_ids = _compute_busy_servers(db)
+    busy_server_ids = ServerLeaseManager(db).busy_server_ids()
 
     # Convert to response with is_busy
     responses = []
@@ -146,7 +138,7 @@ def create_server(server: ServerCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{server_id}", response_model=ServerResponse)
-def get_server(server_id: int, db: Session = Depends(get_db)):
+def get_server(server_id: int, db: Session = Depends(get_read_db)):
     """根据 ID 获取服务器"""
     server = db.query(Server).filter(Server.id == server_id).first()
     if not server:
@@ -154,7 +146,7 @@ def get_server(server_id: int, db: Session = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"服务器 ID {server_id} 不存在"
         )
-    busy_server_ids = _compute_busy_servers(db)
+    busy_server_ids = ServerLeaseManager(db).busy_server_ids([server.id])
     return _build_server_response(server, server.id in busy_server_ids)
 
 
@@ -182,6 +174,12 @@ def update_server(server_id: int, server_update: ServerUpdate, db: Session = Dep
     if "password" in update_data and update_data["password"] is not None:
         update_data["password"] = update_data["password"].get_secret_value()
 
+    if any(
+        field in update_data and update_data[field] != getattr(server, field)
+        for field in ("host", "port")
+    ):
+        _remember_ssh_port(server, None)
+
     for field, value in update_data.items():
         setattr(server, field, value)
 
@@ -189,7 +187,7 @@ def update_server(server_id: int, server_update: ServerUpdate, db: Session = Dep
     db.refresh(server)
 
     # Check if server is busy after update
-    busy_server_ids = _compute_busy_servers(db)
+    busy_server_ids = ServerLeaseManager(db).busy_server_ids([server.id])
     return _build_server_response(server, server.id in busy_server_ids)
 
 
@@ -232,6 +230,8 @@ def test_connection(server_id: int, db: Session = Depends(get_db)):
             detail=f"服务器 ID {server_id} 不存在"
         )
 
+    # 手动测试总是真正发起连接，不受熔断状态影响
+    get_circuit_breaker().reset(server.host)
     ssh_service = SSHService()
     result = ssh_service.run_command(
         host=server.host,
@@ -244,6 +244,7 @@ def test_connection(server_id: int, db: Session = Depends(get_db)):
 
     if result.error:
         server.status = "offline"
+        _remember_ssh_port(server, None)
         db.commit()
         return {
             "success": False,
@@ -254,6 +255,7 @@ def test_connection(server_id: int, db: Session = Depends(get_db)):
 
     # Update server status to online
     server.status = "online"
+    _remember_ssh_port(server, result.ssh_port)
     db.commit()
 
     return {
@@ -293,6 +295,9 @@ def execute_command(server_id: int, command_data: dict, db: Session = Depends(ge
         port=server.port,
         timeout=timeout
     )
+    if result.ssh_port and result.ssh_port != server.ssh_port:
+        _remember_ssh_port(server, result.ssh_port)
+        db.commit()
 
     return {
         "server_id": server_id,
@@ -304,3 +309,62 @@ def execute_command(server_id: int, command_data: dict, db: Session = Depends(ge
         "error": result.error,
         "ssh_port": result.ssh_port
     }
+
+
+@router.post("/execute-batch", response_model=BatchExecuteResponse)
+def execute_command_batch(request: BatchExecuteRequest, db: Session = Depends(get_db)):
+    """在多台服务器上并发执行同一条命令，结果按完成顺序返回"""
+    server_ids = list(dict.fromkeys(request.server_ids))
+    servers = db.query(Server).filter(Server.id.in_(server_ids)).all()
+    servers_by_id = {server.id: server for server in servers}
+    missing = [server_id for server_id in server_ids if server_id not in servers_by_id]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"服务器 ID {', '.join(str(server_id) for server_id in missing)} 不存在"
+        )
+
+    targets = [
+        SSHTarget(
+            host=servers_by_id[server_id].host,
+            username=servers_by_id[server_id].username,
+            password=servers_by_id[server_id].password,
+            port=servers_by_id[server_id].port,
+            key=server_id
+        )
+        for server_id in server_ids
+    ]
+
+    started = time.monotonic()
+    results = []
+    port_changed = False
+    for target, result in SSHService().run_on_many(
+        targets,
+        request.command,
+        max_parallel=request.max_parallel,
+        timeout=request.timeout
+    ):
+        server = servers_by_id[target.key]
+        if result.ssh_port and result.ssh_port != server.ssh_port:
+            _remember_ssh_port(server, result.ssh_port)
+            port_changed = True
+        results.append({
+            "server_id": server.id,
+            "server_name": server.name,
+            "exit_status": result.exit_status,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "error": result.error,
+            "ssh_port": result.ssh_port,
+            "elapsed_ms": int((time.monotonic() - started) * 1000)
+        })
+    if port_changed:
+        db.commit()
+
+    succeeded = sum(1 for item in results if item["exit_status"] == 0 and not item["error"])
+    return {
+        "command": request.command,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
@@ -1,9 +1,10 @@
 # backend/app/api/workflows.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from ..dependencies import get_db
+from .pagination import decode_cursor, encode_cursor, list_response, load_columns, parse_fields
+from ..dependencies import get_db, get_read_db
 from ..models.database import Execution, NodeExecution, Workflow
 from ..schemas.workflow import WorkflowCreate, WorkflowUpdate, WorkflowResponse
 from ..workflow_node_types import CLUSTER_SERVER_NODE_TYPES, TOP_LEVEL_SERVER_NODE_TYPES
@@ -62,10 +63,30 @@ def _validate_workflow_schedule(schedule_mode: str, schedule_region: str, nodes:
 
 
 @router.get("", response_model=List[WorkflowResponse])
-def list_workflows(db: Session = Depends(get_db)):
-    """列出所有工作流"""
-    workflows = db.query(Workflow).all()
-    return workflows
+def list_workflows(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """列出工作流（按 id 升序），支持游标分页（X-Next-Cursor）和字段投影（fields）；不传 limit 时返回全部"""
+    selected = parse_fields(fields, WorkflowResponse)
+    after = decode_cursor(cursor, 1)
+    query = db.query(Workflow)
+    if after:
+        query = query.filter(Workflow.id > int(after[0]))
+    options = load_columns(Workflow, selected)
+    if options is not None:
+        query = query.options(options)
+    query = query.order_by(Workflow.id.asc())
+    if limit is not None:
+        query = query.limit(limit)
+    workflows = query.all()
+    next_cursor = None
+    if limit is not None and len(workflows) == limit:
+        next_cursor = encode_cursor(workflows[-1].id)
+    return list_response(response, workflows, WorkflowResponse, selected, next_cursor)
 
 
 @router.post("", response_model=WorkflowResponse, status_code=status.HTTP_201_CREATED)
@@ -96,7 +117,7 @@ def create_workflow(workflow: WorkflowCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
-def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
+def get_workflow(workflow_id: int, db: Session = Depends(get_read_db)):
     """根据 ID 获取工作流"""
     workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
     if not workflow:
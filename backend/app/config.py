@@ -1,8 +1,83 @@
-# backend/app/config.py
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATABASE_PATH = BASE_DIR / "data" / "app.db"
 
 # Ensure data directory exists
-DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+# SQLite connections
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("TESTFLOW_DB_BUSY_TIMEOUT_MS", "10000"))
+DB_CACHE_SIZE_KB = int(os.environ.get("TESTFLOW_DB_CACHE_SIZE_KB", "65536"))
+DB_MMAP_SIZE_BYTES = int(os.environ.get("TESTFLOW_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_READ_POOL_SIZE = int(os.environ.get("TESTFLOW_DB_READ_POOL_SIZE", "8"))
+DB_POOL_OVERFLOW = int(os.environ.get("TESTFLOW_DB_POOL_OVERFLOW", "10"))
+
+# SSH connection pool (the per-host cap is set with the dispatcher below)
+SSH_POOL_IDLE_TTL = float(os.environ.get("TESTFLOW_SSH_POOL_IDLE_TTL", "300"))
+SSH_PROBE_TIMEOUT = float(os.environ.get("TESTFLOW_SSH_PROBE_TIMEOUT", "3"))
+SSH_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("TESTFLOW_SSH_CIRCUIT_FAILURES", "2"))
+SSH_CIRCUIT_RESET_SECONDS = float(os.environ.get("TESTFLOW_SSH_CIRCUIT_RESET", "60"))
+
+# Node output logs
+LOG_DIR = Path(os.environ.get("TESTFLOW_LOG_DIR", str(BASE_DIR / "data" / "logs")))
+OUTPUT_PREVIEW_CHARS = int(os.environ.get("TESTFLOW_OUTPUT_PREVIEW_CHARS", "8192"))
+
+# Large node output fields are offloaded to compressed artifact blobs
+ARTIFACT_DIR = Path(os.environ.get("TESTFLOW_ARTIFACT_DIR", str(BASE_DIR / "data" / "artifacts")))
+ARTIFACT_MIN_BYTES = int(os.environ.get("TESTFLOW_ARTIFACT_MIN_BYTES", "16384"))
+ARTIFACT_CHUNK_BYTES = int(os.environ.get("TESTFLOW_ARTIFACT_CHUNK_BYTES", str(256 * 1024)))
+# Unreferenced blobs younger than this are kept: their node rows may not be committed yet
+ARTIFACT_GC_GRACE_SECONDS = float(os.environ.get("TESTFLOW_ARTIFACT_GC_GRACE_SECONDS", "600"))
+
+# Execution stop
+STOP_GRACE_SECONDS = int(os.environ.get("TESTFLOW_STOP_GRACE_SECONDS", "5"))
+
+# Execution dispatcher
+EXECUTION_MAX_CONCURRENT = int(os.environ.get("TESTFLOW_MAX_CONCURRENT_EXECUTIONS", "4"))
+EXECUTION_NODE_CONCURRENCY = int(os.environ.get("TESTFLOW_NODE_CONCURRENCY", "16"))
+# SSH connections per host: every running node may target the same host, plus
+# the metrics collector, health prober, resource monitor and an interactive
+# session, so background sampling never waits for a node's connection
+SSH_POOL_MAX_PER_HOST = int(os.environ.get(
+    "TESTFLOW_SSH_POOL_MAX_PER_HOST",
+    str(EXECUTION_NODE_CONCURRENCY + 4)
+))
+# Writer pool: one session per execution loop and per running node, plus the
+# node writer, metrics collector, health prober and resource monitor threads
+DB_POOL_SIZE = int(os.environ.get(
+    "TESTFLOW_DB_POOL_SIZE",
+    str(EXECUTION_MAX_CONCURRENT + EXECUTION_NODE_CONCURRENCY + 4)
+))
+
+# node_executions write-behind: most changes committed in one transaction
+NODE_WRITE_BATCH_SIZE = int(os.environ.get("TESTFLOW_NODE_WRITE_BATCH", "200"))
+
+# Live workflow_state checkpoints into Execution.summary while running
+WORKFLOW_STATE_CHECKPOINT_SECONDS = float(os.environ.get("TESTFLOW_WORKFLOW_STATE_CHECKPOINT", "5"))
+
+# Live execution events (SSE)
+EXECUTION_EVENT_BUFFER_SIZE = int(os.environ.get("TESTFLOW_EXECUTION_EVENT_BUFFER", "2000"))
+EXECUTION_EVENT_RETENTION_SECONDS = float(os.environ.get("TESTFLOW_EXECUTION_EVENT_RETENTION", "300"))
+EXECUTION_EVENT_KEEPALIVE_SECONDS = float(os.environ.get("TESTFLOW_EXECUTION_EVENT_KEEPALIVE", "15"))
+
+# Server leases
+SERVER_LEASE_TTL_SECONDS = float(os.environ.get("TESTFLOW_SERVER_LEASE_TTL", "300"))
+SERVER_RESERVATION_TIMEOUT_SECONDS = float(os.environ.get("TESTFLOW_SERVER_RESERVATION_TIMEOUT", "600"))
+
+# Server placement
+PLACEMENT_STRATEGY = os.environ.get("TESTFLOW_PLACEMENT_STRATEGY", "least_loaded")
+PLACEMENT_METRICS_MAX_AGE = float(os.environ.get("TESTFLOW_PLACEMENT_METRICS_MAX_AGE", "120"))
+PLACEMENT_HISTORY_HOURS = float(os.environ.get("TESTFLOW_PLACEMENT_HISTORY_HOURS", "24"))
+
+# Remote metrics collection
+METRICS_COLLECT_INTERVAL_SECONDS = float(os.environ.get("TESTFLOW_METRICS_INTERVAL", "5"))
+METRICS_COLLECT_CONCURRENCY = int(os.environ.get("TESTFLOW_METRICS_CONCURRENCY", "16"))
+
+# Per-execution resource sampling (0 disables)
+RESOURCE_SAMPLE_INTERVAL_SECONDS = float(os.environ.get("TESTFLOW_RESOURCE_SAMPLE_INTERVAL", "2"))
+
+# Server health probing
+SERVER_PROBE_INTERVAL_SECONDS = float(os.environ.get("TESTFLOW_SERVER_PROBE_INTERVAL", "30"))
+SERVER_PROBE_CONCURRENCY = int(os.environ.get("TESTFLOW_SERVER_PROBE_CONCURRENCY", "16"))
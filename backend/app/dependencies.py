@@ -1,12 +1,75 @@
 # backend/app/dependencies.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
-from .config import DATABASE_PATH
+from .config import (
+    DATABASE_PATH,
+    DB_BUSY_TIMEOUT_MS,
+    DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE_BYTES,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_READ_POOL_SIZE,
+)
 
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def sqlite_pragmas(query_only: bool = False) -> list[str]:
+    """Pragmas run on every new connection.
+
+    WAL lets readers and the writer proceed concurrently; synchronous=NORMAL is
+    safe in WAL mode (a power loss can drop the last commits, never corrupt).
+    """
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={DB_MMAP_SIZE_BYTES}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if query_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def create_sqlite_engine(
+    url: str = DATABASE_URL,
+    pool_size: int = DB_POOL_SIZE,
+    query_only: bool = False
+) -> Engine:
+    """SQLite engine with the pragmas above applied on connect and a sized pool"""
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": DB_BUSY_TIMEOUT_MS / 1000},
+        pool_size=pool_size,
+        max_overflow=DB_POOL_OVERFLOW,
+    )
+    pragmas = sqlite_pragmas(query_only)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return sqlite_engine
+
+
+def create_read_engine(url: str = DATABASE_URL) -> Engine:
+    """Engine behind ``get_read_db``: its own pool, with writes rejected by query_only"""
+    return create_sqlite_engine(url, pool_size=DB_READ_POOL_SIZE, query_only=True)
+
+
+# Read-only requests get their own pool so they never wait for a connection held by a node thread
+engine = create_sqlite_engine()
+read_engine = create_read_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 def get_db():
     """Dependency for getting database session"""
@@ -14,4 +77,12 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Dependency for a read-only database session (GET endpoints)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -5,7 +5,15 @@ from pathlib import Path
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
+from app.api.executions import OUTPUT_LINES_HEADER, OUTPUT_SIZE_HEADER
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.models.setup import init_db
+from app.services.execution.dispatcher import get_execution_dispatcher
+from app.services.execution.node_writer import get_node_writer
+from app.services.execution.resource_monitor import get_resource_monitor
+from app.services.metrics_collector import get_metrics_collector
+from app.services.server_health import get_server_health_prober
+from app.services.ssh_service import get_connection_pool, get_port_cache
 
 
 APP_DIR = Path(__file__).resolve().parent
@@ -25,13 +33,82 @@ def resolve_frontend_dist_dir() -> Path | None:
 FRONTEND_DIST_DIR = resolve_frontend_dist_dir()
 
 
+def purge_expired_server_leases() -> None:
+    """清理上次进程异常退出后残留的过期服务器租约。"""
+    from app.dependencies import SessionLocal
+    from app.services.server_leases import ServerLeaseManager
+
+    db = SessionLocal()
+    try:
+        ServerLeaseManager(db).purge_expired()
+    finally:
+        db.close()
+
+
+def warm_ssh_port_cache() -> None:
+    """用 servers 表中持久化的 ssh_port 预热 SSH 端口缓存。"""
+    from app.dependencies import SessionLocal
+    from app.models.database import Server
+
+    db = SessionLocal()
+    try:
+        servers = db.query(Server).filter(Server.ssh_port.isnot(None)).all()
+        get_port_cache().seed((server.host, server.port or 22, server.ssh_port) for server in servers)
+    finally:
+        db.close()
+
+
+def collect_artifact_garbage() -> None:
+    """清理不再被任何节点记录引用的输出产物（含删除执行时仍在保护期内的）。"""
+    from app.dependencies import SessionLocal
+    from app.services.execution.artifacts import collect_garbage
+
+    db = SessionLocal()
+    try:
+        collect_garbage(db)
+    finally:
+        db.close()
+
+
+def requeue_pending_executions() -> None:
+    """把上次进程退出时仍在排队的执行重新提交给调度器。"""
+    from app.dependencies import SessionLocal
+    from app.models.database import Execution
+
+    db = SessionLocal()
+    try:
+        pending_ids = [
+            execution_id for (execution_id,) in db.query(Execution.id).filter(
+                Execution.status == "pending"
+            ).order_by(Execution.id.asc())
+        ]
+    finally:
+        db.close()
+    dispatcher = get_execution_dispatcher()
+    for execution_id in pending_ids:
+        dispatcher.submit(execution_id)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期处理器，用于启动和关闭事件。"""
     # Startup: Initialize database
     init_db()
+    warm_ssh_port_cache()
+    purge_expired_server_leases()
+    collect_artifact_garbage()
+    get_execution_dispatcher().start()
+    requeue_pending_executions()
+    get_server_health_prober().start()
+    get_metrics_collector().start()
     yield
-    # Shutdown: Add cleanup logic here if needed
+    # Shutdown: stop taking queued executions, then close pooled SSH connections
+    get_metrics_collector().stop()
+    get_server_health_prober().stop()
+    get_execution_dispatcher().shutdown()
+    get_resource_monitor().stop()
+    get_node_writer().stop()
+    get_connection_pool().close_all()
 
 
 app = FastAPI(
@@ -48,6 +125,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, OUTPUT_SIZE_HEADER, OUTPUT_LINES_HEADER],
 )
 
 @app.get("/health")
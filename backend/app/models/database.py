@@ -1,5 +1,5 @@
 # backend/app/models/database.py
-from sqlalchemy import Boolean, Column, Integer, String, Text, ForeignKey, JSON
+from sqlalchemy import Boolean, Column, Float, Index, Integer, String, Text, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship, DeclarativeBase
 
 from app.utils.time import UTCDateTime, utc_now
@@ -14,6 +14,7 @@ class Server(Base):
     name = Column(String(100), unique=True, nullable=False)
     host = Column(String(100), nullable=False)
     port = Column(Integer, default=22)
+    ssh_port = Column(Integer)  # 最近一次连接成功的实际 SSH 端口
     username = Column(String(50))
     password = Column(String(100))
     description = Column(Text)
@@ -58,6 +59,11 @@ class Workflow(Base):
 
 class Execution(Base):
     __tablename__ = "executions"
+    __table_args__ = (
+        Index("ix_executions_created", "created_at"),
+        Index("ix_executions_status_created", "status", "created_at"),
+        Index("ix_executions_workflow_created", "workflow_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
@@ -76,6 +82,9 @@ class Execution(Base):
 
 class NodeExecution(Base):
     __tablename__ = "node_executions"
+    __table_args__ = (
+        Index("ix_node_executions_execution", "execution_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     execution_id = Column(Integer, ForeignKey("executions.id"), nullable=False)
@@ -94,6 +103,57 @@ class NodeExecution(Base):
     execution = relationship("Execution", back_populates="node_executions")
 
 
+class ServerLease(Base):
+    """服务器租约：节点运行期间占用服务器的记录，过期未续约视为释放。"""
+    __tablename__ = "server_leases"
+    __table_args__ = (
+        UniqueConstraint("server_id", "execution_id", "node_id", name="uq_server_leases_holder"),
+        Index("ix_server_leases_server_expires", "server_id", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=False)
+    execution_id = Column(Integer, ForeignKey("executions.id"), nullable=False, index=True)
+    node_id = Column(String(50), nullable=False)
+    region = Column(String(20), index=True)
+    exclusive = Column(Boolean, default=True, nullable=False)  # 随机调度独占；固定调度/上下文复用为共享记录
+    scope = Column(String(20), default="node", server_default="node", nullable=False)  # node | execution（集群整组预留）
+    acquired_at = Column(UTCDateTime(), default=utc_now)
+    expires_at = Column(UTCDateTime(), nullable=False)
+
+
+class ResourceSample(Base):
+    """执行期间的服务器资源采样：一行对应一次采样时刻的一台服务器，带上当时正在运行的节点。"""
+    __tablename__ = "resource_samples"
+    __table_args__ = (
+        Index("ix_resource_samples_execution_sampled", "execution_id", "sampled_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    execution_id = Column(Integer, ForeignKey("executions.id"), nullable=False)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=False)
+    node_ids = Column(JSON, default=list)  # 采样时该执行正在运行的节点
+    sampled_at = Column(UTCDateTime(), nullable=False)
+    cpu_percent = Column(Float)
+    memory_percent = Column(Float)
+    disk_percent = Column(Float)
+    load_1m = Column(Float)
+    disk_read_bytes_per_sec = Column(Float)
+    disk_write_bytes_per_sec = Column(Float)
+    disk_util_percent = Column(Float)  # 各块设备中的最大值
+    net_rx_bytes_per_sec = Column(Float)
+    net_tx_bytes_per_sec = Column(Float)
+
+
+class SchemaMigration(Base):
+    """已执行的数据库迁移版本，见 app/models/migrations.py。"""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(200), nullable=False)
+    applied_at = Column(UTCDateTime(), default=utc_now)
+
+
 class SystemSetting(Base):
     __tablename__ = "system_settings"
 
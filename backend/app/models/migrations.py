@@ -0,0 +1,118 @@
+# backend/app/models/migrations.py
+"""
+版本化数据库迁移。
+
+``create_all`` 只会创建缺失的表，已有表的列和索引变化由这里的迁移补齐。
+每个迁移有递增的版本号，在单独的事务中执行并写入 ``schema_migrations``，
+已记录的版本不会重复执行。新增迁移时只需在 ``MIGRATIONS`` 末尾追加，
+不要修改已发布的迁移。
+"""
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Set
+
+from sqlalchemy import Connection, Engine, text
+
+from app.models.database import SchemaMigration
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _columns(conn: Connection, table_name: str) -> Set[str]:
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table_name})"))}
+
+
+def _add_columns(conn: Connection, table_name: str, columns: List[tuple]) -> None:
+    existing = _columns(conn, table_name)
+    if not existing:
+        return
+    for column, ddl in columns:
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column} {ddl}"))
+
+
+def _servers_columns(conn: Connection) -> None:
+    _add_columns(conn, "servers", [
+        ("tags", "VARCHAR(200)"),
+        ("region", "VARCHAR(20) DEFAULT '私有云'"),
+        ("schedulable", "BOOLEAN DEFAULT 1"),
+        ("ssh_port", "INTEGER"),
+    ])
+
+
+def _workflows_schedule_columns(conn: Connection) -> None:
+    _add_columns(conn, "workflows", [
+        ("schedule_mode", "VARCHAR(20) DEFAULT 'fixed'"),
+        ("schedule_region", "VARCHAR(20) DEFAULT '私有云'"),
+    ])
+
+
+def _server_leases_scope(conn: Connection) -> None:
+    _add_columns(conn, "server_leases", [
+        ("scope", "VARCHAR(20) NOT NULL DEFAULT 'node'"),
+    ])
+
+
+def _history_indexes(conn: Connection) -> None:
+    # 执行列表按状态/工作流过滤并按创建时间倒序；节点记录按执行查询并按 id 排序
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_executions_created ON executions (created_at)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_executions_status_created ON executions (status, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_executions_workflow_created ON executions (workflow_id, created_at)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_node_executions_execution ON node_executions (execution_id, id)"
+    ))
+    conn.execute(text("ANALYZE executions"))
+    conn.execute(text("ANALYZE node_executions"))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "servers: tags, region, schedulable, ssh_port", _servers_columns),
+    Migration(2, "workflows: schedule_mode, schedule_region", _workflows_schedule_columns),
+    Migration(3, "server_leases: scope", _server_leases_scope),
+    Migration(4, "indexes for execution history", _history_indexes),
+]
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    """返回已执行的迁移版本号。"""
+    with engine.connect() as conn:
+        return {version for (version,) in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    按版本顺序执行尚未执行的迁移。
+
+    Args:
+        engine: 用于迁移的 SQLAlchemy 引擎，``schema_migrations`` 表须已存在
+
+    Returns:
+        本次执行的迁移版本号
+    """
+    applied = applied_versions(engine)
+    executed = []
+    for migration in sorted(MIGRATIONS, key=lambda item: item.version):
+        if migration.version in applied:
+            continue
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=utc_now()
+            ))
+        logger.info("Applied database migration %s: %s", migration.version, migration.name)
+        executed.append(migration.version)
+    return executed
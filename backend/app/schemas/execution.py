@@ -1,6 +1,6 @@
 # backend/app/schemas/execution.py
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Dict, Any, Literal
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 
 # Status literals for execution
@@ -12,6 +12,7 @@ class ExecutionCreate(BaseModel):
     workflow_id: int
     trigger_type: TRIGGER_TYPE = Field(default="manual")
     triggered_by: Optional[str] = None
+    priority: int = Field(default=0, description="排队优先级，数值越大越先执行")
 
 class ExecutionUpdate(BaseModel):
     status: Optional[EXECUTION_STATUS] = None
@@ -47,3 +48,16 @@ class NodeExecutionResponse(BaseModel):
     retry_count: int
 
     model_config = ConfigDict(from_attributes=True)
+
+class ExecutionQueueResponse(BaseModel):
+    queued: int
+    running: int
+    max_concurrent_executions: int
+    node_concurrency: int
+    active_nodes: int
+    waiting_nodes: int
+    oldest_wait_seconds: float
+    avg_wait_seconds: float
+    max_wait_seconds: float
+    queued_execution_ids: List[int]
+    running_execution_ids: List[int]
@@ -1,6 +1,6 @@
 # backend/app/schemas/server.py
 from pydantic import BaseModel, Field, ConfigDict, SecretStr
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime
 
 REGION_OPTIONS = Literal["私有云", "公司-上层", "公司", "Fit楼", "公有云", "异构"]
@@ -36,6 +36,7 @@ class ServerResponse(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     host: str = Field(..., min_length=1, max_length=100)
     port: int = Field(default=22, ge=1, le=65535)
+    ssh_port: Optional[int] = None
     username: Optional[str] = Field(default=None, max_length=50)
     description: Optional[str] = None
     tags: Optional[str] = Field(default=None, max_length=200)
@@ -47,3 +48,26 @@ class ServerResponse(BaseModel):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class BatchExecuteRequest(BaseModel):
+    server_ids: List[int] = Field(..., min_length=1)
+    command: str = Field(..., min_length=1)
+    timeout: int = Field(default=30, ge=1, le=3600)
+    max_parallel: int = Field(default=8, ge=1, le=64)
+
+class BatchExecuteResult(BaseModel):
+    server_id: int
+    server_name: str
+    exit_status: int
+    stdout: str
+    stderr: str
+    error: Optional[str] = None
+    ssh_port: Optional[int] = None
+    elapsed_ms: int
+
+class BatchExecuteResponse(BaseModel):
+    command: str
+    succeeded: int
+    failed: int
+    results: List[BatchExecuteResult]
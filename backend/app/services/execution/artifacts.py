@@ -0,0 +1,341 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import (
+    ARTIFACT_CHUNK_BYTES,
+    ARTIFACT_DIR,
+    ARTIFACT_GC_GRACE_SECONDS,
+    ARTIFACT_MIN_BYTES,
+    OUTPUT_PREVIEW_CHARS
+)
+from app.models.database import NodeExecution
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS_KEY = "artifacts"
+TEXT_ENCODING = "text"
+JSONL_ENCODING = "jsonl"
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArtifactNotFound(LookupError):
+    pass
+
+
+def encode_field(value: Any) -> Tuple[bytes, str]:
+    """Bytes stored for an output field: text as UTF-8, lists as one JSON document per line."""
+    if isinstance(value, str):
+        return value.encode("utf-8"), TEXT_ENCODING
+    if isinstance(value, list):
+        lines = [json.dumps(item, ensure_ascii=False, default=str) for item in value]
+        return "".join(f"{line}\n" for line in lines).encode("utf-8"), JSONL_ENCODING
+    return json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"), TEXT_ENCODING
+
+
+def count_lines(data: bytes) -> int:
+    return data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+
+
+def _after_newlines(data: bytes, count: int) -> int:
+    position = 0
+    for _ in range(count):
+        found = data.find(b"\n", position)
+        if found < 0:
+            return len(data)
+        position = found + 1
+    return position
+
+
+class ArtifactStore:
+    """Content-addressed store for large node output fields.
+
+    A blob is named by the sha256 of its bytes and written as a run of
+    independently gzipped chunks (still a valid .gz file), with a small index
+    of where each chunk starts in the raw and compressed streams and how many
+    lines precede it. Byte and line range reads decompress only the chunks
+    they touch. Identical outputs share one blob, so a blob is only removed
+    by ``sweep`` once no node row references it. Reusing a stored blob
+    refreshes its mtime, and blobs younger than ``gc_grace_seconds`` are
+    never swept, so a put whose node row is not committed yet keeps its blob.
+    """
+
+    def __init__(
+        self,
+        root: Path = ARTIFACT_DIR,
+        chunk_bytes: int = ARTIFACT_CHUNK_BYTES,
+        gc_grace_seconds: float = ARTIFACT_GC_GRACE_SECONDS
+    ):
+        self.root = Path(root)
+        self.chunk_bytes = chunk_bytes
+        self.gc_grace_seconds = gc_grace_seconds
+        # Orders a put that reuses a blob against a sweep removing it
+        self._lock = threading.Lock()
+
+    def _paths(self, digest: str) -> Tuple[Path, Path]:
+        if not _DIGEST.match(str(digest)):
+            raise ArtifactNotFound(digest)
+        directory = self.root / digest[:2]
+        return directory / f"{digest}.gz", directory / f"{digest}.idx.json"
+
+    def put(self, data: bytes) -> Dict[str, Any]:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path, index_path = self._paths(digest)
+        if not self._reuse(blob_path, index_path):
+            self._write(data, blob_path, index_path)
+        return {"sha256": digest, "size": len(data), "lines": count_lines(data)}
+
+    def _reuse(self, blob_path: Path, index_path: Path) -> bool:
+        with self._lock:
+            try:
+                os.utime(blob_path)
+                os.utime(index_path)
+            except FileNotFoundError:
+                return False
+            return True
+
+    def _write(self, data: bytes, blob_path: Path, index_path: Path) -> None:
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        chunks: List[List[int]] = []
+        compressed_offset = 0
+        lines_before = 0
+        with tempfile.NamedTemporaryFile(dir=blob_path.parent, delete=False) as blob_file:
+            for raw_offset in range(0, len(data), self.chunk_bytes):
+                chunk = data[raw_offset:raw_offset + self.chunk_bytes]
+                compressed = gzip.compress(chunk, compresslevel=6, mtime=0)
+                blob_file.write(compressed)
+                chunks.append([raw_offset, compressed_offset, lines_before])
+                compressed_offset += len(compressed)
+                lines_before += chunk.count(b"\n")
+        os.replace(blob_file.name, blob_path)
+        index = {"size": len(data), "lines": count_lines(data), "compressed_size": compressed_offset, "chunks": chunks}
+        # The index is written last; a blob without one is rewritten on the next put
+        with tempfile.NamedTemporaryFile("w", dir=blob_path.parent, delete=False) as index_file:
+            json.dump(index, index_file)
+        os.replace(index_file.name, index_path)
+
+    def sweep(self, referenced: Set[str], candidates: Optional[Iterable[str]] = None) -> int:
+        """Remove blobs not in ``referenced``, from ``candidates`` or the whole store.
+
+        Blobs touched within ``gc_grace_seconds`` are kept, as are leftover
+        temporary files of that age. Returns the number of blobs removed.
+        """
+        cutoff = time.time() - self.gc_grace_seconds
+        if candidates is None:
+            candidates = set()
+            for path in self.root.glob("??/*"):
+                digest = path.name.split(".", 1)[0]
+                if _DIGEST.match(digest):
+                    candidates.add(digest)
+                elif _modified_before(path, cutoff):
+                    path.unlink(missing_ok=True)
+        removed = 0
+        for digest in set(candidates) - set(referenced):
+            try:
+                paths = self._paths(digest)
+            except ArtifactNotFound:
+                continue
+            with self._lock:
+                if not any(path.exists() for path in paths):
+                    continue
+                if not all(_modified_before(path, cutoff) for path in paths):
+                    continue
+                try:
+                    # Index first: a blob without one is rewritten by the next put
+                    for path in reversed(paths):
+                        path.unlink(missing_ok=True)
+                except OSError:
+                    logger.exception("Failed to remove artifact %s", digest)
+                    continue
+            removed += 1
+        return removed
+
+    def index(self, digest: str) -> Dict[str, Any]:
+        _, index_path = self._paths(digest)
+        try:
+            with open(index_path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            raise ArtifactNotFound(digest)
+
+    def _chunks(self, digest: str, index: Dict[str, Any], first: int) -> Iterator[Tuple[int, bytes]]:
+        blob_path, _ = self._paths(digest)
+        chunks = index["chunks"]
+        try:
+            handle = open(blob_path, "rb")
+        except FileNotFoundError:
+            raise ArtifactNotFound(digest)
+        with handle:
+            handle.seek(chunks[first][1])
+            for position in range(first, len(chunks)):
+                raw_offset, compressed_offset, _ = chunks[position]
+                end = chunks[position + 1][1] if position + 1 < len(chunks) else index["compressed_size"]
+                yield raw_offset, gzip.decompress(handle.read(end - compressed_offset))
+
+    def read_bytes(self, digest: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        index = self.index(digest)
+        end = index["size"] if length is None else min(index["size"], offset + length)
+        if offset >= end:
+            return b""
+        first = bisect_right([chunk[0] for chunk in index["chunks"]], offset) - 1
+        base = index["chunks"][first][0]
+        parts = []
+        for raw_offset, data in self._chunks(digest, index, first):
+            parts.append(data)
+            if raw_offset + len(data) >= end:
+                break
+        return b"".join(parts)[offset - base:end - base]
+
+    def read_lines(self, digest: str, start: int = 0, count: Optional[int] = None) -> bytes:
+        index = self.index(digest)
+        if start >= index["lines"]:
+            return b""
+        lines_before = [chunk[2] for chunk in index["chunks"]]
+        # Last chunk holding the newline that ends line ``start - 1``
+        first = max(0, bisect_left(lines_before, start) - 1)
+        skip = start - lines_before[first]
+        buffer = bytearray()
+        newlines = 0
+        for _, data in self._chunks(digest, index, first):
+            buffer += data
+            newlines += data.count(b"\n")
+            if count is not None and newlines >= skip + count:
+                break
+        data = bytes(buffer)
+        begin = _after_newlines(data, skip)
+        end = len(data) if count is None else begin + _after_newlines(data[begin:], count)
+        return data[begin:end]
+
+    def read_field(
+        self,
+        output: Dict[str, Any],
+        field: str,
+        offset: int = 0,
+        length: Optional[int] = None,
+        start_line: Optional[int] = None,
+        line_count: Optional[int] = None
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """Range of one output field, whether it was offloaded or is still inline.
+
+        Lines are used when ``start_line`` is given, bytes otherwise. Raises
+        KeyError for a field the output does not have.
+        """
+        reference = ((output or {}).get(ARTIFACTS_KEY) or {}).get(field)
+        if reference is not None:
+            digest = reference["sha256"]
+            content = (
+                self.read_lines(digest, start_line, line_count)
+                if start_line is not None
+                else self.read_bytes(digest, offset, length)
+            )
+            return content, reference
+        if field == ARTIFACTS_KEY or field not in (output or {}):
+            raise KeyError(field)
+        data, encoding = encode_field(output[field])
+        meta = {"encoding": encoding, "size": len(data), "lines": count_lines(data)}
+        if start_line is not None:
+            begin = _after_newlines(data, start_line)
+            end = len(data) if line_count is None else begin + _after_newlines(data[begin:], line_count)
+            return data[begin:end], meta
+        return data[offset:len(data) if length is None else offset + length], meta
+
+
+def _modified_before(path: Path, cutoff: float) -> bool:
+    try:
+        return path.stat().st_mtime < cutoff
+    except FileNotFoundError:
+        return True
+
+
+def _list_preview(value: List[Any], preview_chars: int) -> List[Any]:
+    preview = []
+    used = 0
+    for item in value:
+        used += len(json.dumps(item, ensure_ascii=False, default=str))
+        if used > preview_chars:
+            break
+        preview.append(item)
+    return preview
+
+
+def offload_output(
+    output: Optional[Dict[str, Any]],
+    store: Optional[ArtifactStore] = None,
+    min_bytes: int = ARTIFACT_MIN_BYTES,
+    preview_chars: int = OUTPUT_PREVIEW_CHARS
+) -> Optional[Dict[str, Any]]:
+    """Copy of a node result with large text and list fields moved to the artifact store.
+
+    Each offloaded field keeps a preview of the same type (the head of the
+    text, the leading items of the list) and ``artifacts[field]`` references
+    the full value. Fields stay inline when the store cannot be written.
+    """
+    if not output:
+        return output
+    store = store or get_artifact_store()
+    offloaded = dict(output)
+    references = dict(offloaded.get(ARTIFACTS_KEY) or {})
+    for field, value in output.items():
+        if field == ARTIFACTS_KEY or not isinstance(value, (str, list)):
+            continue
+        data, encoding = encode_field(value)
+        if len(data) < min_bytes:
+            continue
+        try:
+            reference = store.put(data)
+        except OSError:
+            logger.exception("Failed to offload output field %s", field)
+            continue
+        references[field] = {**reference, "encoding": encoding}
+        offloaded[field] = value[:preview_chars] if isinstance(value, str) else _list_preview(value, preview_chars)
+    if references:
+        offloaded[ARTIFACTS_KEY] = references
+    return offloaded
+
+
+def referenced_digests(db: Session, execution_id: Optional[int] = None) -> Set[str]:
+    """Digests referenced by node rows, of one execution or of all of them."""
+    query = db.query(func.json_extract(NodeExecution.output_data, f"$.{ARTIFACTS_KEY}")).filter(
+        func.json_extract(NodeExecution.output_data, f"$.{ARTIFACTS_KEY}").isnot(None)
+    )
+    if execution_id is not None:
+        query = query.filter(NodeExecution.execution_id == execution_id)
+    digests = set()
+    for (references,) in query:
+        for reference in json.loads(references).values():
+            if isinstance(reference, dict) and reference.get("sha256"):
+                digests.add(reference["sha256"])
+    return digests
+
+
+def collect_garbage(
+    db: Session,
+    store: Optional[ArtifactStore] = None,
+    candidates: Optional[Iterable[str]] = None
+) -> int:
+    """Mark the digests node rows still reference and sweep the rest from the store."""
+    store = store or get_artifact_store()
+    removed = store.sweep(referenced_digests(db), candidates)
+    if removed:
+        logger.info("Removed %d unreferenced artifacts", removed)
+    return removed
+
+
+_store = ArtifactStore()
+
+
+def get_artifact_store() -> ArtifactStore:
+    return _store
@@ -0,0 +1,73 @@
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.utils.time import utc_now
+
+
+class CancellationToken:
+    """Stop signal shared by the scheduler and the node handlers of one execution."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.cancelled_at: Optional[datetime] = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.cancelled_at = utc_now()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds; returns True as soon as the token is cancelled."""
+        return self._event.wait(max(0.0, timeout))
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+
+class CancellationRegistry:
+    """Process-wide cancellation tokens keyed by execution id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[int, CancellationToken] = {}
+
+    def get(self, execution_id: int) -> CancellationToken:
+        with self._lock:
+            token = self._tokens.get(execution_id)
+            if token is None:
+                token = self._tokens[execution_id] = CancellationToken()
+            return token
+
+    def cancel(self, execution_id: int) -> None:
+        self.get(execution_id).cancel()
+
+    def is_cancelled(self, execution_id: int) -> bool:
+        with self._lock:
+            token = self._tokens.get(execution_id)
+        return token is not None and token.is_cancelled()
+
+    def discard(self, execution_id: int) -> None:
+        with self._lock:
+            self._tokens.pop(execution_id, None)
+
+
+_registry = CancellationRegistry()
+
+
+def get_cancellation_registry() -> CancellationRegistry:
+    return _registry
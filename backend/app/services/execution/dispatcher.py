@@ -0,0 +1,258 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import EXECUTION_MAX_CONCURRENT, EXECUTION_NODE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+WAIT_SAMPLE_SIZE = 100
+
+
+@dataclass(order=True)
+class _QueuedExecution:
+    sort_key: tuple
+    execution_id: int = field(compare=False)
+    priority: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+def _copy_outcome(target: Future, source: Future) -> None:
+    if source.cancelled():
+        target.set_exception(CancelledError())
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class SharedNodeExecutor(Executor):
+    """Hands node work to the dispatcher-wide pool and counts in-flight nodes.
+
+    Work that starts with a long wait (a cluster node waiting for its servers)
+    goes through ``submit_after``: the wait runs on a separate pool and is
+    counted in ``waiting``, so it never holds one of the node workers.
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor, wait_pool: Optional[ThreadPoolExecutor] = None):
+        self._pool = pool
+        self._wait_pool = wait_pool or pool
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            self.in_flight += 1
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def submit_after(self, prepare: Callable[[], Any], fn: Callable[[Any], Any]) -> Future:
+        """Run ``prepare()`` on the wait pool, then ``fn(prepared)`` on the node pool.
+
+        The returned future is already running and cannot be cancelled; it
+        completes with ``fn``'s result or with the first exception raised.
+        """
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            self.waiting += 1
+
+        def run() -> None:
+            try:
+                prepared = prepare()
+            except BaseException as exc:
+                future.set_exception(exc)
+                return
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            try:
+                inner = self.submit(fn, prepared)
+            except BaseException as exc:
+                future.set_exception(exc)
+                return
+            inner.add_done_callback(partial(_copy_outcome, future))
+
+        try:
+            self._wait_pool.submit(run)
+        except BaseException:
+            with self._lock:
+                self.waiting -= 1
+            raise
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+
+class ExecutionDispatcher:
+    """Long-lived admission control for workflow executions.
+
+    Pending executions wait in a priority queue (higher priority first, FIFO
+    within a priority). At most ``max_concurrent`` executions run at once, and
+    all of them share one node pool of ``node_concurrency`` threads instead of
+    each execution creating its own.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_concurrent: int = EXECUTION_MAX_CONCURRENT,
+        node_concurrency: int = EXECUTION_NODE_CONCURRENCY,
+        engine_factory: Optional[Callable[..., Any]] = None
+    ):
+        self.session_factory = session_factory
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.node_concurrency = max(1, int(node_concurrency))
+        self._engine_factory = engine_factory
+        self._cond = threading.Condition()
+        self._queue: List[_QueuedExecution] = []
+        self._queued_ids: Dict[int, _QueuedExecution] = {}
+        self._running: Dict[int, float] = {}
+        self._sequence = itertools.count()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._runners: List[threading.Thread] = []
+        self._node_pool: Optional[ThreadPoolExecutor] = None
+        self._wait_pool: Optional[ThreadPoolExecutor] = None
+        self.node_executor: Optional[SharedNodeExecutor] = None
+        self._closed = False
+
+    def start(self) -> None:
+        with self._cond:
+            if self._runners:
+                return
+            self._closed = False
+            self._node_pool = ThreadPoolExecutor(max_workers=self.node_concurrency, thread_name_prefix="workflow-node")
+            self._wait_pool = ThreadPoolExecutor(max_workers=self.node_concurrency, thread_name_prefix="cluster-reservation")
+            self.node_executor = SharedNodeExecutor(self._node_pool, self._wait_pool)
+            for index in range(self.max_concurrent):
+                runner = threading.Thread(target=self._run_loop, name=f"execution-runner-{index}", daemon=True)
+                runner.start()
+                self._runners.append(runner)
+        logger.info(
+            "Execution dispatcher started: %s concurrent executions, %s node workers",
+            self.max_concurrent, self.node_concurrency
+        )
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            runners, self._runners = self._runners, []
+            pool, self._node_pool = self._node_pool, None
+            wait_pool, self._wait_pool = self._wait_pool, None
+        for item in (wait_pool, pool):
+            if item is not None:
+                item.shutdown(wait=False, cancel_futures=True)
+        for runner in runners:
+            runner.join(timeout=1)
+
+    def submit(self, execution_id: int, priority: int = 0) -> None:
+        """Queue an execution; it runs once a runner is free (runners exist only after ``start()``)."""
+        with self._cond:
+            if execution_id in self._queued_ids or execution_id in self._running:
+                return
+            item = _QueuedExecution(
+                sort_key=(-int(priority), next(self._sequence)),
+                execution_id=execution_id,
+                priority=int(priority),
+                enqueued_at=time.monotonic()
+            )
+            heapq.heappush(self._queue, item)
+            self._queued_ids[execution_id] = item
+            self._cond.notify()
+
+    def discard(self, execution_id: int) -> bool:
+        """Drop a queued execution (e.g. stopped before it started). Returns True if it was queued."""
+        with self._cond:
+            item = self._queued_ids.pop(execution_id, None)
+            if item is None:
+                return False
+            self._queue.remove(item)
+            heapq.heapify(self._queue)
+            return True
+
+    def is_active(self, execution_id: int) -> bool:
+        """Whether the execution is queued or running in this dispatcher."""
+        with self._cond:
+            return execution_id in self._queued_ids or execution_id in self._running
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._cond:
+            queued = sorted(self._queue)
+            waits = list(self._waits)
+            running = list(self._running)
+        return {
+            "queued": len(queued),
+            "running": len(running),
+            "max_concurrent_executions": self.max_concurrent,
+            "node_concurrency": self.node_concurrency,
+            "active_nodes": self.node_executor.in_flight if self.node_executor else 0,
+            "waiting_nodes": self.node_executor.waiting if self.node_executor else 0,
+            "oldest_wait_seconds": round(now - min(item.enqueued_at for item in queued), 3) if queued else 0.0,
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "max_wait_seconds": round(max(waits), 3) if waits else 0.0,
+            "queued_execution_ids": [item.execution_id for item in queued],
+            "running_execution_ids": running,
+        }
+
+    def _run_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                item = heapq.heappop(self._queue)
+                self._queued_ids.pop(item.execution_id, None)
+                started = time.monotonic()
+                self._waits.append(started - item.enqueued_at)
+                self._running[item.execution_id] = started
+            try:
+                self._execute(item.execution_id)
+            except Exception:
+                logger.exception("Execution %s crashed in dispatcher", item.execution_id)
+            finally:
+                with self._cond:
+                    self._running.pop(item.execution_id, None)
+
+    def _execute(self, execution_id: int) -> None:
+        db = self.session_factory()
+        try:
+            engine = self._create_engine(db)
+            engine.execute_workflow(execution_id, node_executor=self.node_executor)
+        finally:
+            db.close()
+
+    def _create_engine(self, db: Session):
+        if self._engine_factory is not None:
+            return self._engine_factory(db, session_factory=self.session_factory)
+        from app.services.execution.engine import ExecutionEngine
+        return ExecutionEngine(db, session_factory=self.session_factory)
+
+
+_dispatcher: Optional[ExecutionDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_execution_dispatcher() -> ExecutionDispatcher:
+    """Return the process-wide dispatcher, creating it on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            from app.dependencies import SessionLocal
+            _dispatcher = ExecutionDispatcher(SessionLocal)
+        return _dispatcher
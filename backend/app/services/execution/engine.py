@@ -1,16 +1,29 @@
 import logging
-from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
-from threading import RLock
-from typing import Any, Callable, Dict, List, Optional, Set
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, sessionmaker
 
+from app.config import SERVER_LEASE_TTL_SECONDS, STOP_GRACE_SECONDS, WORKFLOW_STATE_CHECKPOINT_SECONDS
 from app.models.database import Execution, Workflow
+from app.services.server_leases import ServerLeaseManager
 from app.services.ssh_service import SSHService
 from app.utils.time import utc_now
 
+from .artifacts import get_artifact_store
+from .cancellation import get_cancellation_registry
+from .events import execution_event_data, get_event_bus
 from .graph import GraphMixin
+from .remote_processes import get_remote_process_registry, terminate_remote_processes
+from .resource_monitor import get_resource_monitor
+from .scheduler import DagScheduler, SkippedNode
+from .workflow_state import LiveWorkflowState, get_workflow_states
 from .node_dispatch import NodeDispatchMixin
+from .node_writer import get_node_writer
 from .server_resolution import ServerResolutionMixin
 from .context import ContextMixin
 from .utils import UtilsMixin
@@ -24,6 +37,13 @@ from .handlers import (
 
 logger = logging.getLogger(__name__)
 
+STOPPED_REASON = "Skipped because execution was stopped"
+# Stops from this process arrive through the cancellation registry; the DB is
+# only re-read this often to catch stops written by another process.
+STOP_DB_RECHECK_SECONDS = 5.0
+# Long-running nodes keep their server leases alive through the scheduling loop
+LEASE_HEARTBEAT_SECONDS = SERVER_LEASE_TTL_SECONDS / 3
+
 
 class ExecutionEngine(
     GraphMixin,
@@ -42,8 +62,7 @@ class ExecutionEngine(
     def __init__(
         self,
         db: Session,
-        session_factory: Optional[Callable[[], Session]] = None,
-        reservation_lock: Optional[RLock] = None
+        session_factory: Optional[Callable[[], Session]] = None
     ):
         self.db = db
         self.ssh_service = SSHService()
@@ -52,7 +71,12 @@ class ExecutionEngine(
             autoflush=False,
             bind=db.get_bind()
         )
-        self.reservation_lock = reservation_lock or RLock()
+        self.cancellation = get_cancellation_registry()
+        self.resource_monitor = get_resource_monitor()
+        self.events = get_event_bus()
+        self.workflow_states = get_workflow_states()
+        self.node_writer = get_node_writer()
+        self.artifact_store = get_artifact_store()
         self._node_handlers: Dict[str, Callable] = {
             "shell": self._execute_shell_node,
             "upload": self._execute_upload_node,
@@ -103,14 +127,25 @@ class ExecutionEngine(
         self,
         workflow_id: Optional[int] = None,
         status: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        before: Optional[Tuple[datetime, int]] = None,
+        options: Sequence[Any] = ()
     ) -> List[Execution]:
+        """Newest first; ``before`` is the (created_at, id) of the last row of the previous page."""
         query = self.db.query(Execution)
         if workflow_id:
             query = query.filter(Execution.workflow_id == workflow_id)
         if status:
             query = query.filter(Execution.status == status)
-        return query.order_by(Execution.created_at.desc()).limit(limit).all()
+        if before is not None:
+            created_at, execution_id = before
+            query = query.filter(or_(
+                Execution.created_at < created_at,
+                and_(Execution.created_at == created_at, Execution.id < execution_id),
+            ))
+        if options:
+            query = query.options(*options)
+        return query.order_by(Execution.created_at.desc(), Execution.id.desc()).limit(limit).all()
 
     def stop_execution(self, execution_id: int) -> Optional[Execution]:
         execution = self.get_execution(execution_id)
@@ -123,32 +158,49 @@ class ExecutionEngine(
             execution.finished_at = stopped_at
             if execution.started_at:
                 execution.duration = int((execution.finished_at - execution.started_at).total_seconds())
-            workflow = self.db.query(Workflow).filter(Workflow.id == execution.workflow_id).first()
-            summary = {
-                **(execution.summary or {}),
-                "stopped_at": stopped_at.isoformat(),
-            }
-            if workflow:
-                summary.update({
-                    "workflow_state": self._build_workflow_state_snapshot(
-                        execution_id,
-                        workflow.nodes or [],
-                        workflow.edges or [],
-                        {}
-                    ),
-                })
-            execution.summary = summary
+            # A worker running this execution here writes the final summary (and terminates its
+            # remote processes); otherwise this is the only writer and records the stop itself
+            if self.workflow_states.get(execution_id) is None:
+                workflow = self.db.query(Workflow).filter(Workflow.id == execution.workflow_id).first()
+                summary = {
+                    **(execution.summary or {}),
+                    "stopped_at": stopped_at.isoformat(),
+                }
+                if workflow:
+                    summary.update({
+                        "workflow_state": self._current_workflow_state(
+                            execution_id,
+                            workflow.nodes or [],
+                            workflow.edges or [],
+                            {}
+                        ),
+                    })
+                execution.summary = summary
             self.db.commit()
             self.db.refresh(execution)
+            self.events.publish(execution_id, "execution", execution_event_data(execution))
+            self.cancellation.cancel(execution_id)
             logger.info("Stopped execution %s", execution_id)
 
         return execution
 
-    def _is_stop_requested(self, execution_id: int) -> bool:
+    def _terminate_remote_processes(self, execution_id: int) -> List[Dict[str, Any]]:
+        """Terminate the remote processes still registered by the execution's nodes."""
+        processes = get_remote_process_registry().pop_all(execution_id)
+        return terminate_remote_processes(self.ssh_service, processes, STOP_GRACE_SECONDS)
+
+    def _is_stop_requested(self, execution_id: int, check_db: bool = True) -> bool:
+        if self.cancellation.is_cancelled(execution_id):
+            return True
+        if not check_db:
+            return False
         status = self.db.query(Execution.status).filter(
             Execution.id == execution_id
         ).scalar()
-        return status == "stopped"
+        if status == "stopped":
+            self.cancellation.cancel(execution_id)
+            return True
+        return False
 
     def _current_execution_summary(self, execution_id: int) -> Dict[str, Any]:
         summary = self.db.query(Execution.summary).filter(
@@ -156,7 +208,22 @@ class ExecutionEngine(
         ).scalar()
         return dict(summary or {})
 
-    def execute_workflow(self, execution_id: int) -> None:
+    def _checkpoint_workflow_state(
+        self,
+        execution_id: int,
+        live_state: LiveWorkflowState,
+        statuses: Dict[str, str]
+    ) -> int:
+        """Store the live workflow_state in Execution.summary; returns the revision written."""
+        snapshot = live_state.snapshot(statuses)
+        self.db.query(Execution).filter(Execution.id == execution_id).update(
+            {Execution.summary: {**self._current_execution_summary(execution_id), "workflow_state": snapshot}},
+            synchronize_session=False
+        )
+        self.db.commit()
+        return snapshot["revision"]
+
+    def execute_workflow(self, execution_id: int, node_executor: Optional[Executor] = None) -> None:
         execution = self.get_execution(execution_id)
         if not execution:
             logger.error("Execution %s not found", execution_id)
@@ -168,15 +235,20 @@ class ExecutionEngine(
             execution.status = "failed"
             execution.finished_at = utc_now()
             self.db.commit()
+            self.events.publish(execution_id, "execution", execution_event_data(execution))
+            self.events.close(execution_id)
             return
 
         if self._is_stop_requested(execution_id):
             logger.info("Execution %s was stopped before worker start", execution_id)
+            self.cancellation.discard(execution_id)
+            self.events.close(execution_id)
             return
 
         execution.status = "running"
         execution.started_at = utc_now()
         self.db.commit()
+        self.events.publish(execution_id, "execution", execution_event_data(execution))
 
         nodes = workflow.nodes or []
         edges = workflow.edges or []
@@ -190,107 +262,84 @@ class ExecutionEngine(
         blocking_skipped_count = 0
 
         try:
+            live_state = LiveWorkflowState(nodes, edges)
+            self.workflow_states.register(execution_id, live_state)
+            checkpointed_revision = live_state.revision
             node_order, nodes_by_id, parents, children, edge_labels = self._build_execution_graph(nodes, edges)
-            pending: Set[str] = set(node_order)
+            scheduler = DagScheduler(node_order, parents, children)
+            for node_id in node_order:
+                if nodes_by_id[node_id].get("type") == "parallel":
+                    parallel_cfg = nodes_by_id[node_id].get("config") or {}
+                    scheduler.add_parallel_scope(node_id, int(parallel_cfg.get("max_concurrent", 5)))
+            statuses = scheduler.statuses
             running: Dict[Future, str] = {}
-            statuses: Dict[str, str] = {}
             context_updates: Dict[str, Dict[str, Any]] = {}
-            node_output_data: Dict[str, Dict[str, Any]] = {}
-            loop_state: Dict[str, Dict[str, Any]] = {}
-            control_flow_skipped: Set[str] = set()
+            terminated_processes: List[Dict[str, Any]] = []
             stop_requested = False
-
-            max_workers = max(1, min(8, len(node_order) or 1))
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                while pending or running:
-                    if self._is_stop_requested(execution_id):
+            stop_waiter: Future = Future()
+            self.cancellation.get(execution_id).add_callback(
+                lambda: stop_waiter.done() or stop_waiter.set_result(True)
+            )
+            next_db_check = time.monotonic() + STOP_DB_RECHECK_SECONDS
+            next_lease_heartbeat = time.monotonic() + LEASE_HEARTBEAT_SECONDS
+            next_checkpoint = time.monotonic() + WORKFLOW_STATE_CHECKPOINT_SECONDS
+
+            def record_skipped(skipped_nodes: List[SkippedNode]) -> None:
+                nonlocal skipped_count, blocking_skipped_count
+                for item in skipped_nodes:
+                    skipped_count += 1
+                    if item.blocking:
+                        blocking_skipped_count += 1
+                    self._create_skipped_node_execution(execution_id, nodes_by_id[item.node_id], item.reason)
+
+            if node_executor is not None:
+                executor_scope = nullcontext(node_executor)
+            else:
+                executor_scope = ThreadPoolExecutor(max_workers=max(1, min(8, len(node_order) or 1)))
+            with executor_scope as executor:
+                while scheduler.pending or running:
+                    check_db = time.monotonic() >= next_db_check
+                    if check_db:
+                        next_db_check = time.monotonic() + STOP_DB_RECHECK_SECONDS
+                    if time.monotonic() >= next_lease_heartbeat:
+                        next_lease_heartbeat = time.monotonic() + LEASE_HEARTBEAT_SECONDS
+                        ServerLeaseManager(self.db).heartbeat(execution_id)
+                    if time.monotonic() >= next_checkpoint and live_state.revision != checkpointed_revision:
+                        next_checkpoint = time.monotonic() + WORKFLOW_STATE_CHECKPOINT_SECONDS
+                        checkpointed_revision = self._checkpoint_workflow_state(execution_id, live_state, statuses)
+                    if not stop_requested and self._is_stop_requested(execution_id, check_db=check_db):
                         stop_requested = True
+                        cancelled = []
                         for future, node_id in list(running.items()):
                             if future.cancel():
                                 running.pop(future, None)
-                                statuses[node_id] = "skipped"
-                                skipped_count += 1
-                                blocking_skipped_count += 1
-                                self._create_skipped_node_execution(
-                                    execution_id,
-                                    nodes_by_id[node_id],
-                                    "Skipped because execution was stopped"
-                                )
-                        for node_id in list(pending):
-                            pending.remove(node_id)
-                            statuses[node_id] = "skipped"
-                            skipped_count += 1
-                            blocking_skipped_count += 1
-                            self._create_skipped_node_execution(
-                                execution_id,
-                                nodes_by_id[node_id],
-                                "Skipped because execution was stopped"
-                            )
+                                scheduler.cancel(node_id)
+                                cancelled.append(SkippedNode(node_id, STOPPED_REASON, True))
+                        record_skipped(cancelled)
+                        record_skipped(scheduler.skip_pending(STOPPED_REASON))
+                        terminated_processes.extend(self._terminate_remote_processes(execution_id))
                         if not running:
                             break
 
-                    blocked = [
-                        node_id for node_id in node_order
-                        if node_id in pending and any(statuses.get(parent_id) in {"failed", "skipped"} for parent_id in parents[node_id])
-                    ]
-                    for node_id in blocked:
-                        blocking_parents = [
-                            parent_id for parent_id in parents[node_id]
-                            if statuses.get(parent_id) in {"failed", "skipped"}
-                        ]
-                        is_control_flow_skip = bool(blocking_parents) and all(
-                            statuses.get(parent_id) == "skipped" and parent_id in control_flow_skipped
-                            for parent_id in blocking_parents
-                        )
-                        pending.remove(node_id)
-                        statuses[node_id] = "skipped"
-                        skipped_count += 1
-                        if is_control_flow_skip:
-                            control_flow_skipped.add(node_id)
-                            reason = "Skipped because an upstream condition branch was not selected"
-                        else:
-                            blocking_skipped_count += 1
-                            reason = "Skipped because an upstream node did not complete successfully"
-                        self._create_skipped_node_execution(
-                            execution_id,
-                            nodes_by_id[node_id],
-                            reason
-                        )
-
-                    ready = [
-                        node_id for node_id in node_order
-                        if node_id in pending and all(statuses.get(parent_id) == "success" for parent_id in parents[node_id])
-                    ]
-                    for node_id in ready:
-                        pending.remove(node_id)
+                    for node_id in scheduler.pop_ready():
                         context = {
                             **workflow_context,
                             **self._merge_parent_contexts(parents[node_id], context_updates),
                         }
-                        future = executor.submit(
-                            self._execute_workflow_node,
-                            execution_id,
-                            nodes_by_id[node_id],
-                            context
-                        )
+                        future = self._submit_workflow_node(executor, execution_id, nodes_by_id[node_id], context)
                         running[future] = node_id
 
                     if not running:
-                        if pending:
-                            for node_id in list(pending):
-                                pending.remove(node_id)
-                                statuses[node_id] = "skipped"
-                                skipped_count += 1
-                                blocking_skipped_count += 1
-                                self._create_skipped_node_execution(
-                                    execution_id,
-                                    nodes_by_id[node_id],
-                                    "Skipped because workflow graph contains a cycle or unreachable dependency"
-                                )
+                        record_skipped(scheduler.skip_pending(
+                            "Skipped because workflow graph contains a cycle or unreachable dependency"
+                        ))
                         break
 
-                    done, _ = wait(running.keys(), return_when=FIRST_COMPLETED)
+                    waiters = list(running) if stop_requested else [*running, stop_waiter]
+                    done, _ = wait(waiters, timeout=STOP_DB_RECHECK_SECONDS, return_when=FIRST_COMPLETED)
                     for future in done:
+                        if future is stop_waiter:
+                            continue
                         node_id = running.pop(future)
                         try:
                             node_result = future.result()
@@ -303,56 +352,62 @@ class ExecutionEngine(
                             }
 
                         status_value = str(node_result.get("status") or "failed")
-                        statuses[node_id] = status_value
-                        if status_value == "success":
-                            passed_count += 1
-                            context_updates[node_id] = dict(node_result.get("context") or {})
-                            output_data = node_result.get("output_data") or {}
-                            node_output_data[node_id] = output_data
-                            node_type = nodes_by_id[node_id].get("type")
-
-                            if node_type == "condition":
-                                branch = str(output_data.get("branch", "true")).lower()
-                                for child_id in children[node_id]:
-                                    label = edge_labels.get((node_id, child_id), "").lower()
-                                    if label and label != branch and child_id in pending:
-                                        pending.remove(child_id)
-                                        statuses[child_id] = "skipped"
-                                        skipped_count += 1
-                                        control_flow_skipped.add(child_id)
-                                        self._create_skipped_node_execution(
-                                            execution_id,
-                                            nodes_by_id[child_id],
-                                            f"Skipped: condition took '{branch}' branch"
-                                        )
-
-                            if node_type == "loop":
-                                loop_cfg = nodes_by_id[node_id].get("config") or {}
-                                total = max(1, int(loop_cfg.get("iterations", 1)))
-                                body = self._get_loop_body(node_id, children)
-                                loop_state[node_id] = {
-                                    "current": 0,
-                                    "total": total,
-                                    "body": body,
-                                }
-                        else:
+                        if status_value != "success":
                             failed_count += 1
+                            record_skipped(scheduler.complete(node_id, status_value))
+                            continue
+
+                        passed_count += 1
+                        context_updates[node_id] = dict(node_result.get("context") or {})
+                        output_data = node_result.get("output_data") or {}
+                        node_type = nodes_by_id[node_id].get("type")
+                        skip_children: List[str] = []
+                        skip_reason = ""
+                        if node_type == "condition":
+                            branch = str(output_data.get("branch", "true")).lower()
+                            skip_reason = f"Skipped: condition took '{branch}' branch"
+                            skip_children = [
+                                child_id for child_id in children[node_id]
+                                if edge_labels.get((node_id, child_id), "").lower() not in ("", branch)
+                            ]
+                        record_skipped(scheduler.complete(node_id, status_value, skip_children, skip_reason))
+
+                        if node_type == "loop":
+                            loop_cfg = nodes_by_id[node_id].get("config") or {}
+                            scheduler.start_loop(node_id, int(loop_cfg.get("iterations", 1)))
+
+                    if not stop_requested:
+                        for loop_id, current, total in scheduler.advance_loops():
+                            context_updates[loop_id] = {
+                                **context_updates.get(loop_id, {}),
+                                "_loop_iteration": current,
+                                "_loop_total": total,
+                            }
 
-                    self._check_loop_iterations(
-                        loop_state, statuses, pending, context_updates,
-                        execution_id, nodes_by_id, children
-                    )
-
+            # a stop that arrived while the last nodes were finishing still counts
+            if not stop_requested and self._is_stop_requested(execution_id, check_db=False):
+                stop_requested = True
+            if stop_requested:
+                # processes registered after the stop was first seen
+                terminated_processes.extend(self._terminate_remote_processes(execution_id))
+            # node rows (and the transitions of skipped nodes) land before the execution is marked finished
+            self.node_writer.flush()
             execution.finished_at = utc_now()
             execution.duration = int((execution.finished_at - execution.started_at).total_seconds())
-            execution.summary = {
+            summary = {
                 **self._current_execution_summary(execution_id),
                 "total": len(nodes),
                 "passed": passed_count,
                 "failed": failed_count,
                 "skipped": skipped_count,
-                "workflow_state": self._build_workflow_state_snapshot(execution_id, nodes, edges, statuses),
+                "workflow_state": live_state.snapshot(statuses),
             }
+            if stop_requested:
+                stopped_at = self.cancellation.get(execution_id).cancelled_at or execution.finished_at
+                summary.setdefault("stopped_at", stopped_at.isoformat())
+            if terminated_processes:
+                summary["terminated_processes"] = terminated_processes
+            execution.summary = summary
 
             if stop_requested:
                 execution.status = "stopped"
@@ -365,8 +420,10 @@ class ExecutionEngine(
                 execution.result = "failed" if passed_count == 0 else "partial"
 
             self.db.commit()
+            self.events.publish(execution_id, "execution", execution_event_data(execution))
         except Exception as exc:
             logger.exception("Error in execution %s", execution_id)
+            self.node_writer.flush()
             execution.status = "failed"
             execution.finished_at = utc_now()
             if execution.started_at:
@@ -374,7 +431,7 @@ class ExecutionEngine(
             execution.result = "failed"
             execution.summary = {
                 "error": str(exc),
-                "workflow_state": self._build_workflow_state_snapshot(
+                "workflow_state": self._current_workflow_state(
                     execution_id,
                     workflow.nodes or [],
                     workflow.edges or [],
@@ -382,3 +439,11 @@ class ExecutionEngine(
                 ),
             }
             self.db.commit()
+            self.events.publish(execution_id, "execution", execution_event_data(execution))
+        finally:
+            self.cancellation.discard(execution_id)
+            get_remote_process_registry().pop_all(execution_id)
+            self.resource_monitor.untrack_execution(execution_id)
+            ServerLeaseManager(self.db).release(execution_id)
+            self.workflow_states.discard(execution_id)
+            self.events.close(execution_id)
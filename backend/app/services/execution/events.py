@@ -0,0 +1,218 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.config import (
+    EXECUTION_EVENT_BUFFER_SIZE,
+    EXECUTION_EVENT_KEEPALIVE_SECONDS,
+    EXECUTION_EVENT_RETENTION_SECONDS,
+)
+
+# Longest text carried by one output event; larger chunks are split
+OUTPUT_EVENT_MAX_CHARS = 4096
+# How often an open SSE connection looks for new events; reads are in-memory only
+EVENT_POLL_SECONDS = 0.2
+TERMINAL_EXECUTION_STATUSES = ("completed", "failed", "stopped")
+
+
+@dataclass(frozen=True)
+class ExecutionEvent:
+    seq: int
+    type: str
+    data: Dict[str, Any]
+    timestamp: float
+
+    def to_sse(self) -> str:
+        payload = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f"id: {self.seq}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class ExecutionEventStream:
+    """Bounded, sequence-numbered event log of one execution.
+
+    Sequence numbers start at 1 and never repeat within a stream. Only the
+    newest ``capacity`` events are kept; a reader asking for events that
+    have already been dropped is told so (``gap``) and should reload the
+    full state before applying what follows.
+    """
+
+    def __init__(self, capacity: int = EXECUTION_EVENT_BUFFER_SIZE):
+        self._events: Deque[ExecutionEvent] = deque(maxlen=max(1, int(capacity)))
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        self.closed_at: Optional[float] = None
+
+    @property
+    def closed(self) -> bool:
+        return self.closed_at is not None
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> ExecutionEvent:
+        with self._lock:
+            event = ExecutionEvent(self._next_seq, event_type, data, time.time())
+            self._next_seq += 1
+            self._events.append(event)
+            return event
+
+    def close(self) -> None:
+        with self._lock:
+            if self.closed_at is None:
+                self.closed_at = time.monotonic()
+
+    def since(self, after: int) -> Tuple[List[ExecutionEvent], bool]:
+        """Events with ``seq > after`` and whether some of them were already dropped."""
+        with self._lock:
+            if after >= self._next_seq:
+                # the reader saw a previous stream of this execution (e.g. before a restart)
+                return list(self._events), True
+            oldest = self._events[0].seq if self._events else self._next_seq
+            return [event for event in self._events if event.seq > after], after + 1 < oldest
+
+
+class ExecutionEventBus:
+    """Process-wide event streams keyed by execution id."""
+
+    def __init__(
+        self,
+        capacity: int = EXECUTION_EVENT_BUFFER_SIZE,
+        retention_seconds: float = EXECUTION_EVENT_RETENTION_SECONDS
+    ):
+        self.capacity = capacity
+        self.retention_seconds = float(retention_seconds)
+        self._lock = threading.Lock()
+        self._streams: Dict[int, ExecutionEventStream] = {}
+
+    def stream(self, execution_id: int) -> ExecutionEventStream:
+        with self._lock:
+            self._prune()
+            stream = self._streams.get(execution_id)
+            if stream is None:
+                stream = self._streams[execution_id] = ExecutionEventStream(self.capacity)
+            return stream
+
+    def get(self, execution_id: int) -> Optional[ExecutionEventStream]:
+        with self._lock:
+            return self._streams.get(execution_id)
+
+    def publish(self, execution_id: int, event_type: str, data: Dict[str, Any]) -> ExecutionEvent:
+        return self.stream(execution_id).publish(event_type, data)
+
+    def publish_output(self, execution_id: int, node_id: str, stream: str, text: str) -> None:
+        for start in range(0, len(text), OUTPUT_EVENT_MAX_CHARS):
+            self.publish(execution_id, "output", {
+                "node_id": node_id,
+                "stream": stream,
+                "text": text[start:start + OUTPUT_EVENT_MAX_CHARS],
+            })
+
+    def close(self, execution_id: int) -> None:
+        stream = self.get(execution_id)
+        if stream is not None:
+            stream.close()
+
+    def discard(self, execution_id: int) -> None:
+        with self._lock:
+            stream = self._streams.pop(execution_id, None)
+        if stream is not None:
+            stream.close()
+
+    def _prune(self) -> None:
+        deadline = time.monotonic() - self.retention_seconds
+        for execution_id in [
+            key for key, stream in self._streams.items()
+            if stream.closed_at is not None and stream.closed_at < deadline
+        ]:
+            del self._streams[execution_id]
+
+
+def _sse(event_type: str, data: Dict[str, Any]) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_events(
+    stream: Optional[ExecutionEventStream],
+    after: int = 0,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    keepalive: float = EXECUTION_EVENT_KEEPALIVE_SECONDS,
+    current: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """Serve a stream as Server-Sent Events, starting after sequence ``after``.
+
+    ``reset`` means events were missed and the client should reload the full
+    state; ``end`` is sent once the stream is closed and drained. Without a
+    stream (nothing live in this process) only the ``current`` execution
+    state, when given, and ``end`` are sent.
+    """
+    if stream is None:
+        if current is not None:
+            yield _sse("execution", current)
+        yield _sse("end", {"last_seq": after})
+        return
+    yield "retry: 3000\n\n"
+    idle = 0.0
+    while True:
+        events, gap = stream.since(after)
+        if gap:
+            yield _sse("reset", {"after": after})
+            after = 0
+        for event in events:
+            yield event.to_sse()
+            after = event.seq
+        if events:
+            idle = 0.0
+            continue
+        if stream.closed:
+            yield _sse("end", {"last_seq": after})
+            return
+        if is_disconnected is not None and await is_disconnected():
+            return
+        if idle >= keepalive:
+            yield ": keepalive\n\n"
+            idle = 0.0
+        await asyncio.sleep(EVENT_POLL_SECONDS)
+        idle += EVENT_POLL_SECONDS
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def execution_event_data(execution) -> Dict[str, Any]:
+    """Execution fields worth pushing; ``summary`` is left out and fetched once at the end."""
+    return {
+        "id": execution.id,
+        "status": execution.status,
+        "result": execution.result,
+        "started_at": _iso(execution.started_at),
+        "finished_at": _iso(execution.finished_at),
+        "duration": execution.duration,
+    }
+
+
+def node_event_data(node_execution) -> Dict[str, Any]:
+    """NodeExecution fields without the input/output blobs."""
+    return {
+        "id": node_execution.id,
+        "node_id": node_execution.node_id,
+        "node_type": node_execution.node_type,
+        "status": node_execution.status,
+        "started_at": _iso(node_execution.started_at),
+        "finished_at": _iso(node_execution.finished_at),
+        "duration": node_execution.duration,
+        "error_message": node_execution.error_message,
+        "log_path": node_execution.log_path,
+    }
+
+
+_bus = ExecutionEventBus()
+
+
+def get_event_bus() -> ExecutionEventBus:
+    return _bus
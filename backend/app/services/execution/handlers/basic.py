@@ -22,14 +22,29 @@ class BasicHandlersMixin:
                 server.name,
                 server.region or "私有云"
             )
-            result = self.ssh_service.run_command(
-                host=server.host,
-                username=server.username,
-                password=server.password,
-                command=command,
-                port=server.port,
-                timeout=timeout
-            )
+            pid_path = self._remote_pid_path(config)
+            if pid_path:
+                pid_dir = pid_path.rsplit("/", 1)[0]
+                command = "\n".join([
+                    f"mkdir -p {self._quote(pid_dir)} 2>/dev/null; echo $$ > {self._quote(pid_path)} 2>/dev/null",
+                    "trap " + self._quote(f"rm -f {self._quote(pid_path)}") + " EXIT",
+                    command,
+                ])
+                self._register_remote_process(config, server, pid_path)
+            try:
+                result = self.ssh_service.run_command_stream(
+                    host=server.host,
+                    username=server.username,
+                    password=server.password,
+                    command=command,
+                    port=server.port,
+                    timeout=timeout,
+                    on_output=self._output_publisher(config),
+                    log_path=self._node_log_path(config)
+                )
+            finally:
+                if pid_path:
+                    self._unregister_remote_process(config, pid_path)
             return self._ssh_result_to_dict(result)
 
         target_region = self._target_region(config, context or {})
@@ -77,46 +77,29 @@ class BenchmarkHandlersMixin:
             return self._ssh_result_to_dict(prep_result)
 
         config_path = f"{conf_dir}/config.properties"
-        read_result = self.ssh_service.read_file(
-            host=server.host,
-            username=server.username,
-            password=server.password,
-            remote_path=config_path,
-            port=server.port,
-            timeout=timeout
-        )
-        if read_result["status"] != "success":
-            return {
-                "exit_status": -1,
-                "stdout": "",
-                "stderr": read_result.get("message", ""),
-                "error": read_result.get("message", "Failed to read benchmark config")
-            }
-
         replacements = self._build_iot_benchmark_replacements(config, target_host, rpc_port)
-        updated_config = self._replace_properties(read_result["content"], replacements)
-        write_result = self.ssh_service.write_file(
+        edit_result = self.ssh_service.edit_file(
             host=server.host,
             username=server.username,
             password=server.password,
             remote_path=config_path,
-            content=updated_config,
+            transform=lambda content: self._replace_properties(content, replacements),
             port=server.port,
             timeout=timeout
         )
-        if write_result["status"] != "success":
+        if edit_result["status"] != "success":
             return {
                 "exit_status": -1,
                 "stdout": "",
-                "stderr": write_result.get("message", ""),
-                "error": write_result.get("message", "Failed to write benchmark config")
+                "stderr": edit_result.get("message", ""),
+                "error": edit_result.get("message", "Failed to update benchmark config")
             }
 
         benchmark_cmd = f"cd {self._quote(benchmark_home)} && bash ./benchmark.sh -cf {self._quote(conf_dir)}"
         wrapper_cmd = f"{benchmark_cmd}; code=$?; echo $code > {self._quote(exit_path)}; exit $code"
         start_script = "\n".join([
             "set -e",
-            f"nohup bash -lc {self._quote(wrapper_cmd)} > {self._quote(stdout_path)} 2>&1 < /dev/null &",
+            f"nohup $(command -v setsid) bash -lc {self._quote(wrapper_cmd)} > {self._quote(stdout_path)} 2>&1 < /dev/null &",
             "pid=$!",
             f"echo $pid > {self._quote(pid_path)}",
             "echo $pid",
@@ -133,6 +116,7 @@ class BenchmarkHandlersMixin:
             return self._ssh_result_to_dict(start_result)
 
         pid = start_result.stdout.strip().splitlines()[-1] if start_result.stdout.strip() else ""
+        self._register_remote_process(config, server, pid_path)
         benchmark_run = {
             "server_id": server.id,
             "server_name": server.name,
@@ -201,18 +185,21 @@ class BenchmarkHandlersMixin:
             if check_result.exit_status != 0:
                 return self._ssh_result_to_dict(check_result)
             if "running" not in check_result.stdout:
+                self._unregister_remote_process(config, str(benchmark_run.get("pid_path") or ""))
                 return self._collect_iot_benchmark_result(server, benchmark_run, tail_lines)
-            time.sleep(poll_interval)
+            if self._sleep_unless_stopped(config, poll_interval):
+                return self._stopped_result(pid=pid, stdout_path=stdout_path)
 
         if kill_on_timeout:
             self.ssh_service.run_command(
                 host=server.host,
                 username=server.username,
                 password=server.password,
-                command=f"kill {shlex.quote(pid)} >/dev/null 2>&1 || true",
+                command=f"kill -- -{shlex.quote(pid)} >/dev/null 2>&1 || kill {shlex.quote(pid)} >/dev/null 2>&1 || true",
                 port=server.port,
                 timeout=30
             )
+            self._unregister_remote_process(config, str(benchmark_run.get("pid_path") or ""))
 
         tail_result = self._tail_remote_file(server, stdout_path, tail_lines)
         return {
@@ -28,8 +28,7 @@ class ClusterHandlersMixin:
         for target in deploy_targets:
             server = self._require_server({
                 "server_id": target["server_id"],
-                "_schedule_mode": config.get("_schedule_mode"),
-                "_schedule_region": config.get("_schedule_region"),
+                "_schedule_mode": "fixed",
             }, context)
             entries = target["entries"]
             deploy_result = self._deploy_package_to_server(
@@ -86,6 +85,7 @@ class ClusterHandlersMixin:
         for entry in config_nodes + data_nodes:
             start_result = self._execute_iotdb_start_node({
                 "server_id": entry["server_id"],
+                "_schedule_mode": "fixed",
                 "node_role": entry["node_role"],
                 "iotdb_home": entry["install_dir"],
                 "host": entry["host"],
@@ -116,7 +116,7 @@ class ClusterHandlersMixin:
             return {"exit_status": -1, "stdout": "", "stderr": "", "error": "At least one DataNode is required for cluster check"}
 
         primary = data_nodes[0]
-        server = self._require_server({"server_id": primary["server_id"]}, context)
+        server = self._require_server({"server_id": primary["server_id"], "_schedule_mode": "fixed"}, context)
         username = str(config.get("username") or "root")
         password = str(config.get("password") or "root")
         sql_dialect = str(config.get("sql_dialect") or "tree")
@@ -179,6 +179,7 @@ class ClusterHandlersMixin:
         for entry in list(reversed(data_nodes)) + list(reversed(config_nodes)):
             stop_result = self._execute_iotdb_stop_node({
                 "server_id": entry["server_id"],
+                "_schedule_mode": "fixed",
                 "node_role": entry["node_role"],
                 "iotdb_home": entry["install_dir"],
                 "graceful": graceful,
@@ -94,7 +94,8 @@ class ControlHandlersMixin:
             remaining = deadline - time.monotonic()
             if remaining <= 0:
                 break
-            time.sleep(min(interval, remaining))
+            if self._sleep_unless_stopped(config, min(interval, remaining)):
+                return self._stopped_result(wait_attempts=attempt)
 
         return {
             "exit_status": -1,
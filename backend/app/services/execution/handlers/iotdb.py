@@ -105,7 +105,8 @@ class IoTDBHandlersMixin:
                     "node_role": role,
                     "start_script": script_name
                 }
-            time.sleep(2)
+            if self._sleep_unless_stopped(config, 2):
+                return self._stopped_result(iotdb_home=iotdb_home, host=host, node_role=role)
 
         return {
             "exit_status": -1,
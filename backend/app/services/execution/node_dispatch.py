@@ -1,40 +1,103 @@
 import logging
-from typing import Any, Callable, Dict
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Optional
 
 from app.models.database import NodeExecution
+from app.services.execution.artifacts import offload_output
+from app.services.execution.dispatcher import SharedNodeExecutor
+from app.services.server_leases import ServerLeaseManager
 from app.utils.time import utc_now
 
 logger = logging.getLogger(__name__)
 
+FINISH_FIELDS = ("status", "finished_at", "duration", "output_data", "log_path", "error_message")
+
+
+@dataclass
+class StartedNode:
+    """A node recorded as running; ``error`` is set when reserving its cluster servers failed."""
+    node_id: str
+    node_type: str
+    config: Dict[str, Any]
+    node_execution: NodeExecution
+    error: Optional[Exception] = None
+
 
 class NodeDispatchMixin:
 
+    def _submit_workflow_node(
+        self,
+        executor: Executor,
+        execution_id: int,
+        node: Dict[str, Any],
+        context: Dict[str, Any]
+    ) -> Future:
+        """Submit a node to ``executor``.
+
+        On the dispatcher's shared pool a random-mode cluster node waits for
+        its servers on the executor's wait threads and only then takes a node
+        worker, so gangs queued for capacity cannot starve other nodes.
+        """
+        if isinstance(executor, SharedNodeExecutor) and self._needs_cluster_reservation(
+            node.get("type", "shell"), context
+        ):
+            return executor.submit_after(
+                partial(self._start_workflow_node, execution_id, node, context),
+                partial(self._finish_workflow_node, execution_id, context)
+            )
+        return executor.submit(self._execute_workflow_node, execution_id, node, context)
+
     def _execute_workflow_node(
         self,
         execution_id: int,
         node: Dict[str, Any],
         context: Dict[str, Any]
     ) -> Dict[str, Any]:
+        started = self._start_workflow_node(execution_id, node, context)
+        return self._finish_workflow_node(execution_id, context, started)
+
+    def _start_workflow_node(self, execution_id: int, node: Dict[str, Any], context: Dict[str, Any]) -> StartedNode:
+        node_id = node.get("id")
+        self.resource_monitor.track(execution_id, node_id, self.session_factory, self.ssh_service)
+        try:
+            with self._node_worker() as worker:
+                return worker._start_workflow_node_in_session(execution_id, node, context)
+        except BaseException:
+            self.resource_monitor.untrack(execution_id, node_id)
+            raise
+
+    def _finish_workflow_node(self, execution_id: int, context: Dict[str, Any], started: StartedNode) -> Dict[str, Any]:
+        try:
+            with self._node_worker() as worker:
+                return worker._finish_workflow_node_in_session(execution_id, context, started)
+        finally:
+            self.resource_monitor.untrack(execution_id, started.node_id)
+
+    @contextmanager
+    def _node_worker(self) -> Iterator[Any]:
+        """An engine on its own session that shares this engine's services."""
         from app.services.execution.engine import ExecutionEngine
 
         db = self.session_factory()
         try:
-            worker = ExecutionEngine(
-                db,
-                session_factory=self.session_factory,
-                reservation_lock=self.reservation_lock
-            )
+            worker = ExecutionEngine(db, session_factory=self.session_factory)
             worker.ssh_service = self.ssh_service
-            return worker._execute_workflow_node_in_session(execution_id, node, context)
+            worker.resource_monitor = self.resource_monitor
+            worker.node_writer = self.node_writer
+            worker.artifact_store = self.artifact_store
+            yield worker
         finally:
             db.close()
 
-    def _execute_workflow_node_in_session(
+    def _start_workflow_node_in_session(
         self,
         execution_id: int,
         node: Dict[str, Any],
         context: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    ) -> StartedNode:
         node_id = node.get("id")
         node_type = node.get("type", "shell")
         config = dict(node.get("config", {}) or {})
@@ -48,32 +111,57 @@ class NodeDispatchMixin:
             if context.get("host") not in (None, ""):
                 config["target_host"] = context["host"]
 
-        with self.reservation_lock:
-            if self._node_uses_top_level_server(node_type):
-                server = self._resolve_server_for_schedule(config, context)
-                if server:
-                    self._write_server_config(config, server)
-                    logger.info(
-                        "Resolved server %s (%s) in region %s for node %s",
-                        server.id, server.name, server.region, node_id
-                    )
-                config = self._merge_config_with_context(config, context)
-
-            node_execution = NodeExecution(
-                execution_id=execution_id,
-                node_id=node_id,
-                node_type=node_type,
-                status="running",
-                started_at=utc_now(),
-                input_data=config
-            )
-            self.db.add(node_execution)
-            self.db.commit()
-            self.db.refresh(node_execution)
+        if self._node_uses_top_level_server(node_type):
+            server = self._resolve_server_for_schedule(config, context)
+            if server:
+                self._write_server_config(config, server)
+                logger.info(
+                    "Resolved server %s (%s) in region %s for node %s",
+                    server.id, server.name, server.region, node_id
+                )
+            config = self._merge_config_with_context(config, context)
+        reserve_cluster = self._needs_cluster_reservation(node_type, config)
+        if not reserve_cluster:
+            self._lease_node_servers(execution_id, node_id, config)
+
+        node_execution = NodeExecution(
+            execution_id=execution_id,
+            node_id=node_id,
+            node_type=node_type,
+            status="running",
+            started_at=utc_now(),
+            input_data=config
+        )
+        node_execution.id = self.node_writer.insert(self.session_factory, node_execution).result()
+        self._record_node_transition(execution_id, node_execution)
+        started = StartedNode(node_id, node_type, config, node_execution)
+
+        if reserve_cluster:
+            try:
+                started.config = self._reserve_cluster_servers(execution_id, node_id, config, context)
+                node_execution.input_data = started.config
+                self.node_writer.update(self.session_factory, node_execution, ("input_data",))
+            except Exception as exc:
+                started.error = exc
+        return started
+
+    def _finish_workflow_node_in_session(
+        self,
+        execution_id: int,
+        context: Dict[str, Any],
+        started: StartedNode
+    ) -> Dict[str, Any]:
+        node_id = started.node_id
+        node_type = started.node_type
+        config = started.config
+        node_execution = started.node_execution
 
         try:
+            if started.error is not None:
+                raise started.error
             result = self._execute_node(node_type, config, context)
-            node_execution.output_data = result
+            node_execution.output_data = offload_output(result, self.artifact_store)
+            node_execution.log_path = result.get("log_path")
             exit_status = result.get("exit_status", -1)
             node_execution.status = "success" if exit_status == 0 else "failed"
             if exit_status != 0:
@@ -82,12 +170,11 @@ class NodeDispatchMixin:
                     or result.get("stderr")
                     or "Unknown error"
                 )
-            with self.reservation_lock:
-                context_update = (
-                    self._build_context_updates(node_type, config, result)
-                    if node_execution.status == "success"
-                    else {}
-                )
+            context_update = (
+                self._build_context_updates(node_type, config, result)
+                if node_execution.status == "success"
+                else {}
+            )
         except Exception as exc:
             logger.exception("Error executing node %s", node_id)
             node_execution.status = "failed"
@@ -95,12 +182,15 @@ class NodeDispatchMixin:
             node_execution.output_data = {"exit_status": -1, "error": str(exc)}
             context_update = {}
 
-        with self.reservation_lock:
-            node_execution.finished_at = utc_now()
-            node_execution.duration = int(
-                (node_execution.finished_at - node_execution.started_at).total_seconds()
-            )
-            self.db.commit()
+        node_execution.finished_at = utc_now()
+        node_execution.duration = int(
+            (node_execution.finished_at - node_execution.started_at).total_seconds()
+        )
+        self.node_writer.update(self.session_factory, node_execution, FINISH_FIELDS)
+        self._record_node_transition(execution_id, node_execution)
+        ServerLeaseManager(self.db).release(
+            execution_id, node_id, keep_execution_scoped=node_execution.status == "success"
+        )
 
         return {
             "node_id": node_id,
@@ -0,0 +1,245 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import NODE_WRITE_BATCH_SIZE
+from app.models.database import NodeExecution
+
+logger = logging.getLogger(__name__)
+
+NODE_EXECUTION_COLUMNS = tuple(column.key for column in NodeExecution.__table__.columns if column.key != "id")
+
+
+@dataclass
+class _Mutation:
+    session_factory: Optional[Callable[[], Session]]
+    execution_id: int
+    # None marks a flush barrier
+    values: Optional[Dict[str, Any]]
+    node_execution_id: Optional[int] = None
+    seq: int = 0
+    on_commit: Optional[Callable[[int], None]] = None
+    future: Future = field(default_factory=Future)
+
+
+class NodeExecutionWriter:
+    """Single writer for ``node_executions`` rows.
+
+    Node threads and the scheduling loop enqueue inserts and updates; one
+    thread drains the queue and commits everything drained together in one
+    transaction per database, so parallel nodes no longer take turns on the
+    SQLite write lock and a burst of skipped nodes costs one commit.
+
+    Inserts resolve to the new row id once committed. Updates are
+    fire-and-forget; until they are committed ``pending`` returns them so
+    readers can lay them over what they load. Uncommitted inserts are not
+    part of that view: the row has no id yet, so callers that do not wait
+    for the insert (skipped nodes) publish the node only from ``on_commit``
+    and every reader sees it at the same moment.
+
+    If a batch fails, its changes are retried one by one so only the bad
+    one is lost; a final update that still cannot be written marks the row
+    failed instead of leaving it running.
+    """
+
+    def __init__(self, batch_size: int = NODE_WRITE_BATCH_SIZE):
+        self.batch_size = max(1, int(batch_size))
+        self._queue: "queue.Queue[Optional[_Mutation]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._seq = 0
+        # execution_id -> node_execution_id -> (seq of the newest update, merged values)
+        self._pending: Dict[int, Dict[int, Tuple[int, Dict[str, Any]]]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def insert(
+        self,
+        session_factory: Callable[[], Session],
+        node_execution: NodeExecution,
+        on_commit: Optional[Callable[[int], None]] = None
+    ) -> "Future[int]":
+        values = {
+            key: getattr(node_execution, key) for key in NODE_EXECUTION_COLUMNS
+            if getattr(node_execution, key) is not None
+        }
+        return self._enqueue(_Mutation(session_factory, node_execution.execution_id, values, on_commit=on_commit))
+
+    def update(
+        self,
+        session_factory: Callable[[], Session],
+        node_execution: NodeExecution,
+        fields: Iterable[str],
+        on_commit: Optional[Callable[[int], None]] = None
+    ) -> "Future[int]":
+        values = {key: getattr(node_execution, key) for key in fields}
+        mutation = _Mutation(
+            session_factory, node_execution.execution_id, values, node_execution.id, on_commit=on_commit
+        )
+        return self._enqueue(mutation)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until everything enqueued so far is committed (or has failed)."""
+        self._enqueue(_Mutation(None, 0, None)).result(timeout=timeout)
+
+    def pending(self, execution_id: int) -> Dict[int, Dict[str, Any]]:
+        """Uncommitted updates of one execution by node execution id (inserts are not included)."""
+        with self._lock:
+            return {
+                node_execution_id: dict(values)
+                for node_execution_id, (_, values) in self._pending.get(execution_id, {}).items()
+            }
+
+    def stop(self) -> None:
+        """Commit what is queued and stop the writer thread; it restarts on the next write."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout=10)
+
+    def _enqueue(self, mutation: _Mutation) -> Future:
+        with self._lock:
+            self._seq += 1
+            mutation.seq = self._seq
+            if mutation.values is not None and mutation.node_execution_id is not None:
+                updates = self._pending.setdefault(mutation.execution_id, {})
+                _, merged = updates.get(mutation.node_execution_id, (0, {}))
+                updates[mutation.node_execution_id] = (mutation.seq, {**merged, **mutation.values})
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, name="node-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(mutation)
+        return mutation.future
+
+    def _run_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    mutation = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if mutation is None:
+                    stopping = True
+                    break
+                batch.append(mutation)
+            self._write_batch(batch)
+            if stopping:
+                return
+
+    def _write_batch(self, batch: List[_Mutation]) -> None:
+        groups: Dict[int, List[_Mutation]] = {}
+        for mutation in batch:
+            if mutation.values is not None:
+                groups.setdefault(id(mutation.session_factory), []).append(mutation)
+        for mutations in groups.values():
+            try:
+                row_ids = self._commit(mutations)
+            except Exception as e:
+                logger.error(f"Writing {len(mutations)} node execution changes failed, retrying one by one: {e}")
+                # one bad change must not take the others in the transaction down with it
+                for mutation in mutations:
+                    self._write_one(mutation)
+                continue
+            self._settle(mutations)
+            for mutation, row_id in zip(mutations, row_ids):
+                self._resolve(mutation, row_id)
+        for mutation in batch:
+            if mutation.values is None:
+                mutation.future.set_result(0)
+
+    def _write_one(self, mutation: _Mutation) -> None:
+        try:
+            row_id = self._commit([mutation])[0]
+        except Exception as e:
+            logger.error(f"Writing node execution change of execution {mutation.execution_id} failed: {e}")
+            if mutation.node_execution_id is not None and "status" in mutation.values:
+                self._write_failed_status(mutation, e)
+            self._settle([mutation])
+            mutation.future.set_exception(e)
+            return
+        self._settle([mutation])
+        self._resolve(mutation, row_id)
+
+    def _write_failed_status(self, mutation: _Mutation, error: Exception) -> None:
+        """Leave a row whose final update could not be written in a terminal state."""
+        values = {
+            key: mutation.values[key] for key in ("finished_at", "duration") if key in mutation.values
+        }
+        values["status"] = "failed"
+        values["error_message"] = f"Failed to record node result: {error}"
+        if "output_data" in mutation.values:
+            values["output_data"] = {"exit_status": -1, "error": values["error_message"]}
+        fallback = _Mutation(
+            mutation.session_factory, mutation.execution_id, values, mutation.node_execution_id
+        )
+        try:
+            self._commit([fallback])
+        except Exception:
+            logger.exception("Marking node execution %s as failed also failed", mutation.node_execution_id)
+
+    @staticmethod
+    def _resolve(mutation: _Mutation, row_id: int) -> None:
+        if mutation.on_commit is not None:
+            try:
+                mutation.on_commit(row_id)
+            except Exception:
+                logger.exception("Node execution commit callback failed")
+        mutation.future.set_result(row_id)
+
+    @staticmethod
+    def _commit(mutations: List[_Mutation]) -> List[int]:
+        db = mutations[0].session_factory()
+        try:
+            inserted: Dict[int, NodeExecution] = {}
+            for index, mutation in enumerate(mutations):
+                if mutation.node_execution_id is None:
+                    inserted[index] = NodeExecution(**mutation.values)
+                    db.add(inserted[index])
+                else:
+                    db.query(NodeExecution).filter(
+                        NodeExecution.id == mutation.node_execution_id
+                    ).update(mutation.values, synchronize_session=False)
+            db.flush()
+            row_ids = [
+                inserted[index].id if index in inserted else mutation.node_execution_id
+                for index, mutation in enumerate(mutations)
+            ]
+            db.commit()
+            return row_ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _settle(self, mutations: List[_Mutation]) -> None:
+        with self._lock:
+            for mutation in mutations:
+                if mutation.node_execution_id is None:
+                    continue
+                updates = self._pending.get(mutation.execution_id)
+                if not updates:
+                    continue
+                entry = updates.get(mutation.node_execution_id)
+                # a newer update of the same row is still queued
+                if entry is not None and entry[0] <= mutation.seq:
+                    del updates[mutation.node_execution_id]
+                if not updates:
+                    del self._pending[mutation.execution_id]
+
+
+_writer = NodeExecutionWriter()
+
+
+def get_node_writer() -> NodeExecutionWriter:
+    return _writer
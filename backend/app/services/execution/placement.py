@@ -0,0 +1,133 @@
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import PLACEMENT_HISTORY_HOURS, PLACEMENT_METRICS_MAX_AGE, PLACEMENT_STRATEGY
+from app.models.database import NodeExecution, Server
+from app.services.metrics_cache import get_metrics_cache
+from app.utils.time import utc_now
+
+# (score, inputs) per server id; lower scores are preferred, None means "no data".
+Scores = Dict[int, Tuple[Optional[float], Dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class PlacementRequest:
+    region: str
+    role: str = "default"
+    strategy: Optional[str] = None
+    avoid_server_ids: FrozenSet[int] = field(default_factory=frozenset)
+
+
+def _cached_metrics(server_id: int) -> Optional[Dict[str, Any]]:
+    return get_metrics_cache().get(server_id, max_age=PLACEMENT_METRICS_MAX_AGE)
+
+
+def _score_random(db: Session, servers: Sequence[Server]) -> Scores:
+    return {server.id: (0.0, {}) for server in servers}
+
+
+def _score_least_loaded(db: Session, servers: Sequence[Server]) -> Scores:
+    scores: Scores = {}
+    for server in servers:
+        metrics = _cached_metrics(server.id)
+        if metrics is None:
+            scores[server.id] = (None, {})
+            continue
+        cpu = float(metrics.get("cpu_percent") or 0.0)
+        memory = float((metrics.get("memory") or {}).get("percent") or 0.0)
+        scores[server.id] = (round(cpu + memory, 2), {"cpu_percent": cpu, "memory_percent": memory})
+    return scores
+
+
+def _score_most_free_disk(db: Session, servers: Sequence[Server]) -> Scores:
+    scores: Scores = {}
+    for server in servers:
+        metrics = _cached_metrics(server.id) or {}
+        free = (metrics.get("disk") or {}).get("free")
+        if free is None:
+            scores[server.id] = (None, {})
+            continue
+        scores[server.id] = (-float(free), {"disk_free": int(free)})
+    return scores
+
+
+def _score_bin_pack(db: Session, servers: Sequence[Server]) -> Scores:
+    """Prefer servers that already carried the most node time recently, keeping the others free for big jobs."""
+    server_ids = [server.id for server in servers]
+    if not server_ids:
+        return {}
+    server_expr = func.json_extract(NodeExecution.input_data, "$.server_id")
+    duration_expr = func.julianday(NodeExecution.finished_at) - func.julianday(NodeExecution.started_at)
+    since = utc_now() - timedelta(hours=PLACEMENT_HISTORY_HOURS)
+    rows = db.query(
+        server_expr, func.sum(duration_expr)
+    ).filter(
+        NodeExecution.started_at >= since,
+        NodeExecution.finished_at.isnot(None),
+        server_expr.in_(server_ids),
+    ).group_by(server_expr).all()
+    busy_seconds = {int(server_id): float(days or 0.0) * 86400 for server_id, days in rows}
+    return {
+        server_id: (-busy_seconds.get(server_id, 0.0), {"recent_node_seconds": round(busy_seconds.get(server_id, 0.0), 1)})
+        for server_id in server_ids
+    }
+
+
+PLACEMENT_STRATEGIES: Dict[str, Callable[[Session, Sequence[Server]], Scores]] = {
+    "random": _score_random,
+    "least_loaded": _score_least_loaded,
+    "most_free_disk": _score_most_free_disk,
+    "bin_pack": _score_bin_pack,
+}
+
+
+def resolve_strategy(name: Optional[str]) -> str:
+    name = str(name or PLACEMENT_STRATEGY).strip()
+    if name not in PLACEMENT_STRATEGIES:
+        raise ValueError(
+            f"Unsupported placement strategy: {name}; expected one of {sorted(PLACEMENT_STRATEGIES)}"
+        )
+    return name
+
+
+def rank_servers(
+    db: Session,
+    servers: Sequence[Server],
+    request: PlacementRequest
+) -> Tuple[List[Server], Dict[str, Any]]:
+    """Order candidate servers best-first and describe why.
+
+    Servers in ``avoid_server_ids`` (anti-affinity) go last whatever their score;
+    servers the strategy has no data for rank after the scored ones. Ties are random.
+    """
+    strategy = resolve_strategy(request.strategy)
+    scores = PLACEMENT_STRATEGIES[strategy](db, servers)
+    shuffled = list(servers)
+    random.shuffle(shuffled)
+
+    def sort_key(server: Server):
+        score, _ = scores.get(server.id, (None, {}))
+        return (server.id in request.avoid_server_ids, score is None, score if score is not None else 0.0)
+
+    ranked = sorted(shuffled, key=sort_key)
+    decision = {
+        "strategy": strategy,
+        "region": request.region,
+        "role": request.role,
+        "avoided": sorted(request.avoid_server_ids),
+        "candidates": [
+            {
+                "server_id": server.id,
+                "score": scores.get(server.id, (None, {}))[0],
+                "avoided": server.id in request.avoid_server_ids,
+                **scores.get(server.id, (None, {}))[1],
+            }
+            for server in ranked
+        ],
+    }
+    return ranked, decision
@@ -0,0 +1,112 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REMOTE_RUN_ROOT = "/tmp/testflow-runs"
+
+
+@dataclass(frozen=True)
+class RemoteProcess:
+    """A remote process group started by a node, identified by the PID file it wrote."""
+    node_id: str
+    server_id: Optional[int]
+    host: str
+    username: Optional[str]
+    password: Optional[str]
+    port: int
+    pid_path: str
+
+
+class RemoteProcessRegistry:
+    """Process-wide record of remote processes still owned by each execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes: Dict[int, Dict[str, RemoteProcess]] = {}
+
+    def register(self, execution_id: int, process: RemoteProcess) -> None:
+        with self._lock:
+            self._processes.setdefault(execution_id, {})[process.pid_path] = process
+
+    def unregister(self, execution_id: int, pid_path: str) -> None:
+        with self._lock:
+            processes = self._processes.get(execution_id)
+            if processes is None:
+                return
+            processes.pop(pid_path, None)
+            if not processes:
+                del self._processes[execution_id]
+
+    def pop_all(self, execution_id: int) -> List[RemoteProcess]:
+        with self._lock:
+            return list(self._processes.pop(execution_id, {}).values())
+
+
+_registry = RemoteProcessRegistry()
+
+
+def get_remote_process_registry() -> RemoteProcessRegistry:
+    return _registry
+
+
+def build_terminate_script(pid_path: str, grace_seconds: int, quote) -> str:
+    """TERM the process group recorded in ``pid_path``, KILL it if still alive after the grace period.
+
+    Prints one of ``not_running``, ``terminated`` or ``killed``.
+    """
+    return "\n".join([
+        f"pid_path={quote(pid_path)}",
+        'pid=$(cat "$pid_path" 2>/dev/null)',
+        'alive() { kill -0 -- "-$pid" 2>/dev/null || kill -0 "$pid" 2>/dev/null; }',
+        'if [ -z "$pid" ] || ! alive; then rm -f "$pid_path"; echo not_running; exit 0; fi',
+        'kill -TERM -- "-$pid" 2>/dev/null || kill -TERM "$pid" 2>/dev/null',
+        "i=0",
+        f'while [ "$i" -lt {int(grace_seconds)} ] && alive; do sleep 1; i=$((i+1)); done',
+        'if alive; then kill -KILL -- "-$pid" 2>/dev/null; kill -KILL "$pid" 2>/dev/null; echo killed; else echo terminated; fi',
+        'rm -f "$pid_path"',
+    ])
+
+
+def terminate_remote_processes(
+    ssh_service,
+    processes: List[RemoteProcess],
+    grace_seconds: int
+) -> List[Dict[str, Any]]:
+    """Terminate every process in parallel and report the outcome per process."""
+    if not processes:
+        return []
+
+    def terminate(process: RemoteProcess) -> Dict[str, Any]:
+        result = ssh_service.run_command(
+            host=process.host,
+            username=process.username,
+            password=process.password,
+            command="bash -c " + ssh_service.quote(build_terminate_script(process.pid_path, grace_seconds, ssh_service.quote)),
+            port=process.port,
+            timeout=int(grace_seconds) + 30
+        )
+        lines = (result.stdout or "").strip().splitlines()
+        outcome = lines[-1].strip() if result.exit_status == 0 and lines else "error"
+        report = {
+            "node_id": process.node_id,
+            "server_id": process.server_id,
+            "host": process.host,
+            "pid_path": process.pid_path,
+            "result": outcome,
+        }
+        if outcome == "error":
+            report["error"] = result.error or result.stderr
+        return report
+
+    with ThreadPoolExecutor(max_workers=min(8, len(processes)), thread_name_prefix="remote-kill") as executor:
+        reports = list(executor.map(terminate, processes))
+    for report in reports:
+        logger.info(
+            "Stop %s remote process %s on %s (node %s)",
+            report["result"], report["pid_path"], report["host"], report["node_id"]
+        )
+    return reports
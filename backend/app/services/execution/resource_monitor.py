@@ -0,0 +1,290 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.config import METRICS_COLLECT_CONCURRENCY, RESOURCE_SAMPLE_INTERVAL_SECONDS
+from app.models.database import NodeExecution, ResourceSample, Server, ServerLease
+from app.services.metrics_cache import get_metrics_cache
+from app.services.metrics_collector import MetricsTarget
+from app.services.monitoring_service import MonitoringService
+from app.services.proc_sampler import get_proc_sampler
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+# (monitoring service, target, rate consumer) -> remote status dict, or None when the server could not be sampled
+Sampler = Callable[[MonitoringService, MetricsTarget, str], Optional[Dict[str, Any]]]
+
+RESOURCE_METRICS = (
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "load_1m",
+    "disk_read_bytes_per_sec",
+    "disk_write_bytes_per_sec",
+    "disk_util_percent",
+    "net_rx_bytes_per_sec",
+    "net_tx_bytes_per_sec",
+)
+
+
+def rate_consumer(execution_id: int) -> str:
+    """Proc sampler consumer of one execution: its rates span its own ticks, not the collector's."""
+    return f"execution:{execution_id}"
+
+
+def sample_with_ssh(service: MonitoringService, target: MetricsTarget, consumer: str) -> Optional[Dict[str, Any]]:
+    return service.sample_remote_status(
+        host=target.host,
+        username=target.username,
+        password=target.password,
+        port=target.port,
+        server_id=target.server_id,
+        server_name=target.server_name,
+        rate_consumer=consumer
+    )
+
+
+def resource_values(sample: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Flatten a remote status sample into the ResourceSample metric columns."""
+    disk_io = (sample.get("disk_io") or {}).values()
+    network = (sample.get("network") or {}).values()
+    has_rates = sample.get("interval_seconds") is not None
+    return {
+        "cpu_percent": sample.get("cpu_percent"),
+        "memory_percent": (sample.get("memory") or {}).get("percent"),
+        "disk_percent": (sample.get("disk") or {}).get("percent"),
+        "load_1m": (sample.get("load_avg") or {}).get("1m"),
+        # rates need two snapshots; the first sample of a server has none
+        "disk_read_bytes_per_sec": sum(d.get("read_bytes_per_sec", 0.0) for d in disk_io) if has_rates else None,
+        "disk_write_bytes_per_sec": sum(d.get("write_bytes_per_sec", 0.0) for d in disk_io) if has_rates else None,
+        "disk_util_percent": max((d.get("util_percent", 0.0) for d in disk_io), default=0.0) if has_rates else None,
+        "net_rx_bytes_per_sec": sum(n.get("rx_bytes_per_sec", 0.0) for n in network) if has_rates else None,
+        "net_tx_bytes_per_sec": sum(n.get("tx_bytes_per_sec", 0.0) for n in network) if has_rates else None,
+    }
+
+
+@dataclass
+class _TrackedExecution:
+    session_factory: Callable[[], Session]
+    # one per execution, reused by every tick
+    service: MonitoringService
+    node_ids: Set[str] = field(default_factory=set)
+
+
+class ExecutionResourceMonitor:
+    """Samples the servers leased by running nodes and stores the samples per execution.
+
+    Nodes register with ``track`` when they start and ``untrack`` when they
+    finish. While anything is tracked a background thread wakes every
+    ``interval`` seconds, samples every server the execution holds a lease on
+    (cluster reservations included, so IoTDB hosts stay covered while a
+    benchmark node runs elsewhere), and writes one ResourceSample row per
+    server tagged with the node ids running at that moment. All rows of one tick share ``sampled_at`` so the series of
+    different servers line up. The thread exits once nothing is tracked.
+
+    Rates are computed against the execution's own previous tick (see
+    ``rate_consumer``), not against whatever the metrics collector sampled
+    last, so they cover regular ``interval``-long windows.
+    """
+
+    def __init__(
+        self,
+        interval: float = RESOURCE_SAMPLE_INTERVAL_SECONDS,
+        concurrency: int = METRICS_COLLECT_CONCURRENCY,
+        sample: Sampler = sample_with_ssh
+    ):
+        self.interval = float(interval)
+        self.concurrency = max(1, int(concurrency))
+        self._sample = sample
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executions: Dict[int, _TrackedExecution] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def track(
+        self,
+        execution_id: int,
+        node_id: str,
+        session_factory: Callable[[], Session],
+        ssh_service: Any
+    ) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            tracked = self._executions.get(execution_id)
+            if tracked is None:
+                tracked = self._executions[execution_id] = _TrackedExecution(
+                    session_factory, MonitoringService(ssh_service=ssh_service)
+                )
+            tracked.node_ids.add(node_id)
+            if self._thread is None:
+                self._wakeup.clear()
+                self._thread = threading.Thread(target=self._run_loop, name="resource-monitor", daemon=True)
+                self._thread.start()
+
+    def untrack(self, execution_id: int, node_id: str) -> None:
+        with self._lock:
+            tracked = self._executions.get(execution_id)
+            if tracked is None:
+                return
+            tracked.node_ids.discard(node_id)
+            if not tracked.node_ids:
+                del self._executions[execution_id]
+
+    def untrack_execution(self, execution_id: int) -> None:
+        with self._lock:
+            self._executions.pop(execution_id, None)
+        # kept between nodes so the first tick of the next node still has rates
+        get_proc_sampler().forget_consumer(rate_consumer(execution_id))
+
+    def tracked_nodes(self, execution_id: int) -> Set[str]:
+        with self._lock:
+            tracked = self._executions.get(execution_id)
+            return set(tracked.node_ids) if tracked else set()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._executions.clear()
+            thread, self._thread = self._thread, None
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run_loop(self) -> None:
+        while True:
+            # the first tick waits one interval, so nodes shorter than that are not sampled
+            self._wakeup.wait(self.interval)
+            with self._lock:
+                if not self._executions or self._thread is not threading.current_thread():
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.error(f"Resource sampling round failed: {e}")
+
+    def sample_once(self) -> int:
+        """Sample every tracked execution once. Returns the number of rows written."""
+        with self._lock:
+            executions = {
+                execution_id: _TrackedExecution(tracked.session_factory, tracked.service, set(tracked.node_ids))
+                for execution_id, tracked in self._executions.items()
+            }
+        sampled_at = utc_now()
+        written = 0
+        for execution_id, tracked in executions.items():
+            try:
+                written += self._sample_execution(execution_id, tracked, sampled_at)
+            except Exception as e:
+                logger.warning(f"Resource sampling for execution {execution_id} failed: {e}")
+        return written
+
+    def _sample_execution(self, execution_id: int, tracked: _TrackedExecution, sampled_at) -> int:
+        db = tracked.session_factory()
+        try:
+            servers = db.query(Server).join(
+                ServerLease, ServerLease.server_id == Server.id
+            ).filter(
+                ServerLease.execution_id == execution_id,
+                ServerLease.expires_at > sampled_at,
+            ).distinct().order_by(Server.id.asc()).all()
+            if not servers:
+                return 0
+            targets = [MetricsTarget.from_server(server) for server in servers]
+
+            with ThreadPoolExecutor(
+                max_workers=min(self.concurrency, len(targets)),
+                thread_name_prefix="resource-sample"
+            ) as executor:
+                consumer = rate_consumer(execution_id)
+                samples = list(executor.map(lambda target: self._sample(tracked.service, target, consumer), targets))
+
+            node_ids = sorted(tracked.node_ids)
+            written = 0
+            for target, sample in zip(targets, samples):
+                if sample is None:
+                    continue
+                get_metrics_cache().put(target.server_id, sample)
+                db.add(ResourceSample(
+                    execution_id=execution_id,
+                    server_id=target.server_id,
+                    node_ids=node_ids,
+                    sampled_at=sampled_at,
+                    **resource_values(sample)
+                ))
+                written += 1
+            if written:
+                db.commit()
+            return written
+        finally:
+            db.close()
+
+
+def resource_timeseries(db: Session, execution_id: int) -> Dict[str, Any]:
+    """Column-oriented resource series of one execution, aligned on the sampling ticks.
+
+    Every server's metric lists have one entry per timestamp; ticks at which
+    a server was not sampled hold None. ``nodes`` gives each node's run window
+    so a change in the series can be matched to the node running at the time.
+    """
+    samples: List[ResourceSample] = db.query(ResourceSample).filter(
+        ResourceSample.execution_id == execution_id
+    ).order_by(ResourceSample.sampled_at.asc(), ResourceSample.server_id.asc()).all()
+    ticks = sorted({sample.sampled_at for sample in samples})
+    index = {tick: position for position, tick in enumerate(ticks)}
+    servers: Dict[int, Dict[str, Any]] = {}
+    for sample in samples:
+        entry = servers.get(sample.server_id)
+        if entry is None:
+            entry = servers[sample.server_id] = {
+                "server_id": sample.server_id,
+                "node_ids": [None] * len(ticks),
+                "series": {metric: [None] * len(ticks) for metric in RESOURCE_METRICS},
+            }
+        position = index[sample.sampled_at]
+        entry["node_ids"][position] = list(sample.node_ids or [])
+        for metric in RESOURCE_METRICS:
+            entry["series"][metric][position] = getattr(sample, metric)
+
+    names = dict(
+        db.query(Server.id, Server.name).filter(Server.id.in_(list(servers))).all()
+    ) if servers else {}
+    for server_id, entry in servers.items():
+        entry["server_name"] = names.get(server_id)
+    node_executions = db.query(NodeExecution).filter(
+        NodeExecution.execution_id == execution_id,
+        NodeExecution.started_at.isnot(None),
+    ).order_by(NodeExecution.id.asc()).all()
+    return {
+        "execution_id": execution_id,
+        "interval_seconds": RESOURCE_SAMPLE_INTERVAL_SECONDS,
+        "timestamps": [tick.isoformat() for tick in ticks],
+        "servers": [servers[server_id] for server_id in sorted(servers)],
+        "nodes": [
+            {
+                "node_id": node.node_id,
+                "node_type": node.node_type,
+                "status": node.status,
+                "started_at": node.started_at.isoformat(),
+                "finished_at": node.finished_at.isoformat() if node.finished_at else None,
+            }
+            for node in node_executions
+        ],
+    }
+
+
+_monitor = ExecutionResourceMonitor()
+
+
+def get_resource_monitor() -> ExecutionResourceMonitor:
+    return _monitor
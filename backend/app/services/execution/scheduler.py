@@ -0,0 +1,292 @@
+import heapq
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+UPSTREAM_FAILED_REASON = "Skipped because an upstream node did not complete successfully"
+BRANCH_NOT_SELECTED_REASON = "Skipped because an upstream condition branch was not selected"
+
+
+class SkippedNode(NamedTuple):
+    node_id: str
+    reason: str
+    blocking: bool
+
+
+class _LoopState:
+    __slots__ = ("current", "total", "body", "finished")
+
+    def __init__(self, total: int, body: Set[str], finished: int):
+        self.current = 0
+        self.total = total
+        self.body = body
+        self.finished = finished
+
+
+class _ParallelScope:
+    __slots__ = ("limit", "active", "waiting")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active: Set[str] = set()
+        self.waiting: List[Tuple[int, str]] = []
+
+
+class DagScheduler:
+    """Event-driven dependency bookkeeping for one workflow run.
+
+    Each node keeps a counter of parents that have not succeeded yet. Completing
+    a node only touches its own children, ready nodes wait in a heap ordered by
+    their position in ``node_order``, and a failed or skipped node skips its
+    pending descendants in a single walk. Scheduling a run is therefore
+    O(N log N + E) instead of rescanning every pending node after each
+    completion. The class does no I/O; ``ExecutionEngine`` submits the nodes it
+    hands out and reports their results back.
+
+    A ``parallel`` node can be registered as a concurrency scope: each of its
+    children heads a branch (the child plus the descendants no other child
+    reaches), and at most ``limit`` branches are admitted at a time. Heads of
+    further branches stay pending until an admitted branch has finished.
+    """
+
+    def __init__(
+        self,
+        node_order: List[str],
+        parents: Dict[str, List[str]],
+        children: Dict[str, List[str]]
+    ):
+        self.node_order = node_order
+        self.parents = parents
+        self.children = children
+        self.order_index = {node_id: index for index, node_id in enumerate(node_order)}
+        self.statuses: Dict[str, str] = {}
+        self.pending: Set[str] = set(node_order)
+        self.running: Set[str] = set()
+        self.control_flow_skipped: Set[str] = set()
+        self._remaining = {node_id: len(parents[node_id]) for node_id in node_order}
+        self._ready: List[Tuple[int, str]] = [
+            (self.order_index[node_id], node_id)
+            for node_id in node_order
+            if self._remaining[node_id] == 0
+        ]
+        heapq.heapify(self._ready)
+        self._loops: Dict[str, _LoopState] = {}
+        self._loops_by_node: Dict[str, Set[str]] = {}
+        self._touched_loops: Set[str] = set()
+        self._scopes: Dict[str, _ParallelScope] = {}
+        self._scopes_by_head: Dict[str, List[str]] = {}
+        self._branch_remaining: Dict[Tuple[str, str], int] = {}
+        self._branches_by_node: Dict[str, List[Tuple[str, str]]] = {}
+
+    def add_parallel_scope(self, scope_id: str, limit: int) -> None:
+        """Admit at most ``limit`` of ``scope_id``'s child branches at a time."""
+        bodies = {head_id: {head_id} | self._descendants(head_id) for head_id in self.children[scope_id]}
+        owners: Dict[str, int] = {}
+        for body in bodies.values():
+            for node_id in body:
+                owners[node_id] = owners.get(node_id, 0) + 1
+        self._scopes[scope_id] = _ParallelScope(max(1, int(limit)))
+        for head_id, body in bodies.items():
+            if owners[head_id] > 1:
+                continue
+            branch = (scope_id, head_id)
+            exclusive = [node_id for node_id in body if owners[node_id] == 1]
+            self._branch_remaining[branch] = sum(1 for node_id in exclusive if node_id not in self.statuses)
+            for node_id in exclusive:
+                self._branches_by_node.setdefault(node_id, []).append(branch)
+            self._scopes_by_head.setdefault(head_id, []).append(scope_id)
+
+    def pop_ready(self) -> List[str]:
+        ready: List[str] = []
+        while self._ready:
+            item = heapq.heappop(self._ready)
+            node_id = item[1]
+            if node_id in self.pending:
+                full_scope = self._full_scope(node_id)
+                if full_scope is not None:
+                    heapq.heappush(full_scope.waiting, item)
+                    continue
+                for scope_id in self._scopes_by_head.get(node_id, ()):
+                    self._scopes[scope_id].active.add(node_id)
+                self.pending.discard(node_id)
+                self.running.add(node_id)
+                ready.append(node_id)
+        return ready
+
+    def complete(
+        self,
+        node_id: str,
+        status: str,
+        skip_children: Iterable[str] = (),
+        skip_reason: str = BRANCH_NOT_SELECTED_REASON
+    ) -> List[SkippedNode]:
+        """Record a finished node and return the nodes skipped as a consequence.
+
+        ``skip_children`` lists children that must not run even though this node
+        succeeded (the branches a condition node did not take).
+        """
+        self.running.discard(node_id)
+        self._set_status(node_id, status)
+        if status != "success":
+            return self._propagate_skip([node_id])
+
+        skipped: List[SkippedNode] = []
+        branch_skipped: List[str] = []
+        for child_id in skip_children:
+            if child_id in self.pending:
+                self.control_flow_skipped.add(child_id)
+                self._mark_skipped(child_id)
+                skipped.append(SkippedNode(child_id, skip_reason, False))
+                branch_skipped.append(child_id)
+        for child_id in self.children[node_id]:
+            self._remaining[child_id] -= 1
+            if self._remaining[child_id] == 0 and child_id in self.pending:
+                heapq.heappush(self._ready, (self.order_index[child_id], child_id))
+        skipped.extend(self._propagate_skip(branch_skipped))
+        return skipped
+
+    def cancel(self, node_id: str) -> None:
+        """Mark a submitted node that never started as skipped, without cascading."""
+        self.running.discard(node_id)
+        self._set_status(node_id, "skipped")
+
+    def skip_pending(self, reason: str) -> List[SkippedNode]:
+        skipped = [
+            SkippedNode(node_id, reason, True)
+            for node_id in self.node_order
+            if node_id in self.pending
+        ]
+        for item in skipped:
+            self._mark_skipped(item.node_id)
+        self._ready.clear()
+        for scope in self._scopes.values():
+            scope.waiting.clear()
+        return skipped
+
+    def start_loop(self, loop_id: str, iterations: int) -> None:
+        body = self._descendants(loop_id)
+        if not body:
+            return
+        state = _LoopState(
+            total=max(1, int(iterations)),
+            body=body,
+            finished=sum(1 for node_id in body if node_id in self.statuses)
+        )
+        self._loops[loop_id] = state
+        for node_id in body:
+            self._loops_by_node.setdefault(node_id, set()).add(loop_id)
+        self._touched_loops.add(loop_id)
+
+    def advance_loops(self) -> List[Tuple[str, int, int]]:
+        """Restart loop bodies whose iteration just finished.
+
+        Returns ``(loop_id, finished_iterations, total)`` for every loop whose
+        body was reset and queued again.
+        """
+        restarted: List[Tuple[str, int, int]] = []
+        for loop_id in [loop_id for loop_id in self._loops if loop_id in self._touched_loops]:
+            state = self._loops.get(loop_id)
+            if state is None or state.finished < len(state.body):
+                continue
+            all_success = all(self.statuses.get(node_id) == "success" for node_id in state.body)
+            state.current += 1
+            if all_success and state.current < state.total:
+                self._reset_body(state.body)
+                restarted.append((loop_id, state.current, state.total))
+            else:
+                self._drop_loop(loop_id)
+        self._touched_loops.clear()
+        return restarted
+
+    def _reset_body(self, body: Set[str]) -> None:
+        for node_id in body:
+            if self.statuses.pop(node_id, None) is not None:
+                for loop_id in self._loops_by_node.get(node_id, ()):
+                    self._loops[loop_id].finished -= 1
+                for branch in self._branches_by_node.get(node_id, ()):
+                    self._branch_remaining[branch] += 1
+            self.pending.add(node_id)
+        for node_id in body:
+            self._remaining[node_id] = sum(
+                1 for parent_id in self.parents[node_id]
+                if self.statuses.get(parent_id) != "success"
+            )
+            if self._remaining[node_id] == 0:
+                heapq.heappush(self._ready, (self.order_index[node_id], node_id))
+
+    def _drop_loop(self, loop_id: str) -> None:
+        state = self._loops.pop(loop_id)
+        for node_id in state.body:
+            members = self._loops_by_node.get(node_id)
+            if members is not None:
+                members.discard(loop_id)
+                if not members:
+                    del self._loops_by_node[node_id]
+
+    def _full_scope(self, node_id: str) -> Optional[_ParallelScope]:
+        for scope_id in self._scopes_by_head.get(node_id, ()):
+            scope = self._scopes[scope_id]
+            if len(scope.active) >= scope.limit:
+                return scope
+        return None
+
+    def _finish_branch_node(self, node_id: str) -> None:
+        for branch in self._branches_by_node.get(node_id, ()):
+            self._branch_remaining[branch] -= 1
+            scope_id, head_id = branch
+            scope = self._scopes[scope_id]
+            if self._branch_remaining[branch] == 0 and head_id in scope.active:
+                scope.active.discard(head_id)
+                while scope.waiting:
+                    item = heapq.heappop(scope.waiting)
+                    if item[1] in self.pending:
+                        heapq.heappush(self._ready, item)
+                        break
+
+    def _descendants(self, node_id: str) -> Set[str]:
+        body: Set[str] = set()
+        stack = list(self.children.get(node_id, []))
+        while stack:
+            child_id = stack.pop()
+            if child_id not in body:
+                body.add(child_id)
+                stack.extend(self.children.get(child_id, []))
+        return body
+
+    def _propagate_skip(self, sources: List[str]) -> List[SkippedNode]:
+        skipped: List[SkippedNode] = []
+        stack = list(sources)
+        while stack:
+            source_id = stack.pop()
+            for child_id in self.children[source_id]:
+                if child_id not in self.pending:
+                    continue
+                blocking_parents = [
+                    parent_id for parent_id in self.parents[child_id]
+                    if self.statuses.get(parent_id) in {"failed", "skipped"}
+                ]
+                is_control_flow_skip = all(
+                    self.statuses.get(parent_id) == "skipped" and parent_id in self.control_flow_skipped
+                    for parent_id in blocking_parents
+                )
+                if is_control_flow_skip:
+                    self.control_flow_skipped.add(child_id)
+                    skipped.append(SkippedNode(child_id, BRANCH_NOT_SELECTED_REASON, False))
+                else:
+                    skipped.append(SkippedNode(child_id, UPSTREAM_FAILED_REASON, True))
+                self._mark_skipped(child_id)
+                stack.append(child_id)
+        return skipped
+
+    def _mark_skipped(self, node_id: str) -> None:
+        self.pending.discard(node_id)
+        self._set_status(node_id, "skipped")
+
+    def _set_status(self, node_id: str, status: str) -> None:
+        if node_id not in self.statuses:
+            for loop_id in self._loops_by_node.get(node_id, ()):
+                self._loops[loop_id].finished += 1
+                self._touched_loops.add(loop_id)
+            self.statuses[node_id] = status
+            self._finish_branch_node(node_id)
+            return
+        self.statuses[node_id] = status
+
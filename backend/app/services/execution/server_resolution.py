@@ -1,9 +1,17 @@
 import logging
-import random
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.models.database import Execution, NodeExecution, Server
-from app.workflow_node_types import node_requires_server, node_uses_top_level_server
+from app.config import SERVER_RESERVATION_TIMEOUT_SECONDS
+from app.models.database import Server
+from app.services.server_leases import ServerLeaseManager, get_server_reservation_queue
+from app.services.ssh_service import get_circuit_breaker
+from app.workflow_node_types import (
+    node_requires_server,
+    node_reserves_cluster_servers,
+    node_uses_top_level_server,
+)
+
+from .placement import PlacementRequest, rank_servers
 
 logger = logging.getLogger(__name__)
 
@@ -29,42 +37,180 @@ class ServerResolutionMixin:
             server_id = self._scheduled_server_id_for_role(context, role)
             if server_id not in (None, ""):
                 return self.db.query(Server).filter(Server.id == int(server_id)).first()
-            return self._resolve_idle_server_by_region(self._schedule_region(config, context))
+            return self._resolve_idle_server_by_region(self._schedule_region(config, context), config, context)
 
         raise ValueError(f"Unsupported schedule_mode: {mode}")
 
     def _resolve_server_with_region(self, config: Dict[str, Any], context: Dict[str, Any]) -> Optional[Server]:
         return self._resolve_server_for_schedule(config, context)
 
-    def _resolve_idle_server_by_region(self, region: str) -> Optional[Server]:
-        busy_server_ids = self._compute_busy_server_ids()
+    def _resolve_idle_server_by_region(
+        self,
+        region: str,
+        config: Optional[Dict[str, Any]] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Server]:
+        config = config if config is not None else {}
+        leases = ServerLeaseManager(self.db)
+        execution_id = config.get("_execution_id")
+        node_id = config.get("_node_id")
+        if execution_id is not None and node_id:
+            held = leases.held_server(int(execution_id), str(node_id))
+            if held is not None:
+                return held
 
-        query = self.db.query(Server).filter(
-            Server.region == region,
-            Server.schedulable.is_(True)
+        candidates, unreachable = self._reachable_servers(leases.idle_servers(region))
+        idle_servers, decision = rank_servers(
+            self.db, candidates, self._placement_request(region, config, context or {})
         )
-        if busy_server_ids:
-            query = query.filter(Server.id.notin_(busy_server_ids))
-
-        idle_servers = query.all()
-        if not idle_servers:
+        if execution_id is not None and node_id:
+            server = leases.acquire_idle(region, int(execution_id), str(node_id), candidates=idle_servers)
+        else:
+            server = idle_servers[0] if idle_servers else None
+        if server is None:
             logger.warning(
-                "No idle server found in region %s; busy_server_ids=%s",
+                "No idle server found in region %s; candidates=%s, unreachable=%s",
                 region,
-                busy_server_ids
+                [item.id for item in idle_servers],
+                unreachable
             )
             return None
 
-        server = random.choice(idle_servers)
+        decision["selected"] = [server.id]
+        decision["unreachable"] = unreachable
+        config["_placement"] = decision
         logger.info(
-            "Selected idle server %s (%s) from region %s; candidates=%s",
+            "Selected idle server %s (%s) from region %s by %s placement; ranking=%s",
             server.id,
             server.name,
             region,
-            [item.id for item in idle_servers]
+            decision["strategy"],
+            decision["candidates"]
         )
         return server
 
+    def _reachable_servers(self, servers: List[Server]) -> Tuple[List[Server], List[int]]:
+        breaker = get_circuit_breaker()
+        reachable: List[Server] = []
+        unreachable: List[int] = []
+        for server in servers:
+            if breaker.is_open(server.host):
+                unreachable.append(server.id)
+            else:
+                reachable.append(server)
+        return reachable, unreachable
+
+    def _placement_request(self, region: str, config: Dict[str, Any], context: Dict[str, Any]) -> PlacementRequest:
+        """Soft anti-affinity: stay off hosts this execution already placed other roles or the cluster on."""
+        role = self._schedule_role(config)
+        avoid = set()
+        scheduled_servers = context.get("_scheduled_servers")
+        if isinstance(scheduled_servers, dict):
+            for other_role, payload in scheduled_servers.items():
+                if other_role != role and isinstance(payload, dict) and payload.get("server_id") not in (None, ""):
+                    avoid.add(int(payload["server_id"]))
+        for field in ("config_nodes", "data_nodes"):
+            raw_nodes = context.get(field)
+            if not isinstance(raw_nodes, list):
+                continue
+            for item in raw_nodes:
+                if isinstance(item, dict) and item.get("server_id") not in (None, ""):
+                    avoid.add(int(item["server_id"]))
+        return PlacementRequest(
+            region=region,
+            role=role,
+            strategy=config.get("placement_strategy"),
+            avoid_server_ids=frozenset(avoid),
+        )
+
+    def _lease_node_servers(self, execution_id: int, node_id: str, config: Dict[str, Any]) -> None:
+        server_ids = set()
+        if config.get("server_id") not in (None, ""):
+            server_ids.add(int(config["server_id"]))
+        for field in ("config_nodes", "data_nodes"):
+            raw_nodes = config.get(field)
+            if not isinstance(raw_nodes, list):
+                continue
+            for item in raw_nodes:
+                if isinstance(item, dict) and item.get("server_id") not in (None, ""):
+                    server_ids.add(int(item["server_id"]))
+        if not server_ids:
+            return
+        leases = ServerLeaseManager(self.db)
+        for server in self.db.query(Server).filter(Server.id.in_(server_ids)).all():
+            leases.acquire(server, execution_id, node_id, exclusive=False)
+
+    def _needs_cluster_reservation(self, node_type: str, config: Dict[str, Any]) -> bool:
+        return node_reserves_cluster_servers(node_type) and config.get("_schedule_mode") == "random"
+
+    def _reserve_cluster_servers(
+        self,
+        execution_id: int,
+        node_id: str,
+        config: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Reserve every host of a random-mode cluster topology at once and bind the entries to them.
+
+        Entries sharing a template server_id stay co-located; entries without one get their own host.
+        """
+        slots: Dict[Any, List[Dict[str, Any]]] = {}
+        topology: Dict[str, List[Dict[str, Any]]] = {}
+        for field in ("config_nodes", "data_nodes"):
+            raw_nodes = config.get(field)
+            entries = [dict(item) for item in raw_nodes if isinstance(item, dict)] if isinstance(raw_nodes, list) else []
+            for index, entry in enumerate(entries):
+                key = ("server", int(entry["server_id"])) if entry.get("server_id") not in (None, "") else (field, index)
+                slots.setdefault(key, []).append(entry)
+            topology[field] = entries
+        if not slots:
+            return config
+
+        region = self._schedule_region(config, {})
+        leases = ServerLeaseManager(self.db)
+        available = leases.schedulable_count(region)
+        if available < len(slots):
+            raise ValueError(
+                f"Cluster needs {len(slots)} servers but region {region} has only {available} schedulable servers"
+            )
+
+        request = self._placement_request(region, config, context or {})
+        decision: Dict[str, Any] = {}
+
+        def rank(candidates: List[Server]) -> List[Server]:
+            reachable, unreachable = self._reachable_servers(candidates)
+            ranked, ranking = rank_servers(self.db, reachable, request)
+            decision.clear()
+            decision.update(ranking, unreachable=unreachable)
+            return ranked
+
+        timeout = float(config.get("reservation_timeout", SERVER_RESERVATION_TIMEOUT_SECONDS))
+        servers = get_server_reservation_queue().reserve(
+            self.db, region, len(slots), execution_id, node_id, timeout,
+            should_stop=lambda: self._is_stop_requested(execution_id, check_db=False),
+            rank=rank
+        )
+        if servers is None:
+            if self._is_stop_requested(execution_id, check_db=False):
+                raise ValueError("Execution stopped while waiting for cluster servers")
+            raise ValueError(
+                f"Timed out after {timeout:.0f}s waiting for {len(slots)} idle servers in region {region}"
+            )
+
+        for server, entries in zip(servers, slots.values()):
+            for entry in entries:
+                entry["server_id"] = server.id
+                entry["host"] = server.host
+        placement = {**decision, "selected": [server.id for server in servers]} if decision else None
+        logger.info(
+            "Reserved cluster servers %s in region %s for node %s; placement=%s",
+            [server.id for server in servers], region, node_id, placement
+        )
+        reserved = {**config, **topology}
+        if placement is not None:
+            reserved["_placement"] = placement
+        return reserved
+
     def _write_server_config(self, config: Dict[str, Any], server: Server) -> None:
         config["server_id"] = server.id
         config["server_name"] = server.name
@@ -123,36 +269,6 @@ class ServerResolutionMixin:
             raise ValueError("Workflow schedule_region is required for random scheduling")
         return str(region)
 
-    def _compute_busy_server_ids(self) -> List[int]:
-        running_executions = self.db.query(Execution.id).filter(
-            Execution.status == "running"
-        ).all()
-        running_exec_ids = [e.id for e in running_executions]
-
-        if not running_exec_ids:
-            return []
-
-        running_node_execs = self.db.query(NodeExecution).filter(
-            NodeExecution.execution_id.in_(running_exec_ids),
-            NodeExecution.status == "running"
-        ).all()
-
-        busy_ids: List[int] = []
-        for ne in running_node_execs:
-            if ne.input_data and isinstance(ne.input_data, dict):
-                server_id = ne.input_data.get("server_id")
-                if server_id is not None:
-                    busy_ids.append(int(server_id))
-                for field in ("config_nodes", "data_nodes"):
-                    raw_nodes = ne.input_data.get(field)
-                    if not isinstance(raw_nodes, list):
-                        continue
-                    for item in raw_nodes:
-                        if isinstance(item, dict) and item.get("server_id") is not None:
-                            busy_ids.append(int(item["server_id"]))
-
-        return list(set(busy_ids))
-
     def _node_requires_server(self, node_type: str) -> bool:
         return node_requires_server(node_type)
 
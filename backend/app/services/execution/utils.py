@@ -1,12 +1,81 @@
 import os
 import time
-from typing import Any, Dict, List, Optional
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
+from app.config import LOG_DIR
 from app.models.database import Server
 
+from .cancellation import get_cancellation_registry
+from .remote_processes import REMOTE_RUN_ROOT, RemoteProcess, get_remote_process_registry
+
+
+def execution_log_dir(execution_id: int) -> Path:
+    return LOG_DIR / f"execution_{execution_id}"
+
 
 class UtilsMixin:
 
+    def _sleep_unless_stopped(self, config: Dict[str, Any], seconds: float) -> bool:
+        """Sleep between polls; returns True as soon as the execution is stopped."""
+        execution_id = config.get("_execution_id")
+        if execution_id is None:
+            time.sleep(max(0.0, seconds))
+            return False
+        return get_cancellation_registry().get(execution_id).wait(seconds)
+
+    def _stopped_result(self, **extra: Any) -> Dict[str, Any]:
+        return {
+            "exit_status": -1,
+            "stdout": "",
+            "stderr": "",
+            "error": "Execution stopped",
+            "stopped": True,
+            **extra,
+        }
+
+    def _node_log_path(self, config: Dict[str, Any]) -> Optional[str]:
+        execution_id = config.get("_execution_id")
+        node_id = config.get("_node_id")
+        if execution_id is None or node_id in (None, ""):
+            return None
+        return str(execution_log_dir(execution_id) / f"{self._safe_path_segment(node_id)}.{int(time.time() * 1000)}.log")
+
+    def _output_publisher(self, config: Dict[str, Any]) -> Optional[Callable[[str, str], None]]:
+        """Callback for run_command_stream that pushes output chunks to the execution's event stream."""
+        execution_id = config.get("_execution_id")
+        node_id = config.get("_node_id")
+        if execution_id is None or node_id in (None, ""):
+            return None
+        return lambda stream, text: self.events.publish_output(execution_id, node_id, stream, text)
+
+    def _remote_pid_path(self, config: Dict[str, Any]) -> Optional[str]:
+        execution_id = config.get("_execution_id")
+        if execution_id is None:
+            return None
+        node_segment = self._safe_path_segment(config.get("_node_id"))
+        return f"{REMOTE_RUN_ROOT}/{execution_id}/{node_segment}-{uuid.uuid4().hex[:8]}.pid"
+
+    def _register_remote_process(self, config: Dict[str, Any], server: Server, pid_path: str) -> None:
+        execution_id = config.get("_execution_id")
+        if execution_id is None:
+            return
+        get_remote_process_registry().register(execution_id, RemoteProcess(
+            node_id=str(config.get("_node_id") or ""),
+            server_id=server.id,
+            host=server.host,
+            username=server.username,
+            password=server.password,
+            port=server.port,
+            pid_path=pid_path
+        ))
+
+    def _unregister_remote_process(self, config: Dict[str, Any], pid_path: str) -> None:
+        execution_id = config.get("_execution_id")
+        if execution_id is not None:
+            get_remote_process_registry().unregister(execution_id, pid_path)
+
     def _apply_config_file_to_server(
         self,
         server: Server,
@@ -15,52 +84,23 @@ class UtilsMixin:
         timeout: int,
         backup_before_write: bool
     ) -> Dict[str, Any]:
-        read_result = self.ssh_service.read_file(
-            host=server.host,
-            username=server.username,
-            password=server.password,
-            remote_path=file_path,
-            port=server.port,
-            timeout=timeout
-        )
-        if read_result["status"] != "success":
-            return {
-                "exit_status": -1,
-                "stdout": "",
-                "stderr": read_result.get("message", ""),
-                "error": read_result.get("message", "Failed to read config file")
-            }
-
-        updated = self._replace_properties(read_result["content"], replacements)
-        backup_path = None
-        if backup_before_write:
-            backup_path = f"{file_path}.bak.{int(time.time())}"
-            backup_result = self.ssh_service.run_command(
-                host=server.host,
-                username=server.username,
-                password=server.password,
-                command=f"cp {self._quote(file_path)} {self._quote(backup_path)}",
-                port=server.port,
-                timeout=timeout
-            )
-            if backup_result.exit_status != 0:
-                return self._ssh_result_to_dict(backup_result)
-
-        write_result = self.ssh_service.write_file(
+        backup_path = f"{file_path}.bak.{int(time.time())}" if backup_before_write else None
+        edit_result = self.ssh_service.edit_file(
             host=server.host,
             username=server.username,
             password=server.password,
             remote_path=file_path,
-            content=updated,
+            transform=lambda content: self._replace_properties(content, replacements),
+            backup_path=backup_path,
             port=server.port,
             timeout=timeout
         )
-        if write_result["status"] != "success":
+        if edit_result["status"] != "success":
             return {
                 "exit_status": -1,
                 "stdout": "",
-                "stderr": write_result.get("message", ""),
-                "error": write_result.get("message", "Failed to write config file")
+                "stderr": edit_result.get("message", ""),
+                "error": edit_result.get("message", "Failed to update config file")
             }
 
         result: Dict[str, Any] = {
@@ -326,6 +366,9 @@ class UtilsMixin:
         }
         if getattr(result, "ssh_port", None) is not None:
             payload["ssh_port"] = result.ssh_port
+        if getattr(result, "log_path", None):
+            payload["log_path"] = result.log_path
+            payload["truncated"] = result.truncated
         return payload
 
     def _quote(self, value: str) -> str:
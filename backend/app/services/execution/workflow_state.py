@@ -0,0 +1,218 @@
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from app.utils.time import utc_now
+
+NOT_RUN = "not-run"
+# Node fields copied from a node transition (see events.node_event_data)
+TRANSITION_FIELDS = ("status", "started_at", "finished_at", "duration", "error_message")
+
+
+def sequence_by_topology(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Label nodes by topological layer ("2", or "2-1", "2-2" when a layer has several nodes).
+
+    Layers are peeled Kahn-style in O(N + E); a cycle puts all remaining nodes
+    into one layer. Nodes in a layer are ordered by canvas position.
+    """
+    node_ids: List[str] = []
+    node_index: Dict[str, int] = {}
+    node_positions: Dict[str, Dict[str, Any]] = {}
+    for index, node in enumerate(nodes):
+        node_id = str(node.get("id") or f"node-{index}")
+        if node_id in node_index:
+            node_id = f"{node_id}-{index}"
+        node_ids.append(node_id)
+        node_index[node_id] = index
+        node_positions[node_id] = node.get("position") or {}
+
+    parents: Dict[str, Set[str]] = {node_id: set() for node_id in node_ids}
+    children: Dict[str, Set[str]] = {node_id: set() for node_id in node_ids}
+    for edge in edges:
+        from_node = str(edge.get("from") or edge.get("from_node") or "")
+        to_node = str(edge.get("to") or "")
+        if from_node not in parents or to_node not in parents:
+            continue
+        parents[to_node].add(from_node)
+        children[from_node].add(to_node)
+
+    def sort_key(node_id: str) -> tuple:
+        position = node_positions.get(node_id) or {}
+        return (float(position.get("x") or 0), float(position.get("y") or 0), node_index.get(node_id, 0))
+
+    waiting = {node_id: len(parents[node_id]) for node_id in node_ids}
+    remaining = set(node_ids)
+    ready = [node_id for node_id in node_ids if not waiting[node_id]]
+    sequence: Dict[str, str] = {}
+    layer = 1
+    while remaining:
+        if not ready:
+            ready = list(remaining)
+        ready.sort(key=sort_key)
+        if len(ready) == 1:
+            sequence[ready[0]] = str(layer)
+        else:
+            for index, node_id in enumerate(ready, 1):
+                sequence[node_id] = f"{layer}-{index}"
+        next_ready = []
+        for node_id in ready:
+            remaining.discard(node_id)
+        for node_id in ready:
+            for child_id in children[node_id]:
+                if child_id not in remaining:
+                    continue
+                waiting[child_id] -= 1
+                if waiting[child_id] == 0:
+                    next_ready.append(child_id)
+        ready = next_ready
+        layer += 1
+    return sequence
+
+
+def sequence_sort_key(sequence: str) -> tuple:
+    parts = sequence.split("-", 1)
+    try:
+        layer = int(parts[0])
+    except ValueError:
+        layer = 0
+    branch = 0
+    if len(parts) > 1:
+        try:
+            branch = int(parts[1])
+        except ValueError:
+            branch = 0
+    return layer, branch
+
+
+def edge_status(from_status: str, to_status: str) -> str:
+    if from_status == "failed":
+        return "failed"
+    if from_status == "success" and to_status != NOT_RUN:
+        return "passed"
+    if to_status == "running":
+        return "running"
+    return "pending"
+
+
+class LiveWorkflowState:
+    """The ``workflow_state`` snapshot of one execution, kept current as nodes change state.
+
+    Topology and node order are computed once; each node transition is a
+    dict update. ``snapshot`` serializes the current state in the same shape
+    that is stored in ``Execution.summary["workflow_state"]``.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+        self._lock = threading.Lock()
+        self.revision = 0
+        sequence = sequence_by_topology(nodes, edges)
+        self._nodes: List[Dict[str, Any]] = []
+        for index, node in enumerate(nodes):
+            node_id = str(node.get("id") or f"node-{index}")
+            self._nodes.append(self._entry(
+                node_id,
+                str(node.get("type", "shell")),
+                node.get("config", {}) or {},
+                node.get("position"),
+                sequence.get(node_id, str(index + 1)),
+            ))
+        self._nodes.sort(key=lambda item: sequence_sort_key(str(item.get("sequence") or "")))
+        # applied transitions; nodes that never ran fall back to the scheduler's view at snapshot time
+        self._applied: Set[str] = set()
+        self._by_id: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in self._nodes:
+            self._by_id.setdefault(entry["id"], []).append(entry)
+        self._edges: List[Dict[str, Any]] = []
+        for edge in edges:
+            from_node = str(edge.get("from") or edge.get("from_node") or "")
+            to_node = str(edge.get("to") or "")
+            if from_node and to_node:
+                self._edges.append({"from": from_node, "to": to_node, "label": edge.get("label")})
+
+    @staticmethod
+    def _entry(node_id: str, node_type: str, config: Dict[str, Any], position: Any, sequence: Any) -> Dict[str, Any]:
+        return {
+            "id": node_id,
+            "type": node_type,
+            "config": config,
+            "position": position,
+            "sequence": sequence,
+            "status": NOT_RUN,
+            "node_execution_id": None,
+            "started_at": None,
+            "finished_at": None,
+            "duration": None,
+            "error_message": None,
+        }
+
+    def apply(self, transition: Dict[str, Any]) -> None:
+        """Record a node transition (a ``node`` event payload: node_id, id, status, times, error)."""
+        node_id = str(transition["node_id"])
+        with self._lock:
+            entries = self._by_id.get(node_id)
+            if entries is None:
+                # ran but is not part of the workflow definition (e.g. edited since)
+                entry = self._entry(node_id, str(transition.get("node_type") or "shell"), {}, None, len(self._nodes) + 1)
+                self._nodes.append(entry)
+                entries = self._by_id[node_id] = [entry]
+            for entry in entries:
+                entry["node_execution_id"] = transition.get("id")
+                for field in TRANSITION_FIELDS:
+                    entry[field] = transition.get(field)
+            self._applied.add(node_id)
+            self.revision += 1
+
+    def snapshot(self, statuses: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Current state; ``statuses`` (scheduler statuses) fill in nodes without a transition."""
+        statuses = statuses or {}
+        with self._lock:
+            nodes = []
+            for entry in self._nodes:
+                node = dict(entry)
+                if node["id"] not in self._applied:
+                    node["status"] = statuses.get(node["id"], NOT_RUN)
+                nodes.append(node)
+            revision = self.revision
+        status_by_node_id = {node["id"]: node["status"] for node in nodes}
+        return {
+            "version": 1,
+            "revision": revision,
+            "captured_at": utc_now().isoformat(),
+            "nodes": nodes,
+            "edges": [
+                {
+                    **edge,
+                    "status": edge_status(
+                        status_by_node_id.get(edge["from"], NOT_RUN),
+                        status_by_node_id.get(edge["to"], NOT_RUN)
+                    ),
+                }
+                for edge in self._edges
+            ],
+        }
+
+
+class WorkflowStateRegistry:
+    """Live workflow states of the executions running in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[int, LiveWorkflowState] = {}
+
+    def register(self, execution_id: int, state: LiveWorkflowState) -> None:
+        with self._lock:
+            self._states[execution_id] = state
+
+    def get(self, execution_id: int) -> Optional[LiveWorkflowState]:
+        with self._lock:
+            return self._states.get(execution_id)
+
+    def discard(self, execution_id: int) -> None:
+        with self._lock:
+            self._states.pop(execution_id, None)
+
+
+_registry = WorkflowStateRegistry()
+
+
+def get_workflow_states() -> WorkflowStateRegistry:
+    return _registry
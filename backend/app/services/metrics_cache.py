@@ -0,0 +1,77 @@
+# backend/app/services/metrics_cache.py
+"""
+In-memory cache of the latest resource sample per server.
+
+The background metrics collector writes one sample per server per interval;
+the monitoring API and server placement read from here instead of opening
+SSH sessions of their own.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.utils.time import utc_now
+
+
+class ServerMetricsCache:
+    """Latest status sample per server id, with the time it was taken."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[int, Dict[str, Any]] = {}
+        self._sampled_at: Dict[int, float] = {}
+        self._sampled_wall: Dict[int, datetime] = {}
+
+    def put(self, server_id: int, sample: Dict[str, Any]) -> None:
+        with self._lock:
+            self._samples[server_id] = sample
+            self._sampled_at[server_id] = time.monotonic()
+            self._sampled_wall[server_id] = utc_now()
+
+    def get(self, server_id: int, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the latest sample, or None if missing or older than ``max_age`` seconds."""
+        with self._lock:
+            sample = self._samples.get(server_id)
+            sampled_at = self._sampled_at.get(server_id)
+        if sample is None:
+            return None
+        if max_age is not None and time.monotonic() - sampled_at > max_age:
+            return None
+        return sample
+
+    def snapshot(self, server_id: int) -> Optional[Tuple[Dict[str, Any], datetime, float]]:
+        """Return ``(sample, sampled_at, age_seconds)`` for the latest sample, or None."""
+        with self._lock:
+            sample = self._samples.get(server_id)
+            if sample is None:
+                return None
+            return sample, self._sampled_wall[server_id], time.monotonic() - self._sampled_at[server_id]
+
+    def discard(self, server_id: int) -> None:
+        with self._lock:
+            self._samples.pop(server_id, None)
+            self._sampled_at.pop(server_id, None)
+            self._sampled_wall.pop(server_id, None)
+
+    def retain(self, server_ids: Iterable[int]) -> None:
+        """Drop samples of servers that no longer exist."""
+        keep = set(server_ids)
+        with self._lock:
+            for server_id in [item for item in self._samples if item not in keep]:
+                self._samples.pop(server_id, None)
+                self._sampled_at.pop(server_id, None)
+                self._sampled_wall.pop(server_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._sampled_at.clear()
+            self._sampled_wall.clear()
+
+
+_cache = ServerMetricsCache()
+
+
+def get_metrics_cache() -> ServerMetricsCache:
+    return _cache
@@ -0,0 +1,182 @@
+# backend/app/services/metrics_collector.py
+"""
+Background collector for remote server metrics.
+
+Samples every server once per interval, in parallel, and keeps the latest
+sample in the shared metrics cache. The monitoring API serves from that
+cache, so the number of SSH sessions per interval no longer grows with the
+number of browser tabs watching.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import METRICS_COLLECT_CONCURRENCY, METRICS_COLLECT_INTERVAL_SECONDS
+from app.models.database import Server
+from app.services.metrics_cache import ServerMetricsCache, get_metrics_cache
+from app.services.metrics_history import MetricsHistoryStore, get_metrics_history
+from app.services.monitoring_service import MonitoringService
+from app.services.proc_sampler import get_proc_sampler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MetricsTarget:
+    server_id: int
+    server_name: str
+    host: str
+    username: Optional[str]
+    password: Optional[str]
+    port: int
+
+    @classmethod
+    def from_server(cls, server: Server) -> "MetricsTarget":
+        return cls(
+            server_id=server.id,
+            server_name=server.name,
+            host=server.host,
+            username=server.username,
+            password=server.password,
+            port=server.port or 22,
+        )
+
+
+class MetricsCollector:
+    """Samples all servers on an interval and answers status reads from the cache."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float = METRICS_COLLECT_INTERVAL_SECONDS,
+        concurrency: int = METRICS_COLLECT_CONCURRENCY,
+        cache: Optional[ServerMetricsCache] = None,
+        service: Optional[MonitoringService] = None,
+        history: Optional[MetricsHistoryStore] = None
+    ):
+        self.session_factory = session_factory
+        self.interval = float(interval)
+        self.concurrency = max(1, int(concurrency))
+        self.cache = cache or get_metrics_cache()
+        self.history = history or get_metrics_history()
+        self._service = service
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._locks_lock = threading.Lock()
+        self._server_locks: Dict[int, threading.Lock] = {}
+
+    @property
+    def service(self) -> MonitoringService:
+        if self._service is None:
+            self._service = MonitoringService()
+        return self._service
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="metrics-collector", daemon=True)
+        self._thread.start()
+        logger.info(f"Metrics collector started: every {self.interval}s, {self.concurrency} concurrent samples")
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.collect_all()
+            except Exception as e:
+                logger.error(f"Metrics collection round failed: {e}")
+            self._stop.wait(self.interval)
+
+    def collect_all(self) -> int:
+        """Sample every server once in parallel. Returns the number of successful samples."""
+        db = self.session_factory()
+        try:
+            targets = [MetricsTarget.from_server(server) for server in db.query(Server).all()]
+        finally:
+            db.close()
+        server_ids = [target.server_id for target in targets]
+        self.cache.retain(server_ids)
+        self.history.retain(server_ids)
+        get_proc_sampler().retain(server_ids)
+        if not targets:
+            return 0
+        with ThreadPoolExecutor(
+            max_workers=min(self.concurrency, len(targets)),
+            thread_name_prefix="metrics-sample"
+        ) as executor:
+            samples = list(executor.map(lambda target: self.collect_one(target, max_age=0), targets))
+        sampled = sum(1 for sample in samples if sample is not None)
+        logger.debug(f"Metrics collected for {sampled}/{len(targets)} servers")
+        return sampled
+
+    def collect_one(self, target: MetricsTarget, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Sample one server unless a sample younger than ``max_age`` exists.
+
+        Concurrent calls for the same server share one SSH round trip: later
+        callers wait for the first and then reuse its sample.
+        """
+        if max_age is None:
+            max_age = self.interval
+        with self._server_lock(target.server_id):
+            if max_age > 0:
+                cached = self.cache.get(target.server_id, max_age=max_age)
+                if cached is not None:
+                    return cached
+            sample = self.service.sample_remote_status(
+                host=target.host,
+                username=target.username,
+                password=target.password,
+                port=target.port,
+                server_id=target.server_id,
+                server_name=target.server_name
+            )
+            if sample is not None:
+                self.cache.put(target.server_id, sample)
+                self.history.record(target.server_id, sample)
+            return sample
+
+    def get_status(self, server: Server) -> Dict[str, Any]:
+        """Latest cached status with ``sampled_at``; samples on demand only if nothing is cached yet."""
+        target = MetricsTarget.from_server(server)
+        if self.cache.snapshot(target.server_id) is None:
+            self.collect_one(target)
+        snapshot = self.cache.snapshot(target.server_id)
+        if snapshot is None:
+            status = self.service.empty_remote_status(target.host, target.server_id, target.server_name)
+            return {**status, "sampled_at": None}
+        sample, sampled_at, _ = snapshot
+        return {
+            **sample,
+            "server_id": target.server_id,
+            "server_name": target.server_name,
+            "host": target.host,
+            "sampled_at": sampled_at.isoformat(),
+        }
+
+    def _server_lock(self, server_id: int) -> threading.Lock:
+        with self._locks_lock:
+            return self._server_locks.setdefault(server_id, threading.Lock())
+
+
+_collector: Optional[MetricsCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_metrics_collector() -> MetricsCollector:
+    """Return the process-wide collector, creating it on first use."""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            from app.dependencies import SessionLocal
+            _collector = MetricsCollector(SessionLocal)
+        return _collector
@@ -0,0 +1,257 @@
+# backend/app/services/metrics_history.py
+"""
+Bounded time-series history of remote server metrics.
+
+Each server keeps fixed-size ring buffers (``array('d')``, 8 bytes per value)
+for a few resolution tiers. Raw samples from the collector go into the finest
+tier and are averaged into the coarser tiers as buckets close, so memory per
+server is constant no matter how long the process runs.
+"""
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import accumulate
+from operator import itemgetter, sub, truediv
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+HISTORY_FIELDS = ("cpu_percent", "memory_percent", "disk_percent")
+# Upper bound on points returned by one query when no step is requested
+MAX_QUERY_POINTS = 720
+
+
+@dataclass(frozen=True)
+class HistoryTier:
+    name: str
+    resolution: float
+    capacity: int
+
+
+# raw 5s for 2h, 1m for 24h, 10m for 7d
+DEFAULT_TIERS: Tuple[HistoryTier, ...] = (
+    HistoryTier("raw", 5, 1440),
+    HistoryTier("1m", 60, 1440),
+    HistoryTier("10m", 600, 1008),
+)
+
+
+class RingSeries:
+    """Fixed-capacity ring of timestamps plus one float column per field."""
+
+    def __init__(self, capacity: int, fields: Sequence[str] = HISTORY_FIELDS):
+        self.capacity = int(capacity)
+        self.fields = tuple(fields)
+        self.times = array("d", bytes(8 * self.capacity))
+        self.columns = {field: array("d", bytes(8 * self.capacity)) for field in self.fields}
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp: float, values: Dict[str, float]) -> None:
+        if self.size < self.capacity:
+            index = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[index] = timestamp
+        for field in self.fields:
+            self.columns[field][index] = values.get(field, 0.0)
+
+    def oldest(self) -> Optional[float]:
+        return self.times[self.start] if self.size else None
+
+    def _ordered(self, column: array) -> array:
+        end = self.start + self.size
+        if end <= self.capacity:
+            return column[self.start:end]
+        return column[self.start:] + column[:end - self.capacity]
+
+    def window(self, start: float, end: float) -> Tuple[array, Dict[str, array]]:
+        """Points with ``start <= t < end`` in time order, as array slices."""
+        times = self._ordered(self.times)
+        lo = bisect_left(times, start)
+        hi = bisect_left(times, end, lo)
+        return times[lo:hi], {field: self._ordered(self.columns[field])[lo:hi] for field in self.fields}
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.itemsize * self.capacity * (1 + len(self.fields))
+
+
+class _Bucket:
+    __slots__ = ("start", "count", "sums")
+
+    def __init__(self, start: float, fields: Sequence[str]):
+        self.start = start
+        self.count = 0
+        self.sums = dict.fromkeys(fields, 0.0)
+
+    def add(self, values: Dict[str, float]) -> None:
+        self.count += 1
+        for field in self.sums:
+            self.sums[field] += values.get(field, 0.0)
+
+    def mean(self) -> Dict[str, float]:
+        return {field: total / self.count for field, total in self.sums.items()}
+
+
+class ServerHistory:
+    """All tiers for one server; raw points cascade into coarser averages."""
+
+    def __init__(self, tiers: Sequence[HistoryTier] = DEFAULT_TIERS, fields: Sequence[str] = HISTORY_FIELDS):
+        self.tiers = tuple(tiers)
+        self.fields = tuple(fields)
+        self.series = [RingSeries(tier.capacity, self.fields) for tier in self.tiers]
+        self._buckets: List[Optional[_Bucket]] = [None] * len(self.tiers)
+
+    def record(self, timestamp: float, values: Dict[str, float]) -> None:
+        self.series[0].append(timestamp, values)
+        self._feed(1, timestamp, values)
+
+    def _feed(self, level: int, timestamp: float, values: Dict[str, float]) -> None:
+        if level >= len(self.tiers):
+            return
+        resolution = self.tiers[level].resolution
+        bucket_start = math.floor(timestamp / resolution) * resolution
+        bucket = self._buckets[level]
+        if bucket is not None and bucket.start != bucket_start:
+            closed = bucket.mean()
+            self.series[level].append(bucket.start, closed)
+            self._feed(level + 1, bucket.start, closed)
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[level] = _Bucket(bucket_start, self.fields)
+        bucket.add(values)
+
+    def pick_level(self, start: float, step: Optional[float]) -> int:
+        """Finest tier not coarser than ``step`` that still reaches back to ``start``."""
+        usable = [
+            level for level, tier in enumerate(self.tiers)
+            if step is None or tier.resolution <= step or level == 0
+        ]
+        for level in usable:
+            oldest = self.series[level].oldest()
+            if oldest is not None and oldest <= start:
+                return level
+        # nothing reaches back far enough yet: use whichever tier holds the oldest data
+        populated = [(self.series[level].oldest(), level) for level in usable if self.series[level].size]
+        return min(populated)[1] if populated else 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self.series)
+
+
+class MetricsHistoryStore:
+    """Per-server metric history for the monitoring API."""
+
+    def __init__(self, tiers: Sequence[HistoryTier] = DEFAULT_TIERS, fields: Sequence[str] = HISTORY_FIELDS):
+        self.tiers = tuple(tiers)
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        self._servers: Dict[int, ServerHistory] = {}
+
+    def record(self, server_id: int, sample: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        """Append one collector sample (the dict returned by ``sample_remote_status``)."""
+        values = {
+            "cpu_percent": float(sample.get("cpu_percent") or 0.0),
+            "memory_percent": float((sample.get("memory") or {}).get("percent") or 0.0),
+            "disk_percent": float((sample.get("disk") or {}).get("percent") or 0.0),
+        }
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        with self._lock:
+            history = self._servers.get(server_id)
+            if history is None:
+                history = self._servers[server_id] = ServerHistory(self.tiers, self.fields)
+            history.record(timestamp, values)
+
+    def query(
+        self,
+        server_id: int,
+        start: float,
+        end: float,
+        step: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Return column-oriented points in ``[start, end)``, averaged into ``step``-second buckets.
+
+        Without ``step`` the tier's own resolution is used, widened so that at
+        most ``MAX_QUERY_POINTS`` buckets are returned.
+        """
+        with self._lock:
+            history = self._servers.get(server_id)
+            if history is None:
+                return self._result(self.tiers[0], step or self.tiers[0].resolution, array("d"), {})
+            level = history.pick_level(start, step)
+            times, columns = history.series[level].window(start, end)
+        tier = self.tiers[level]
+        if step is None:
+            step = max(tier.resolution, math.ceil((end - start) / MAX_QUERY_POINTS))
+        if step > tier.resolution:
+            times, columns = self._rebucket(times, columns, start, float(step))
+        return self._result(tier, step, times, columns)
+
+    def _rebucket(
+        self,
+        times: array,
+        columns: Dict[str, array],
+        start: float,
+        step: float
+    ) -> Tuple[array, Dict[str, array]]:
+        # Bucket boundaries are found once (one bisect per bucket); each field is
+        # then averaged from its prefix sums, built and differenced at C level
+        bucket_times = array("d")
+        bounds = [0]
+        lo = 0
+        while lo < len(times):
+            bucket_start = start + math.floor((times[lo] - start) / step) * step
+            lo = bisect_left(times, bucket_start + step, lo)
+            bucket_times.append(bucket_start)
+            bounds.append(lo)
+        counts = list(map(sub, bounds[1:], bounds[:-1]))
+        bucket_columns = {}
+        for field, column in columns.items():
+            prefix = list(accumulate(column, initial=0.0))
+            # itemgetter returns a tuple for two or more indexes; with one there are no buckets
+            edges = itemgetter(*bounds)(prefix) if len(bounds) > 1 else ()
+            bucket_columns[field] = array("d", map(truediv, map(sub, edges[1:], edges[:-1]), counts))
+        return bucket_times, bucket_columns
+
+    def _result(self, tier: HistoryTier, step: float, times: array, columns: Dict[str, array]) -> Dict[str, Any]:
+        return {
+            "tier": tier.name,
+            "resolution": tier.resolution,
+            "step": step,
+            "timestamps": [round(value, 3) for value in times],
+            "series": {
+                field: [round(value, 2) for value in columns.get(field, ())]
+                for field in self.fields
+            },
+        }
+
+    def discard(self, server_id: int) -> None:
+        with self._lock:
+            self._servers.pop(server_id, None)
+
+    def retain(self, server_ids: Iterable[int]) -> None:
+        keep = set(server_ids)
+        with self._lock:
+            for server_id in [item for item in self._servers if item not in keep]:
+                del self._servers[server_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._servers.clear()
+
+    def nbytes(self, server_id: int) -> int:
+        with self._lock:
+            history = self._servers.get(server_id)
+            return history.nbytes if history is not None else 0
+
+
+_history = MetricsHistoryStore()
+
+
+def get_metrics_history() -> MetricsHistoryStore:
+    return _history
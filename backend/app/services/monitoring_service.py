@@ -6,6 +6,7 @@ Provides both local and remote monitoring capabilities.
 import psutil
 import logging
 from typing import List, Dict, Any, Optional
+from ..services.proc_sampler import PROC_SAMPLE_COMMAND, ConsumerKey, get_proc_sampler
 from ..services.ssh_service import SSHService
 
 logger = logging.getLogger(__name__)
@@ -14,9 +15,9 @@ logger = logging.getLogger(__name__)
 class MonitoringService:
     """Service for monitoring system status and managing processes."""
 
-    def __init__(self):
-        self.ssh_service = SSHService()
-        logger.info("MonitoringService initialized")
+    def __init__(self, ssh_service: Optional[SSHService] = None):
+        self.ssh_service = ssh_service or SSHService()
+        logger.debug("MonitoringService initialized")
 
     def get_status(self) -> Dict[str, Any]:
         """Get local system status including CPU, memory, and disk usage.
@@ -171,7 +172,7 @@ class MonitoringService:
                           server_name: Optional[str] = None) -> Dict[str, Any]:
         """Get remote server status via SSH.
 
-        Uses a single combined shell command to gather CPU, memory, and disk info.
+        Reads /proc counters in a single short remote command.
 
         Args:
             host: Remote server hostname or IP.
@@ -182,86 +183,68 @@ class MonitoringService:
             server_name: Optional server name for response.
 
         Returns:
-            Dict containing server info and system status.
+            Dict containing server info and system status; zeros if the server could not be sampled.
         """
         logger.info(f"Getting remote status for server {server_name} (ID: {server_id}) at {host}")
-
-        result = {
+        sample = self.sample_remote_status(host, username, password, port, server_id, server_name)
+        if sample is not None:
+            return sample
+        return self.empty_remote_status(host, server_id, server_name)
+
+    @staticmethod
+    def empty_remote_status(host: str, server_id: Optional[int] = None,
+                            server_name: Optional[str] = None) -> Dict[str, Any]:
+        """Zero-valued remote status used when a server cannot be sampled."""
+        return {
             "server_id": server_id,
             "server_name": server_name,
             "host": host,
             "cpu_percent": 0.0,
+            "cpu_cores": [],
+            "load_avg": {"1m": 0.0, "5m": 0.0, "15m": 0.0},
             "memory": {"total": 0, "available": 0, "percent": 0.0, "used": 0, "free": 0},
-            "disk": {"total": 0, "used": 0, "free": 0, "percent": 0.0}
+            "disk": {"total": 0, "used": 0, "free": 0, "percent": 0.0},
+            "disk_io": {},
+            "network": {},
+            "interval_seconds": None
         }
 
-        # Combined command to get all info in one SSH call
-        # Output format: CPU|MEM_TOTAL MEM_USED MEM_FREE MEM_AVAIL|DISK_TOTAL DISK_USED DISK_FREE DISK_PERCENT
-        combined_cmd = """
-echo "===CPU==="
-top -bn1 | grep 'Cpu(s)' | awk '{print $2}' | cut -d'%' -f1 || echo "0"
-echo "===MEM==="
-free -b | grep Mem | awk '{print $2,$3,$4,$7}'
-echo "===DISK==="
-df -B1 / | tail -1 | awk '{print $2,$3,$4,$5}'
-"""
+    def sample_remote_status(self, host: str, username: Optional[str], password: Optional[str],
+                             port: int = 22, server_id: Optional[int] = None,
+                             server_name: Optional[str] = None,
+                             rate_consumer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Sample remote server status via SSH.
 
-        try:
-            cmd_result = self.ssh_service.run_command(host, username, password, combined_cmd, port)
-            if cmd_result.exit_status == 0 and cmd_result.stdout.strip():
-                output = cmd_result.stdout.strip()
+        Reads /proc counters in a single short command (see ``PROC_SAMPLE_COMMAND``).
+        CPU, per-core CPU, disk IO and network rates are deltas against the
+        previous sample of the same server, or against the previous sample taken
+        for ``rate_consumer`` when a background sampler with its own schedule
+        passes one. Logs at DEBUG: the background samplers call this every few seconds.
 
-                # Parse CPU
-                try:
-                    cpu_section = output.split("===CPU===")[1].split("===MEM===")[0].strip()
-                    result["cpu_percent"] = float(cpu_section.split()[0])
-                except (ValueError, IndexError, KeyError):
-                    result["cpu_percent"] = 0.0
+        Returns:
+            Dict containing server info and system status, or None if the command failed.
+        """
+        logger.debug(f"Getting remote status for server {server_name} (ID: {server_id}) at {host}")
 
-                # Parse Memory
-                try:
-                    mem_section = output.split("===MEM===")[1].split("===DISK===")[0].strip()
-                    parts = mem_section.split()
-                    if len(parts) >= 4:
-                        total = int(parts[0])
-                        used = int(parts[1])
-                        free = int(parts[2])
-                        available = int(parts[3])
-                        percent = (used / total * 100) if total > 0 else 0
-                        result["memory"] = {
-                            "total": total,
-                            "available": available,
-                            "percent": round(percent, 1),
-                            "used": used,
-                            "free": free
-                        }
-                except (ValueError, IndexError, KeyError):
-                    pass
-
-                # Parse Disk
-                try:
-                    disk_section = output.split("===DISK===")[1].strip()
-                    parts = disk_section.split()
-                    if len(parts) >= 4:
-                        total = int(parts[0])
-                        used = int(parts[1])
-                        free = int(parts[2])
-                        percent = float(parts[3].rstrip('%'))
-                        result["disk"] = {
-                            "total": total,
-                            "used": used,
-                            "free": free,
-                            "percent": percent
-                        }
-                except (ValueError, IndexError, KeyError):
-                    pass
-
-                logger.info(f"Retrieved remote status for {server_name}: CPU={result['cpu_percent']}%, "
-                           f"Memory={result['memory']['percent']}%, Disk={result['disk']['percent']}%")
+        try:
+            cmd_result = self.ssh_service.run_command(host, username, password, PROC_SAMPLE_COMMAND, port)
+            if cmd_result.exit_status == 0 and cmd_result.stdout.strip():
+                if server_id is None:
+                    key = (host, port)
+                elif rate_consumer is not None:
+                    key = ConsumerKey(rate_consumer, server_id)
+                else:
+                    key = server_id
+                status = get_proc_sampler().sample(key, cmd_result.stdout)
+                result = {"server_id": server_id, "server_name": server_name, "host": host, **status}
+                logger.debug(f"Retrieved remote status for {server_name}: CPU={result['cpu_percent']}%, "
+                            f"Memory={result['memory']['percent']}%, Disk={result['disk']['percent']}%")
+                return result
+            logger.warning(f"Failed to get remote status for {server_name}: {cmd_result.error or cmd_result.stderr}")
         except Exception as e:
             logger.warning(f"Failed to get remote status for {server_name}: {e}")
 
-        return result
+        return None
 
     def get_remote_processes(self, host: str, username: Optional[str], password: Optional[str],
                              port: int = 22, limit: int = 50, sort_by: str = "cpu",
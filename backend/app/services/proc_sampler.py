@@ -0,0 +1,254 @@
+# backend/app/services/proc_sampler.py
+"""
+Remote resource sampling from /proc counters.
+
+One short remote command dumps /proc/stat, /proc/meminfo, /proc/diskstats,
+/proc/net/dev, /proc/loadavg and /proc/uptime (plus the whole block devices
+from /sys/block and a POSIX ``df`` of the root filesystem). CPU, disk IO and network rates are computed from the
+difference between two consecutive snapshots of the same server, so the
+remote side never has to sleep or run ``top``.
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+PROC_SAMPLE_COMMAND = (
+    "LC_ALL=C; export LC_ALL; "
+    "echo ===UPTIME===; cat /proc/uptime; "
+    "echo ===STAT===; cat /proc/stat; "
+    "echo ===MEMINFO===; cat /proc/meminfo; "
+    "echo ===DISKSTATS===; cat /proc/diskstats; "
+    "echo ===BLOCK===; ls /sys/block; "
+    "echo ===NETDEV===; cat /proc/net/dev; "
+    "echo ===LOADAVG===; cat /proc/loadavg; "
+    "echo ===DF===; df -P -B1 / | tail -1"
+)
+
+SECTOR_BYTES = 512
+# Virtual block devices that only add noise to per-device IO
+IGNORED_BLOCK_DEVICES = re.compile(r"^(loop|ram|zram|fd|sr)\d")
+IGNORED_NET_INTERFACES = {"lo"}
+
+
+@dataclass
+class ProcSnapshot:
+    uptime: float
+    cpu: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    memory: Dict[str, int] = field(default_factory=dict)
+    disks: Dict[str, Tuple[int, int, int, int, int]] = field(default_factory=dict)
+    network: Dict[str, Tuple[int, int, int, int]] = field(default_factory=dict)
+    load_avg: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    root_disk: Optional[Tuple[int, int, int, float]] = None
+
+
+def _sections(output: str) -> Dict[str, List[str]]:
+    sections: Dict[str, List[str]] = {}
+    current = None
+    for line in output.splitlines():
+        marker = re.fullmatch(r"===([A-Z]+)===", line.strip())
+        if marker:
+            current = sections.setdefault(marker.group(1), [])
+        elif current is not None and line.strip():
+            current.append(line)
+    return sections
+
+
+def parse_proc_snapshot(output: str) -> ProcSnapshot:
+    """Parse the output of ``PROC_SAMPLE_COMMAND``. Raises ValueError if /proc/stat is missing."""
+    sections = _sections(output)
+    if not sections.get("STAT") or not sections.get("UPTIME"):
+        raise ValueError("Remote output does not contain /proc/stat and /proc/uptime")
+    snapshot = ProcSnapshot(uptime=float(sections["UPTIME"][0].split()[0]))
+
+    for line in sections["STAT"]:
+        parts = line.split()
+        if not parts[0].startswith("cpu"):
+            continue
+        # user nice system idle iowait irq softirq steal; guest time is already inside user/nice
+        ticks = [int(value) for value in parts[1:9]]
+        idle = ticks[3] + (ticks[4] if len(ticks) > 4 else 0)
+        snapshot.cpu[parts[0]] = (sum(ticks), idle)
+
+    for line in sections.get("MEMINFO", []):
+        key, _, rest = line.partition(":")
+        values = rest.split()
+        if values:
+            snapshot.memory[key.strip()] = int(values[0]) * (1024 if len(values) > 1 else 1)
+
+    # Partitions repeat the IO of their disk; only whole devices (listed in /sys/block) are kept
+    whole_devices = {name for line in sections.get("BLOCK", []) for name in line.split()}
+    for line in sections.get("DISKSTATS", []):
+        parts = line.split()
+        if len(parts) < 14 or IGNORED_BLOCK_DEVICES.match(parts[2]):
+            continue
+        if whole_devices and parts[2] not in whole_devices:
+            continue
+        reads, sectors_read, writes, sectors_written, io_ms = (
+            int(parts[3]), int(parts[5]), int(parts[7]), int(parts[9]), int(parts[12])
+        )
+        if reads or writes:
+            snapshot.disks[parts[2]] = (reads, sectors_read, writes, sectors_written, io_ms)
+
+    for line in sections.get("NETDEV", []):
+        name, sep, rest = line.partition(":")
+        name = name.strip()
+        if not sep or name in IGNORED_NET_INTERFACES:
+            continue
+        values = rest.split()
+        if len(values) >= 10:
+            snapshot.network[name] = (int(values[0]), int(values[8]), int(values[1]), int(values[9]))
+
+    loadavg = sections.get("LOADAVG")
+    if loadavg:
+        first, five, fifteen = (float(value) for value in loadavg[0].split()[:3])
+        snapshot.load_avg = (first, five, fifteen)
+
+    df_lines = sections.get("DF")
+    if df_lines:
+        parts = df_lines[-1].split()
+        if len(parts) >= 5:
+            snapshot.root_disk = (int(parts[1]), int(parts[2]), int(parts[3]), float(parts[4].rstrip("%")))
+    return snapshot
+
+
+def _busy_percent(current: Tuple[int, int], previous: Optional[Tuple[int, int]]) -> float:
+    total, idle = current
+    if previous is not None:
+        total, idle = total - previous[0], idle - previous[1]
+    if total <= 0:
+        return 0.0
+    return round(max(0.0, min(100.0, (total - idle) * 100.0 / total)), 1)
+
+
+def _rate(current: int, previous: int, seconds: float) -> float:
+    return round(max(0, current - previous) / seconds, 1)
+
+
+def build_status(snapshot: ProcSnapshot, previous: Optional[ProcSnapshot]) -> Dict[str, Any]:
+    """Turn a snapshot (and the one before it, if any) into the remote status payload.
+
+    Without a previous snapshot CPU usage is the average since boot and
+    ``disk_io``/``network`` are empty, since rates need two samples.
+    """
+    if previous is not None and snapshot.uptime <= previous.uptime:
+        previous = None  # rebooted between samples; counters restarted
+    interval = snapshot.uptime - previous.uptime if previous is not None else None
+
+    cores = sorted((name for name in snapshot.cpu if name != "cpu"), key=lambda name: int(name[3:]))
+    prev_cpu = previous.cpu if previous is not None else {}
+
+    memory = snapshot.memory
+    total = memory.get("MemTotal", 0)
+    available = memory.get("MemAvailable", memory.get("MemFree", 0))
+    used = max(0, total - available)
+
+    disk = {"total": 0, "used": 0, "free": 0, "percent": 0.0}
+    if snapshot.root_disk is not None:
+        disk_total, disk_used, disk_free, disk_percent = snapshot.root_disk
+        disk = {"total": disk_total, "used": disk_used, "free": disk_free, "percent": disk_percent}
+
+    disk_io: Dict[str, Dict[str, float]] = {}
+    network: Dict[str, Dict[str, float]] = {}
+    if interval:
+        for name, counters in snapshot.disks.items():
+            before = previous.disks.get(name)
+            if before is None:
+                continue
+            disk_io[name] = {
+                "reads_per_sec": _rate(counters[0], before[0], interval),
+                "read_bytes_per_sec": _rate(counters[1] * SECTOR_BYTES, before[1] * SECTOR_BYTES, interval),
+                "writes_per_sec": _rate(counters[2], before[2], interval),
+                "write_bytes_per_sec": _rate(counters[3] * SECTOR_BYTES, before[3] * SECTOR_BYTES, interval),
+                "util_percent": round(min(100.0, max(0, counters[4] - before[4]) / (interval * 10)), 1),
+            }
+        for name, counters in snapshot.network.items():
+            before = previous.network.get(name)
+            if before is None:
+                continue
+            network[name] = {
+                "rx_bytes_per_sec": _rate(counters[0], before[0], interval),
+                "tx_bytes_per_sec": _rate(counters[1], before[1], interval),
+                "rx_packets_per_sec": _rate(counters[2], before[2], interval),
+                "tx_packets_per_sec": _rate(counters[3], before[3], interval),
+            }
+
+    return {
+        "cpu_percent": _busy_percent(snapshot.cpu.get("cpu", (0, 0)), prev_cpu.get("cpu")),
+        "cpu_cores": [_busy_percent(snapshot.cpu[name], prev_cpu.get(name)) for name in cores],
+        "load_avg": {"1m": snapshot.load_avg[0], "5m": snapshot.load_avg[1], "15m": snapshot.load_avg[2]},
+        "memory": {
+            "total": total,
+            "available": available,
+            "percent": round(used * 100.0 / total, 1) if total else 0.0,
+            "used": used,
+            "free": memory.get("MemFree", 0),
+        },
+        "disk": disk,
+        "disk_io": disk_io,
+        "network": network,
+        "interval_seconds": round(interval, 3) if interval else None,
+    }
+
+
+class ConsumerKey(NamedTuple):
+    """Key of a consumer that samples a server on its own schedule.
+
+    Rates are computed against that consumer's previous snapshot only, so
+    two samplers of one server do not shorten each other's intervals.
+    """
+    consumer: str
+    server_id: int
+
+
+class ProcDeltaSampler:
+    """Remembers the last snapshot per server so each new sample yields rates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous: Dict[Hashable, ProcSnapshot] = {}
+
+    def sample(self, key: Hashable, output: str) -> Dict[str, Any]:
+        snapshot = parse_proc_snapshot(output)
+        with self._lock:
+            previous = self._previous.get(key)
+            self._previous[key] = snapshot
+        return build_status(snapshot, previous)
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._previous.pop(key, None)
+
+    def forget_consumer(self, consumer: str) -> None:
+        with self._lock:
+            for key in [
+                item for item in self._previous
+                if isinstance(item, ConsumerKey) and item.consumer == consumer
+            ]:
+                del self._previous[key]
+
+    def retain(self, server_ids: Iterable[int]) -> None:
+        """Drop snapshots of servers not in ``server_ids``; consumer keys follow their server.
+
+        Keys that are not server ids (callers sampling a bare host) are left alone.
+        """
+        keep = set(server_ids)
+        with self._lock:
+            for key in [
+                item for item in self._previous
+                if _server_id(item) is not None and _server_id(item) not in keep
+            ]:
+                del self._previous[key]
+
+
+def _server_id(key: Hashable) -> Optional[int]:
+    if isinstance(key, ConsumerKey):
+        return key.server_id
+    return key if isinstance(key, int) else None
+
+
+_sampler = ProcDeltaSampler()
+
+
+def get_proc_sampler() -> ProcDeltaSampler:
+    return _sampler
@@ -0,0 +1,178 @@
+# backend/app/services/server_health.py
+"""
+服务器健康探测。
+
+后台线程按固定间隔并发检查所有服务器的 SSH 可达性（TCP 连接并读取 SSH 标识行，
+不做认证），据此更新 ``Server.status``，并驱动 SSHService 使用的主机熔断器：
+探测失败立即熔断，探测成功立即恢复。
+"""
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import SERVER_PROBE_CONCURRENCY, SERVER_PROBE_INTERVAL_SECONDS, SSH_PROBE_TIMEOUT
+from app.models.database import Server
+from app.services.ssh_service import HostCircuitBreaker, get_circuit_breaker, get_port_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProbeTarget:
+    server_id: int
+    host: str
+    ports: Tuple[int, ...]
+    configured_port: int
+    status: Optional[str]
+    ssh_port: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    server_id: int
+    host: str
+    reachable: bool
+    ssh_port: Optional[int] = None
+    error: Optional[str] = None
+
+
+def probe_ssh(host: str, ports: Tuple[int, ...], timeout: float) -> Tuple[Optional[int], Optional[str]]:
+    """
+    依次尝试端口，返回第一个发回 SSH 标识行的端口。
+
+    Returns:
+        (ssh_port, error)，不可达时 ssh_port 为 None
+    """
+    error = None
+    for port in ports:
+        try:
+            with socket.create_connection((host, port), timeout=timeout) as sock:
+                sock.settimeout(timeout)
+                banner = sock.recv(64)
+            if banner.startswith(b"SSH-"):
+                return port, None
+            error = f"port {port} did not answer with an SSH banner"
+        except OSError as exc:
+            error = f"port {port}: {exc}"
+    return None, error
+
+
+class ServerHealthProber:
+    """周期性并发探测所有服务器，更新在线状态和主机熔断器。"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float = SERVER_PROBE_INTERVAL_SECONDS,
+        concurrency: int = SERVER_PROBE_CONCURRENCY,
+        timeout: float = SSH_PROBE_TIMEOUT,
+        breaker: Optional[HostCircuitBreaker] = None,
+        probe: Callable[[str, Tuple[int, ...], float], Tuple[Optional[int], Optional[str]]] = probe_ssh
+    ):
+        self.session_factory = session_factory
+        self.interval = float(interval)
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = float(timeout)
+        self.breaker = breaker or get_circuit_breaker()
+        self._probe = probe
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="server-health-prober", daemon=True)
+        self._thread.start()
+        logger.info("Server health prober started: every %ss, %s concurrent probes", self.interval, self.concurrency)
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.timeout + 1)
+
+    def _run_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.probe_all()
+            except Exception:
+                logger.exception("Server health probe round failed")
+            self._stop.wait(self.interval)
+
+    def probe_all(self) -> List[ProbeResult]:
+        """执行一轮探测：并发探测、更新熔断器，并把状态变化和可用 SSH 端口写回数据库。"""
+        db = self.session_factory()
+        try:
+            targets = [self._target(server) for server in db.query(Server).all()]
+            if not targets:
+                return []
+            with ThreadPoolExecutor(
+                max_workers=min(self.concurrency, len(targets)),
+                thread_name_prefix="server-probe"
+            ) as executor:
+                results = list(executor.map(self._probe_target, targets))
+
+            changed: Dict[int, str] = {}
+            updates: Dict[int, Dict[Any, Any]] = {}
+            for target, result in zip(targets, results):
+                status = "online" if result.reachable else "offline"
+                if target.status != status:
+                    changed[target.server_id] = status
+                    updates.setdefault(target.server_id, {})[Server.status] = status
+                # 持久化可用端口，重启后 warm_ssh_port_cache 可据此预热端口缓存
+                if result.reachable and result.ssh_port != target.ssh_port:
+                    updates.setdefault(target.server_id, {})[Server.ssh_port] = result.ssh_port
+            for server_id, values in updates.items():
+                db.query(Server).filter(Server.id == server_id).update(values, synchronize_session=False)
+            if updates:
+                db.commit()
+            if changed:
+                logger.info("Server status changed by health probe: %s", changed)
+            return results
+        finally:
+            db.close()
+
+    def _target(self, server: Server) -> ProbeTarget:
+        configured = int(server.port or 22)
+        cached = get_port_cache().get(server.host, configured) or server.ssh_port
+        ports = [cached] if cached else []
+        for port in (22, configured):
+            if port not in ports:
+                ports.append(port)
+        return ProbeTarget(
+            server_id=server.id,
+            host=server.host,
+            ports=tuple(ports),
+            configured_port=configured,
+            status=server.status,
+            ssh_port=server.ssh_port,
+        )
+
+    def _probe_target(self, target: ProbeTarget) -> ProbeResult:
+        ssh_port, error = self._probe(target.host, target.ports, self.timeout)
+        if ssh_port is None:
+            self.breaker.trip(target.host)
+            return ProbeResult(target.server_id, target.host, False, error=error)
+        self.breaker.record_success(target.host)
+        get_port_cache().remember(target.host, target.configured_port, ssh_port)
+        return ProbeResult(target.server_id, target.host, True, ssh_port=ssh_port)
+
+
+_prober: Optional[ServerHealthProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_server_health_prober() -> ServerHealthProber:
+    """返回进程内共享的健康探测器，首次调用时创建。"""
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            from app.dependencies import SessionLocal
+            _prober = ServerHealthProber(SessionLocal)
+        return _prober
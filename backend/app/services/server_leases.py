@@ -0,0 +1,341 @@
+# backend/app/services/server_leases.py
+"""
+服务器租约管理。
+
+节点使用服务器期间在 server_leases 表中持有一条租约，调度和 is_busy 都只看
+未过期的租约，不再扫描运行中节点的 input_data。独占租约通过单条条件 INSERT
+获取，SQLite 串行化写入，因此多个执行、多个进程不会选中同一台空闲服务器。
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, exists, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import SERVER_LEASE_TTL_SECONDS
+from app.models.database import Server, ServerLease
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+LEASE_SCOPE_NODE = "node"
+LEASE_SCOPE_EXECUTION = "execution"
+
+
+class ServerLeaseManager:
+    """基于 server_leases 表的服务器占用管理。"""
+
+    def __init__(self, db: Session, ttl_seconds: float = SERVER_LEASE_TTL_SECONDS):
+        self.db = db
+        self.ttl = timedelta(seconds=ttl_seconds)
+
+    def _active(self, now):
+        return ServerLease.expires_at > now
+
+    def acquire(
+        self,
+        server: Server,
+        execution_id: int,
+        node_id: str,
+        exclusive: bool = True
+    ) -> bool:
+        """
+        为 (execution_id, node_id) 获取服务器租约。
+
+        独占租约仅在没有其他持有者的有效租约时成功；共享租约只记录占用，总是成功。
+        同一持有者重复获取视为续约。
+
+        Returns:
+            是否获得租约
+        """
+        try:
+            acquired = self._insert_lease(server, execution_id, node_id, exclusive, LEASE_SCOPE_NODE)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return acquired
+
+    def acquire_many(
+        self,
+        region: str,
+        count: int,
+        execution_id: int,
+        node_id: str,
+        rank: Optional[Callable[[List[Server]], List[Server]]] = None
+    ) -> Optional[List[Server]]:
+        """
+        在区域内一次性独占 ``count`` 台不同的可调度服务器（全有或全无）。
+
+        所有租约在同一事务中写入，任何一台被抢占即整体回滚，不会留下部分占用。
+        租约作用域为整个执行，节点成功后继续保留，供后续集群节点使用。
+        ``rank`` 给出候选的优先顺序，未提供时随机。
+
+        Returns:
+            获得的服务器列表；容量不足时返回 None
+        """
+        held = self.held_servers(execution_id, node_id)
+        if len(held) >= count:
+            return held[:count]
+        if held:
+            self.release(execution_id, node_id)
+
+        candidates = self.idle_servers(region)
+        if len(candidates) < count:
+            return None
+        if rank is not None:
+            candidates = rank(candidates)
+        else:
+            random.shuffle(candidates)
+        chosen: List[Server] = []
+        try:
+            for server in candidates:
+                if self._insert_lease(server, execution_id, node_id, True, LEASE_SCOPE_EXECUTION):
+                    chosen.append(server)
+                    if len(chosen) == count:
+                        break
+            if len(chosen) < count:
+                self.db.rollback()
+                return None
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return None
+        return chosen
+
+    def _insert_lease(
+        self,
+        server: Server,
+        execution_id: int,
+        node_id: str,
+        exclusive: bool,
+        scope: str
+    ) -> bool:
+        now = utc_now()
+        expires_at = now + self.ttl
+        holder = and_(
+            ServerLease.server_id == server.id,
+            ServerLease.execution_id == execution_id,
+            ServerLease.node_id == node_id,
+        )
+        renewed = self.db.execute(
+            update(ServerLease).where(holder).values(expires_at=expires_at)
+        ).rowcount
+        if renewed:
+            return True
+
+        values = select(
+            literal(server.id),
+            literal(execution_id),
+            literal(node_id),
+            literal(server.region or "私有云"),
+            literal(exclusive),
+            literal(scope),
+            literal(now, ServerLease.acquired_at.type),
+            literal(expires_at, ServerLease.expires_at.type),
+        )
+        if exclusive:
+            values = values.where(~exists().where(
+                ServerLease.server_id == server.id,
+                self._active(now),
+            ))
+        statement = insert(ServerLease).from_select(
+            ["server_id", "execution_id", "node_id", "region", "exclusive", "scope", "acquired_at", "expires_at"],
+            values
+        )
+        return bool(self.db.execute(statement).rowcount)
+
+    def acquire_idle(
+        self,
+        region: str,
+        execution_id: int,
+        node_id: str,
+        candidates: Optional[List[Server]] = None
+    ) -> Optional[Server]:
+        """
+        在区域内独占一台空闲的可调度服务器，依次尝试候选直到成功。
+
+        给出 ``candidates`` 时按其顺序尝试（调用方已排好优先级），否则随机尝试区域内空闲服务器。
+        区域内有整组预留在排队时不分配，空闲服务器留给队首，避免单台请求不断插队。
+        """
+        waiting = get_server_reservation_queue().waiting(region)
+        if waiting:
+            logger.info("Holding idle servers in region %s for %s queued cluster reservation(s)", region, waiting)
+            return None
+        if candidates is not None:
+            servers = list(candidates)
+        else:
+            servers = self.idle_servers(region)
+            random.shuffle(servers)
+        for server in servers:
+            if self.acquire(server, execution_id, node_id, exclusive=True):
+                return server
+        return None
+
+    def held_server(self, execution_id: int, node_id: str) -> Optional[Server]:
+        """返回该节点当前持有独占租约的服务器。"""
+        return self.db.query(Server).join(
+            ServerLease, ServerLease.server_id == Server.id
+        ).filter(
+            ServerLease.execution_id == execution_id,
+            ServerLease.node_id == node_id,
+            ServerLease.exclusive.is_(True),
+            self._active(utc_now()),
+        ).first()
+
+    def held_servers(self, execution_id: int, node_id: str) -> List[Server]:
+        """返回该节点持有独占租约的全部服务器。"""
+        return self.db.query(Server).join(
+            ServerLease, ServerLease.server_id == Server.id
+        ).filter(
+            ServerLease.execution_id == execution_id,
+            ServerLease.node_id == node_id,
+            ServerLease.exclusive.is_(True),
+            self._active(utc_now()),
+        ).order_by(ServerLease.id.asc()).all()
+
+    def release(
+        self,
+        execution_id: int,
+        node_id: Optional[str] = None,
+        keep_execution_scoped: bool = False
+    ) -> int:
+        """
+        释放节点（或整个执行）的租约，返回释放条数。
+
+        Args:
+            keep_execution_scoped: 为 True 时保留执行级租约（集群整组预留），仅释放节点级租约
+        """
+        query = self.db.query(ServerLease).filter(ServerLease.execution_id == execution_id)
+        if node_id is not None:
+            query = query.filter(ServerLease.node_id == node_id)
+        if keep_execution_scoped:
+            query = query.filter(ServerLease.scope != LEASE_SCOPE_EXECUTION)
+        released = query.delete(synchronize_session=False)
+        self.db.commit()
+        if released:
+            get_server_reservation_queue().notify()
+        return released
+
+    def heartbeat(self, execution_id: int) -> int:
+        """为执行持有的所有租约续约，返回续约条数。"""
+        renewed = self.db.execute(
+            update(ServerLease)
+            .where(ServerLease.execution_id == execution_id)
+            .values(expires_at=utc_now() + self.ttl)
+        ).rowcount
+        self.db.commit()
+        return renewed
+
+    def busy_server_ids(self, server_ids: Optional[Iterable[int]] = None) -> Set[int]:
+        """返回持有有效租约的服务器 ID 集合，可限定在给定服务器范围内。"""
+        query = self.db.query(ServerLease.server_id).filter(self._active(utc_now()))
+        if server_ids is not None:
+            query = query.filter(ServerLease.server_id.in_(list(server_ids)))
+        return {server_id for (server_id,) in query.distinct()}
+
+    def schedulable_count(self, region: str) -> int:
+        """返回区域内可调度服务器总数（不论是否空闲）。"""
+        return self.db.query(Server).filter(
+            Server.region == region,
+            Server.schedulable.is_(True),
+        ).count()
+
+    def idle_servers(self, region: str) -> List[Server]:
+        """返回区域内可调度且没有有效租约的服务器。"""
+        return self.db.query(Server).filter(
+            Server.region == region,
+            Server.schedulable.is_(True),
+            ~exists().where(
+                ServerLease.server_id == Server.id,
+                self._active(utc_now()),
+            ),
+        ).all()
+
+    def purge_expired(self) -> int:
+        """删除已过期的租约（执行进程异常退出后残留的记录）。"""
+        purged = self.db.query(ServerLease).filter(
+            ServerLease.expires_at <= utc_now()
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        if purged:
+            logger.info("Purged %s expired server leases", purged)
+        return purged
+
+
+class ServerReservationQueue:
+    """
+    整组预留的进程内公平队列。
+
+    同一区域的整组预留按到达顺序排队，只有队首尝试获取，避免小请求不断插队
+    让大集群永远凑不齐服务器；队首获取成功或放弃后，下一个请求立即重试。
+    有请求排队期间，``ServerLeaseManager.acquire_idle`` 不在该区域分配单台服务器。
+    租约释放时唤醒等待者，另按 ``poll_interval`` 轮询以感知其他进程释放或租约过期。
+    """
+
+    def __init__(self, poll_interval: float = 2.0):
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._waiting: Dict[str, Deque[object]] = {}
+
+    def reserve(
+        self,
+        db: Session,
+        region: str,
+        count: int,
+        execution_id: int,
+        node_id: str,
+        timeout: float,
+        should_stop: Optional[Callable[[], bool]] = None,
+        rank: Optional[Callable[[List[Server]], List[Server]]] = None
+    ) -> Optional[List[Server]]:
+        """排队等待并整组获取服务器；超时或 ``should_stop()`` 为真时返回 None。"""
+        leases = ServerLeaseManager(db)
+        ticket = object()
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            queue = self._waiting.setdefault(region, deque())
+            queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    is_head = self._waiting[region][0] is ticket
+                if is_head:
+                    servers = leases.acquire_many(region, count, execution_id, node_id, rank=rank)
+                    if servers is not None:
+                        return servers
+                if should_stop is not None and should_stop():
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                with self._cond:
+                    self._cond.wait(min(self.poll_interval, remaining))
+        finally:
+            with self._cond:
+                queue = self._waiting[region]
+                queue.remove(ticket)
+                if not queue:
+                    del self._waiting[region]
+                self._cond.notify_all()
+
+    def waiting(self, region: str) -> int:
+        with self._cond:
+            return len(self._waiting.get(region, ()))
+
+    def notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+
+_reservation_queue = ServerReservationQueue()
+
+
+def get_server_reservation_queue() -> ServerReservationQueue:
+    return _reservation_queue
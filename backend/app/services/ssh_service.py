@@ -1,13 +1,38 @@
 # backend/app/services/ssh_service.py
+import codecs
 import os
+import posixpath
+import socket
+import stat
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import logging
 
 import paramiko
 
+from app.config import (
+    OUTPUT_PREVIEW_CHARS,
+    SSH_CIRCUIT_FAILURE_THRESHOLD,
+    SSH_CIRCUIT_RESET_SECONDS,
+    SSH_POOL_IDLE_TTL,
+    SSH_POOL_MAX_PER_HOST,
+    SSH_PROBE_TIMEOUT,
+)
+
 logger = logging.getLogger(__name__)
 
+PoolKey = Tuple[str, int, Optional[str]]
+
+STREAM_CHUNK_SIZE = 32768
+STREAM_POLL_INTERVAL = 0.05
+# 退出码到达后最多再等这么久的 EOF，期间继续读取缓冲中的输出
+STREAM_DRAIN_SECONDS = 2.0
+
 
 @dataclass
 class SSHResult:
@@ -17,11 +42,443 @@ class SSHResult:
     stderr: str
     error: Optional[str] = None
     ssh_port: Optional[int] = None
+    log_path: Optional[str] = None
+    truncated: bool = False
+
+
+class OutputPreview:
+    """只保留输出开头和结尾各 ``limit`` 个字符的有界缓冲区。"""
+
+    def __init__(self, limit: int = OUTPUT_PREVIEW_CHARS):
+        self.limit = max(0, int(limit))
+        self.head = ""
+        self.tail = ""
+        self.total = 0
+
+    def feed(self, text: str) -> None:
+        self.total += len(text)
+        if len(self.head) < self.limit:
+            room = self.limit - len(self.head)
+            self.head += text[:room]
+            text = text[room:]
+        if text and self.limit:
+            self.tail = (self.tail + text)[-self.limit:]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.head) + len(self.tail)
+
+    def text(self) -> str:
+        if not self.truncated:
+            return self.head + self.tail
+        omitted = self.total - len(self.head) - len(self.tail)
+        return f"{self.head}\n... [{omitted} chars omitted] ...\n{self.tail}"
+
+
+@dataclass
+class SSHTarget:
+    """批量执行的目标主机，``key`` 由调用方自定义（如服务器 ID），随结果原样返回。"""
+    host: str
+    username: Optional[str] = None
+    password: Optional[str] = None
+    port: int = 22
+    key: Any = None
+
+
+class SSHPoolTimeout(Exception):
+    """等待连接池空闲连接超时。"""
+
+
+class SSHCircuitOpen(Exception):
+    """主机熔断中，未发起连接直接失败。"""
+
+
+@dataclass
+class _PooledConnection:
+    key: PoolKey
+    client: paramiko.SSHClient
+    password: Optional[str]
+    last_used: float
+
+
+class SSHConnectionPool:
+    """按 (host, port, username) 复用 paramiko 连接的进程级连接池。
+
+    连接以独占方式借出，归还后进入空闲列表；空闲超过 ``idle_ttl`` 秒的连接
+    会被关闭，复用前会先做健康检查。每个 key 同时打开的连接数不超过
+    ``max_per_host``，达到上限时调用方在超时时间内等待其他连接归还。
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = SSH_POOL_MAX_PER_HOST,
+        idle_ttl: float = SSH_POOL_IDLE_TTL,
+        connect_factory: Optional[Callable[..., paramiko.SSHClient]] = None
+    ):
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_ttl = float(idle_ttl)
+        self._connect_factory = connect_factory or self._open_client
+        self._cond = threading.Condition()
+        self._idle: Dict[PoolKey, List[_PooledConnection]] = {}
+        self._leased: Dict[PoolKey, int] = {}
+        self._checked_out: Dict[int, _PooledConnection] = {}
+
+    @staticmethod
+    def _open_client(
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        timeout: float
+    ) -> paramiko.SSHClient:
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            hostname=host,
+            port=port,
+            username=username,
+            password=password,
+            timeout=timeout
+        )
+        transport = client.get_transport()
+        if transport is not None:
+            transport.set_keepalive(30)
+        return client
+
+    @staticmethod
+    def _is_healthy(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close_quietly(client: paramiko.SSHClient) -> None:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    def _open_count(self, key: PoolKey) -> int:
+        return len(self._idle.get(key, [])) + self._leased.get(key, 0)
+
+    def _pop_expired_locked(self, now: float) -> List[paramiko.SSHClient]:
+        expired: List[paramiko.SSHClient] = []
+        for key in list(self._idle.keys()):
+            alive = []
+            for conn in self._idle[key]:
+                if now - conn.last_used > self.idle_ttl:
+                    expired.append(conn.client)
+                else:
+                    alive.append(conn)
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+        return expired
+
+    def acquire(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        timeout: float = 30
+    ) -> paramiko.SSHClient:
+        """借出一个可用连接；没有空闲连接时在上限内新建。"""
+        key: PoolKey = (host, int(port), username)
+        deadline = time.monotonic() + max(0.0, float(timeout))
+
+        while True:
+            candidate: Optional[_PooledConnection] = None
+            with self._cond:
+                stale = self._pop_expired_locked(time.monotonic())
+                while True:
+                    idle = self._idle.get(key)
+                    if idle:
+                        candidate = idle.pop()
+                        if not idle:
+                            del self._idle[key]
+                        break
+                    if self._open_count(key) < self.max_per_host:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        for client in stale:
+                            self._close_quietly(client)
+                        raise SSHPoolTimeout(
+                            f"No SSH connection available for {host}:{port} "
+                            f"(max_per_host={self.max_per_host})"
+                        )
+                    self._cond.wait(remaining)
+                self._leased[key] = self._leased.get(key, 0) + 1
+            for client in stale:
+                self._close_quietly(client)
+
+            if candidate is not None:
+                if candidate.password == password and self._is_healthy(candidate.client):
+                    with self._cond:
+                        self._checked_out[id(candidate.client)] = candidate
+                    return candidate.client
+                self._close_quietly(candidate.client)
+                self._forget_lease(key)
+                continue
+
+            try:
+                client = self._connect_factory(host, int(port), username, password, timeout)
+            except Exception:
+                self._forget_lease(key)
+                raise
+            with self._cond:
+                self._checked_out[id(client)] = _PooledConnection(
+                    key=key,
+                    client=client,
+                    password=password,
+                    last_used=time.monotonic()
+                )
+            return client
+
+    def _forget_lease(self, key: PoolKey) -> None:
+        with self._cond:
+            count = self._leased.get(key, 0) - 1
+            if count > 0:
+                self._leased[key] = count
+            else:
+                self._leased.pop(key, None)
+            self._cond.notify_all()
+
+    def release(self, client: paramiko.SSHClient, reusable: bool = True) -> None:
+        """归还连接；传输层已断开或 ``reusable=False`` 时直接关闭。"""
+        with self._cond:
+            conn = self._checked_out.pop(id(client), None)
+        if conn is None:
+            self._close_quietly(client)
+            return
+
+        transport = client.get_transport()
+        keep = reusable and transport is not None and transport.is_active()
+        with self._cond:
+            count = self._leased.get(conn.key, 0) - 1
+            if count > 0:
+                self._leased[conn.key] = count
+            else:
+                self._leased.pop(conn.key, None)
+            if keep:
+                conn.last_used = time.monotonic()
+                self._idle.setdefault(conn.key, []).append(conn)
+            self._cond.notify_all()
+        if not keep:
+            self._close_quietly(client)
+
+    def prune(self) -> int:
+        """关闭所有空闲超时的连接，返回关闭数量。"""
+        with self._cond:
+            expired = self._pop_expired_locked(time.monotonic())
+        for client in expired:
+            self._close_quietly(client)
+        return len(expired)
+
+    def close_all(self) -> None:
+        """关闭全部空闲连接；借出中的连接在归还时按正常流程处理。"""
+        with self._cond:
+            idle = [conn.client for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+            self._cond.notify_all()
+        for client in idle:
+            self._close_quietly(client)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "idle": sum(len(conns) for conns in self._idle.values()),
+                "in_use": sum(self._leased.values()),
+                "hosts": len(set(self._idle) | set(self._leased)),
+            }
+
+
+_default_pool = SSHConnectionPool()
+
+
+def get_connection_pool() -> SSHConnectionPool:
+    """返回进程内共享的 SSH 连接池。"""
+    return _default_pool
+
+
+class SSHPortCache:
+    """记录每个 (host, 配置端口) 实际可用的 SSH 端口，避免每次重新探测端口 22。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ports: Dict[Tuple[str, int], int] = {}
+
+    def get(self, host: str, port: int) -> Optional[int]:
+        with self._lock:
+            return self._ports.get((host, int(port)))
+
+    def remember(self, host: str, port: int, ssh_port: int) -> None:
+        with self._lock:
+            self._ports[(host, int(port))] = int(ssh_port)
+
+    def invalidate(self, host: str, port: int) -> None:
+        with self._lock:
+            self._ports.pop((host, int(port)), None)
+
+    def seed(self, entries: Iterable[Tuple[str, int, Optional[int]]]) -> None:
+        """从持久化的 ``Server.ssh_port`` 预热缓存。"""
+        with self._lock:
+            for host, port, ssh_port in entries:
+                if host and ssh_port:
+                    self._ports[(host, int(port or 22))] = int(ssh_port)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ports.clear()
+
+
+_port_cache = SSHPortCache()
+
+
+def get_port_cache() -> SSHPortCache:
+    """返回进程内共享的 SSH 端口解析缓存。"""
+    return _port_cache
+
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+@dataclass
+class _HostCircuit:
+    state: str = CIRCUIT_CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+
+
+class HostCircuitBreaker:
+    """
+    按主机的熔断器。
+
+    连续 ``failure_threshold`` 次网络层失败（连接超时、拒绝、不可达）后熔断，
+    熔断期间对该主机的连接请求立即失败；``reset_seconds`` 后放行一次试探连接
+    （半开），成功即恢复，失败则重新熔断。认证失败等非网络错误不计入。
+    半开试探的任何结果都会结束半开：主机已应答（含认证、协议错误）即恢复，
+    其余结果重新熔断。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = SSH_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = SSH_CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = float(reset_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._circuits: Dict[str, _HostCircuit] = {}
+
+    def allow(self, host: str) -> bool:
+        """是否允许向主机发起连接；熔断到期时转为半开并只放行一次试探。"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.state == CIRCUIT_CLOSED:
+                return True
+            if circuit.state == CIRCUIT_OPEN and self._clock() - circuit.opened_at >= self.reset_seconds:
+                circuit.state = CIRCUIT_HALF_OPEN
+                return True
+            return False
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.pop(host, None)
+        if circuit is not None and circuit.state != CIRCUIT_CLOSED:
+            logger.info("SSH circuit for %s closed", host)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _HostCircuit())
+            circuit.failures += 1
+            if circuit.state == CIRCUIT_HALF_OPEN or (
+                circuit.state == CIRCUIT_CLOSED and circuit.failures >= self.failure_threshold
+            ):
+                circuit.state = CIRCUIT_OPEN
+                circuit.opened_at = self._clock()
+                opened = True
+            else:
+                opened = False
+            failures = circuit.failures
+        if opened:
+            logger.warning("SSH circuit for %s opened after %s failures", host, failures)
+
+    def abort_trial(self, host: str) -> None:
+        """半开试探未得出结论（如等待连接池超时）时重新熔断，否则无影响。"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.state != CIRCUIT_HALF_OPEN:
+                return
+            circuit.state = CIRCUIT_OPEN
+            circuit.opened_at = self._clock()
+
+    def trip(self, host: str) -> None:
+        """立即熔断主机（健康探测确认不可达时使用）。"""
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _HostCircuit())
+            was_open = circuit.state == CIRCUIT_OPEN
+            circuit.state = CIRCUIT_OPEN
+            circuit.failures = max(circuit.failures, self.failure_threshold)
+            circuit.opened_at = self._clock()
+        if not was_open:
+            logger.warning("SSH circuit for %s opened by health probe", host)
+
+    def is_open(self, host: str) -> bool:
+        """主机是否处于熔断（含半开试探中）状态。"""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit is not None and circuit.state != CIRCUIT_CLOSED
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit.state if circuit is not None else CIRCUIT_CLOSED
+
+    def reset(self, host: Optional[str] = None) -> None:
+        """清除单个主机（或全部主机）的熔断状态。"""
+        with self._lock:
+            if host is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(host, None)
+
+
+_circuit_breaker = HostCircuitBreaker()
+
+
+def get_circuit_breaker() -> HostCircuitBreaker:
+    """返回进程内共享的主机熔断器。"""
+    return _circuit_breaker
 
 
 class SSHService:
     """SSH 服务，用于远程命令执行和文件传输"""
 
+    def __init__(
+        self,
+        pool: Optional[SSHConnectionPool] = None,
+        port_cache: Optional[SSHPortCache] = None,
+        probe_timeout: float = SSH_PROBE_TIMEOUT,
+        breaker: Optional[HostCircuitBreaker] = None
+    ):
+        self.pool = pool or get_connection_pool()
+        self.port_cache = port_cache or get_port_cache()
+        self.probe_timeout = probe_timeout
+        self.breaker = breaker or get_circuit_breaker()
+
     def _connect_client(
         self,
         host: str,
@@ -30,27 +487,215 @@ class SSHService:
         port: int = 22,
         timeout: int = 30
     ) -> tuple[paramiko.SSHClient | None, Optional[int], Optional[Exception]]:
-        ports_to_try = [22, port] if port != 22 else [22]
+        """从连接池借出客户端，使用完毕后必须调用 ``release_client`` 归还。
+
+        优先使用缓存中上次成功的端口；缓存缺失或失效时，先用短超时探测
+        候选端口（上次成功的端口、22 和配置端口）是否在监听，只对可达端口发起完整握手。
+        主机熔断时不发起连接，直接返回 ``SSHCircuitOpen``。
+        """
+        if not self.breaker.allow(host):
+            return None, None, SSHCircuitOpen(f"Host {host} is unreachable (circuit open), skipped connecting")
+        try:
+            client, ssh_port, error = self._connect_ports(host, username, password, port, timeout)
+        except BaseException:
+            self.breaker.abort_trial(host)
+            raise
+        # 认证失败、协议错误说明主机已应答，视为可达；网络层错误计入失败
+        if client is not None or isinstance(error, paramiko.SSHException):
+            self.breaker.record_success(host)
+        elif isinstance(error, OSError):
+            self.breaker.record_failure(host)
+        else:
+            self.breaker.abort_trial(host)
+        return client, ssh_port, error
+
+    def _connect_ports(
+        self,
+        host: str,
+        username: Optional[str],
+        password: Optional[str],
+        port: int,
+        timeout: int
+    ) -> tuple[paramiko.SSHClient | None, Optional[int], Optional[Exception]]:
         last_exc = None
+        cached_port = self.port_cache.get(host, port)
+        if cached_port is not None:
+            try:
+                client = self.pool.acquire(host, cached_port, username, password, timeout)
+                return client, cached_port, None
+            except SSHPoolTimeout as exc:
+                # 连接池已满不说明端口失效，不清缓存也不换端口重试
+                return None, None, exc
+            except Exception as exc:
+                logger.info("Cached SSH port %s for %s failed, re-probing: %s", cached_port, host, exc)
+                self.port_cache.invalidate(host, port)
+                last_exc = exc
+
+        # 上次成功的端口可能只是暂时失败，仍保留在候选中；每个候选都先短超时探测，
+        # 不对不监听的端口等待完整的连接超时
+        candidates = list(dict.fromkeys(
+            item for item in (cached_port, 22, port) if item is not None
+        ))
+        ports_to_try = []
+        for ssh_port in candidates:
+            probe_error = self._probe_port(host, ssh_port)
+            if probe_error is None:
+                ports_to_try.append(ssh_port)
+            else:
+                last_exc = probe_error
 
         for ssh_port in ports_to_try:
             try:
-                client = paramiko.SSHClient()
-                client.load_system_host_keys()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(
-                    hostname=host,
-                    port=ssh_port,
-                    username=username,
-                    password=password,
-                    timeout=timeout
-                )
+                client = self.pool.acquire(host, ssh_port, username, password, timeout)
+                self.port_cache.remember(host, port, ssh_port)
                 return client, ssh_port, None
+            except SSHPoolTimeout as exc:
+                return None, None, exc
             except Exception as exc:
                 last_exc = exc
 
         return None, None, last_exc
 
+    def _probe_port(self, host: str, port: int) -> Optional[Exception]:
+        try:
+            with socket.create_connection((host, port), timeout=self.probe_timeout):
+                return None
+        except OSError as exc:
+            return exc
+
+    def release_client(self, client: paramiko.SSHClient, reusable: bool = True) -> None:
+        """归还 ``_connect_client`` / ``client_session`` 借出的客户端。"""
+        self.pool.release(client, reusable=reusable)
+
+    @contextmanager
+    def client_session(
+        self,
+        host: str,
+        username: Optional[str],
+        password: Optional[str],
+        port: int = 22,
+        timeout: int = 30,
+        reusable: bool = True
+    ) -> Iterator[tuple[paramiko.SSHClient | None, Optional[int], Optional[Exception]]]:
+        """借出客户端供调用方自行打开通道（交互式会话、持续跟踪日志等），退出时归还。
+
+        产出 ``(client, ssh_port, error)``，连接失败时 ``client`` 为 None。
+        通道可能留下远端进程时传 ``reusable=False``，归还时直接关闭连接。
+        """
+        client, ssh_port, error = self._connect_client(host, username, password, port, timeout)
+        try:
+            yield client, ssh_port, error
+        finally:
+            if client is not None:
+                self.release_client(client, reusable=reusable)
+
+    def _exec(self, client: paramiko.SSHClient, command: str, timeout: int) -> tuple[int, str, str]:
+        stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
+        try:
+            out = stdout.read().decode('utf-8', errors='ignore')
+            err = stderr.read().decode('utf-8', errors='ignore')
+            exit_status = stdout.channel.recv_exit_status()
+            return exit_status, out, err
+        finally:
+            stdout.channel.close()
+
+    def _exec_stream(
+        self,
+        client: paramiko.SSHClient,
+        command: str,
+        timeout: int,
+        on_chunk: Callable[[str, str], None]
+    ) -> int:
+        """边执行边按块读取 stdout/stderr 并交给 ``on_chunk``，返回退出码。
+
+        ``timeout`` 与 ``_exec`` 一致，表示连续无输出的最长等待时间。
+        """
+        stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
+        channel = stdout.channel
+        decoders = {
+            "stdout": codecs.getincrementaldecoder("utf-8")(errors="ignore"),
+            "stderr": codecs.getincrementaldecoder("utf-8")(errors="ignore"),
+        }
+        readers = {"stdout": (channel.recv_ready, channel.recv), "stderr": (channel.recv_stderr_ready, channel.recv_stderr)}
+        last_activity = time.monotonic()
+        exited_at = None
+        try:
+            while True:
+                received = False
+                for stream, (ready, recv) in readers.items():
+                    if ready():
+                        data = recv(STREAM_CHUNK_SIZE)
+                        if data:
+                            received = True
+                            on_chunk(stream, decoders[stream].decode(data))
+                if received:
+                    last_activity = time.monotonic()
+                    continue
+                if channel.exit_status_ready():
+                    # 退出码到达时最后的输出可能仍在缓冲或传输中：两路都读空且收到 EOF 后才结束
+                    if exited_at is None:
+                        exited_at = time.monotonic()
+                    if channel.eof_received or time.monotonic() - exited_at > STREAM_DRAIN_SECONDS:
+                        break
+                elif timeout and time.monotonic() - last_activity > timeout:
+                    raise socket.timeout(f"No output for {timeout}s")
+                time.sleep(STREAM_POLL_INTERVAL)
+            for stream, decoder in decoders.items():
+                on_chunk(stream, decoder.decode(b"", final=True))
+            return channel.recv_exit_status()
+        finally:
+            channel.close()
+
+    def _ensure_remote_dir(self, sftp: paramiko.SFTPClient, remote_path: str) -> None:
+        remote_dir = os.path.dirname(remote_path).replace("\\", "/")
+        missing: List[str] = []
+        while remote_dir and remote_dir not in ("/", "."):
+            try:
+                if stat.S_ISDIR(sftp.stat(remote_dir).st_mode):
+                    break
+            except IOError:
+                missing.append(remote_dir)
+                remote_dir = posixpath.dirname(remote_dir)
+                continue
+            break
+        for directory in reversed(missing):
+            try:
+                sftp.mkdir(directory)
+            except IOError:
+                # 并发创建或权限问题：再次确认目录存在，否则抛出原始异常
+                if not stat.S_ISDIR(sftp.stat(directory).st_mode):
+                    raise
+
+    def _atomic_write(
+        self,
+        sftp: paramiko.SFTPClient,
+        remote_path: str,
+        content: Union[str, bytes],
+        mode: Optional[int] = None
+    ) -> None:
+        """先写入同目录临时文件再 rename 覆盖，避免读者看到写了一半的文件。"""
+        tmp_path = f"{remote_path}.tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            with sftp.file(tmp_path, "w") as remote_file:
+                remote_file.write(content)
+            if mode is not None:
+                sftp.chmod(tmp_path, stat.S_IMODE(mode))
+            try:
+                sftp.posix_rename(tmp_path, remote_path)
+            except IOError:
+                # 服务端不支持 posix-rename 扩展时退回 remove + rename
+                try:
+                    sftp.remove(remote_path)
+                except IOError:
+                    pass
+                sftp.rename(tmp_path, remote_path)
+        except Exception:
+            try:
+                sftp.remove(tmp_path)
+            except IOError:
+                pass
+            raise
+
     def run_command(
         self,
         host: str,
@@ -78,15 +723,128 @@ class SSHService:
             return SSHResult(exit_status=-1, stdout="", stderr="", error=str(error))
 
         try:
-            stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-            out = stdout.read().decode('utf-8', errors='ignore')
-            err = stderr.read().decode('utf-8', errors='ignore')
-            exit_status = stdout.channel.recv_exit_status()
+            exit_status, out, err = self._exec(client, command, timeout)
             return SSHResult(exit_status=exit_status, stdout=out, stderr=err, ssh_port=ssh_port)
         except Exception as exc:
             return SSHResult(exit_status=-1, stdout="", stderr="", error=str(exc), ssh_port=ssh_port)
         finally:
-            client.close()
+            self.release_client(client)
+
+    def run_command_stream(
+        self,
+        host: str,
+        username: Optional[str],
+        password: Optional[str],
+        command: str,
+        port: int = 22,
+        timeout: int = 30,
+        on_output: Optional[Callable[[str, str], None]] = None,
+        log_path: Optional[str] = None,
+        preview_limit: int = OUTPUT_PREVIEW_CHARS
+    ) -> SSHResult:
+        """以流式方式执行命令，内存中只保留有界的输出预览
+
+        Args:
+            host: 远程服务器的主机名或 IP 地址
+            username: SSH 用户名（可选）
+            password: SSH 密码（可选）
+            command: 要执行的命令
+            port: SSH 端口（默认 22，同时会尝试此端口作为备选）
+            timeout: 连续无输出的最长等待时间（秒）
+            on_output: 每收到一块输出时回调 ``on_output(stream, text)``，stream 为 'stdout' 或 'stderr'
+            log_path: 本地日志文件路径（可选），完整输出按接收顺序写入
+            preview_limit: stdout/stderr 各自保留的开头和结尾字符数
+
+        Returns:
+            SSHResult，stdout/stderr 为预览内容，truncated 表示预览是否有截断
+        """
+        client, ssh_port, error = self._connect_client(host, username, password, port, timeout)
+        if client is None:
+            return SSHResult(exit_status=-1, stdout="", stderr="", error=str(error))
+
+        previews = {"stdout": OutputPreview(preview_limit), "stderr": OutputPreview(preview_limit)}
+        log_file = None
+
+        def handle_chunk(stream: str, text: str) -> None:
+            if not text:
+                return
+            previews[stream].feed(text)
+            if log_file is not None:
+                log_file.write(text)
+            if on_output is not None:
+                on_output(stream, text)
+
+        exit_status, failure = -1, None
+        try:
+            if log_path:
+                os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+                log_file = open(log_path, "w", encoding="utf-8")
+            exit_status = self._exec_stream(client, command, timeout, handle_chunk)
+        except Exception as exc:
+            failure = str(exc)
+        finally:
+            if log_file is not None:
+                log_file.close()
+            self.release_client(client)
+
+        return SSHResult(
+            exit_status=exit_status,
+            stdout=previews["stdout"].text(),
+            stderr=previews["stderr"].text(),
+            error=failure,
+            ssh_port=ssh_port,
+            log_path=log_path if log_file is not None else None,
+            truncated=previews["stdout"].truncated or previews["stderr"].truncated
+        )
+
+    def run_on_many(
+        self,
+        targets: Iterable[SSHTarget],
+        command: str,
+        max_parallel: int = 8,
+        timeout: int = 30
+    ) -> Iterator[Tuple[SSHTarget, SSHResult]]:
+        """在多台主机上并发执行同一条命令，按完成顺序逐个产出结果
+
+        Args:
+            targets: 目标主机列表
+            command: 要执行的命令
+            max_parallel: 最大并发主机数
+            timeout: 每台主机各自的连接/无输出超时时间（秒）
+
+        Yields:
+            (SSHTarget, SSHResult)，先完成的主机先返回；单台主机失败只体现在它自己的结果中
+        """
+        targets = list(targets)
+        if not targets:
+            return
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(int(max_parallel), len(targets))),
+            thread_name_prefix="ssh-fanout"
+        )
+        try:
+            futures = {
+                executor.submit(
+                    self.run_command,
+                    host=target.host,
+                    username=target.username,
+                    password=target.password,
+                    command=command,
+                    port=target.port,
+                    timeout=timeout
+                ): target
+                for target in targets
+            }
+            for future in as_completed(futures):
+                target = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = SSHResult(exit_status=-1, stdout="", stderr="", error=str(exc))
+                yield target, result
+        finally:
+            # 调用方提前停止迭代时，不再启动尚未开始的主机
+            executor.shutdown(wait=False, cancel_futures=True)
 
     def upload_file(
         self,
@@ -119,16 +877,7 @@ class SSHService:
         sftp = None
         try:
             sftp = client.open_sftp()
-            remote_dir = os.path.dirname(remote_path).replace("\\", "/")
-            if remote_dir:
-                self.run_command(
-                    host=host,
-                    username=username,
-                    password=password,
-                    command=f"mkdir -p {self.quote(remote_dir)}",
-                    port=ssh_port or port,
-                    timeout=timeout
-                )
+            self._ensure_remote_dir(sftp, remote_path)
             sftp.put(local_path, remote_path)
             return {"status": "success", "ssh_port": ssh_port}
         except Exception as exc:
@@ -136,7 +885,7 @@ class SSHService:
         finally:
             if sftp is not None:
                 sftp.close()
-            client.close()
+            self.release_client(client)
 
     def download_file(
         self,
@@ -163,7 +912,7 @@ class SSHService:
         finally:
             if sftp is not None:
                 sftp.close()
-            client.close()
+            self.release_client(client)
 
     def read_file(
         self,
@@ -189,7 +938,7 @@ class SSHService:
         finally:
             if sftp is not None:
                 sftp.close()
-            client.close()
+            self.release_client(client)
 
     def write_file(
         self,
@@ -208,16 +957,7 @@ class SSHService:
         sftp = None
         try:
             sftp = client.open_sftp()
-            remote_dir = os.path.dirname(remote_path).replace("\\", "/")
-            if remote_dir:
-                self.run_command(
-                    host=host,
-                    username=username,
-                    password=password,
-                    command=f"mkdir -p {self.quote(remote_dir)}",
-                    port=ssh_port or port,
-                    timeout=timeout
-                )
+            self._ensure_remote_dir(sftp, remote_path)
             with sftp.file(remote_path, "w") as remote_file:
                 remote_file.write(content)
             return {"status": "success", "ssh_port": ssh_port}
@@ -226,7 +966,70 @@ class SSHService:
         finally:
             if sftp is not None:
                 sftp.close()
-            client.close()
+            self.release_client(client)
+
+    def edit_file(
+        self,
+        host: str,
+        username: Optional[str],
+        password: Optional[str],
+        remote_path: str,
+        transform: Callable[[str], str],
+        backup_path: Optional[str] = None,
+        port: int = 22,
+        timeout: int = 30
+    ) -> dict:
+        """在同一个 SFTP 会话中完成 读取 → 转换 → 备份 → 原子写入。
+
+        Args:
+            host: 远程服务器的主机名或 IP 地址
+            username: SSH 用户名（可选）
+            password: SSH 密码（可选）
+            remote_path: 要修改的远程文件路径
+            transform: 接收原内容并返回新内容的函数
+            backup_path: 备份路径（可选），写入前把原文件字节原样保存到此处
+            port: SSH 端口（默认 22，同时会尝试此端口作为备选）
+            timeout: 连接超时时间（秒）
+
+        Returns:
+            成功时包含 'content'、'changed' 和可选 'backup_path'；
+            失败时包含 'status': 'error' 和 'message'
+        """
+        client, ssh_port, error = self._connect_client(host, username, password, port, timeout)
+        if client is None:
+            return {"status": "error", "message": str(error)}
+
+        sftp = None
+        try:
+            sftp = client.open_sftp()
+            if stat.S_ISLNK(sftp.lstat(remote_path).st_mode):
+                # rename 会替换符号链接本身，因此改为编辑链接指向的真实文件
+                remote_path = sftp.normalize(remote_path)
+            mode = sftp.stat(remote_path).st_mode
+            with sftp.file(remote_path, "r") as remote_file:
+                raw = remote_file.read()
+            original = raw.decode("utf-8", errors="ignore")
+            updated = transform(original)
+
+            result = {
+                "status": "success",
+                "content": updated,
+                "changed": updated != original,
+                "ssh_port": ssh_port,
+            }
+            if backup_path:
+                # 备份写入读到的原始字节，非 UTF-8 文件也能原样恢复
+                self._atomic_write(sftp, backup_path, raw, mode)
+                result["backup_path"] = backup_path
+            if updated != original:
+                self._atomic_write(sftp, remote_path, updated, mode)
+            return result
+        except Exception as exc:
+            return {"status": "error", "message": str(exc)}
+        finally:
+            if sftp is not None:
+                sftp.close()
+            self.release_client(client)
 
     @staticmethod
     def quote(value: str) -> str:
@@ -24,6 +24,12 @@ CLUSTER_SERVER_NODE_TYPES: FrozenSet[str] = frozenset({
     "iotdb_cluster_stop",
 })
 
+# Nodes whose config_nodes/data_nodes define a cluster topology; in random
+# scheduling mode every host of that topology is reserved as one group.
+CLUSTER_TOPOLOGY_NODE_TYPES: FrozenSet[str] = frozenset({
+    "iotdb_cluster_deploy",
+})
+
 SERVER_REQUIRED_NODE_TYPES: FrozenSet[str] = (
     TOP_LEVEL_SERVER_NODE_TYPES | CLUSTER_SERVER_NODE_TYPES
 )
@@ -35,3 +41,7 @@ def node_requires_server(node_type: str) -> bool:
 
 def node_uses_top_level_server(node_type: str) -> bool:
     return node_type in TOP_LEVEL_SERVER_NODE_TYPES
+
+
+def node_reserves_cluster_servers(node_type: str) -> bool:
+    return node_type in CLUSTER_TOPOLOGY_NODE_TYPES
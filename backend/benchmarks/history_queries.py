@@ -0,0 +1,149 @@
+"""Benchmark of execution history queries on a large seeded database.
+
+Run from the backend directory:
+
+    python -m benchmarks.history_queries [--executions 100000] [--nodes-per-execution 50]
+
+Seeds a fresh database (the defaults give 100k executions and 5M node
+executions; seeding takes a few tens of seconds), then times the queries behind
+the execution list, the node list of one execution and workflow deletion.
+Each query is timed without the history indexes and again after the
+versioned migrations have created them.
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.database import Base, Execution, NodeExecution
+from app.models.migrations import run_migrations
+
+HISTORY_INDEXES = (
+    "ix_executions_created",
+    "ix_executions_status_created",
+    "ix_executions_workflow_created",
+    "ix_node_executions_execution",
+)
+STATUSES = ("completed", "completed", "completed", "failed", "stopped")
+WORKFLOWS = 200
+
+
+def seed(db_path: Path, executions: int, nodes_per_execution: int, seed_value: int = 7) -> None:
+    rng = random.Random(seed_value)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.executemany(
+        "INSERT INTO workflows (id, name, nodes, edges, variables) VALUES (?, ?, '[]', '[]', '{}')",
+        [(workflow_id, f"workflow-{workflow_id}") for workflow_id in range(1, WORKFLOWS + 1)]
+    )
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for first in range(1, executions + 1, 1000):
+        execution_rows = []
+        node_rows = []
+        for execution_id in range(first, min(first + 1000, executions + 1)):
+            created_at = (started + timedelta(minutes=execution_id)).isoformat()
+            execution_rows.append((
+                execution_id, rng.randint(1, WORKFLOWS), rng.choice(STATUSES), created_at, created_at
+            ))
+            for index in range(nodes_per_execution):
+                node_rows.append((execution_id, f"node-{index}", "shell", "success", created_at, created_at))
+        conn.executemany(
+            "INSERT INTO executions (id, workflow_id, status, trigger_type, created_at, started_at) "
+            "VALUES (?, ?, ?, 'manual', ?, ?)",
+            execution_rows
+        )
+        conn.executemany(
+            "INSERT INTO node_executions (execution_id, node_id, node_type, status, started_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            node_rows
+        )
+        conn.commit()
+    conn.close()
+
+
+def history_queries(executions: int) -> Dict[str, Callable[[Session], object]]:
+    middle = executions // 2
+
+    return {
+        "list latest 100": lambda db: db.query(Execution).order_by(
+            Execution.created_at.desc()
+        ).limit(100).all(),
+        "list failed 100": lambda db: db.query(Execution).filter(
+            Execution.status == "failed"
+        ).order_by(Execution.created_at.desc()).limit(100).all(),
+        "list workflow 100": lambda db: db.query(Execution).filter(
+            Execution.workflow_id == 42
+        ).order_by(Execution.created_at.desc()).limit(100).all(),
+        "nodes of execution": lambda db: db.query(NodeExecution).filter(
+            NodeExecution.execution_id == middle
+        ).order_by(NodeExecution.id.asc()).all(),
+        "workflow execution ids": lambda db: [
+            execution_id for (execution_id,) in db.query(Execution.id).filter(Execution.workflow_id == 42)
+        ],
+    }
+
+
+def time_queries(session_factory, queries: Dict[str, Callable[[Session], object]], repeat: int) -> Dict[str, float]:
+    timings = {}
+    for name, query in queries.items():
+        best = None
+        for _ in range(repeat):
+            db = session_factory()
+            try:
+                started = time.perf_counter()
+                query(db)
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executions", type=int, default=100_000)
+    parser.add_argument("--nodes-per-execution", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "history.db"
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for index_name in HISTORY_INDEXES:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
+
+        started = time.perf_counter()
+        seed(db_path, args.executions, args.nodes_per_execution)
+        print(
+            f"seeded {args.executions} executions, {args.executions * args.nodes_per_execution} node executions "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        queries = history_queries(args.executions)
+        before = time_queries(session_factory, queries, args.repeat)
+
+        started = time.perf_counter()
+        run_migrations(engine)
+        print(f"migrations (index build) took {time.perf_counter() - started:.1f}s")
+        after = time_queries(session_factory, queries, args.repeat)
+
+        rows: List[str] = [f"{'query':>24} {'no index ms':>12} {'indexed ms':>11}"]
+        for name in queries:
+            rows.append(f"{name:>24} {before[name] * 1000:>12.2f} {after[name] * 1000:>11.2f}")
+        print("\n".join(rows))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
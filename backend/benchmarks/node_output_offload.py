@@ -0,0 +1,98 @@
+"""Benchmark of node rows with large outputs, inline versus offloaded.
+
+Run from the backend directory:
+
+    python -m benchmarks.node_output_offload [--nodes 200] [--sqls 500] [--stdout-kb 256]
+
+Builds node results shaped like an IoTDB SQL batch (a ``results`` entry per
+statement plus the joined stdout), stores ``--nodes`` of them in a fresh
+database once inline and once after ``offload_output``, then reports the
+database size, the time to load every node row of the execution (what the
+execution page does) and the time to read one page of full output back from
+the artifact store by byte and by line range.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Execution, NodeExecution, Workflow
+from app.services.execution.artifacts import ArtifactStore, offload_output
+
+
+def node_result(index: int, sqls: int, stdout_kb: int) -> Dict[str, Any]:
+    row_text = f"node {index} | " + "value " * 10 + "\n"
+    stdout = row_text * (stdout_kb * 1024 // len(row_text))
+    results = [
+        {"exit_status": 0, "stdout": row_text * 20, "stderr": "", "error": None, "sql": f"select * from root.sg{n}"}
+        for n in range(sqls)
+    ]
+    return {"exit_status": 0, "stdout": stdout, "stderr": "", "results": results, "host": "127.0.0.1"}
+
+
+def run_profile(directory: Path, name: str, args, store: ArtifactStore) -> Dict[str, float]:
+    db_path = directory / f"{name}.db"
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = session_factory()
+    db.add(Workflow(id=1, name="bench", nodes=[], edges=[]))
+    db.add(Execution(id=1, workflow_id=1, status="completed"))
+    started = time.perf_counter()
+    for index in range(args.nodes):
+        output = node_result(index, args.sqls, args.stdout_kb)
+        if name == "offloaded":
+            output = offload_output(output, store)
+        db.add(NodeExecution(execution_id=1, node_id=f"n{index}", node_type="iotdb_sql", output_data=output))
+    db.commit()
+    write_seconds = time.perf_counter() - started
+    db.close()
+
+    db = session_factory()
+    started = time.perf_counter()
+    rows = db.query(NodeExecution).filter(NodeExecution.execution_id == 1).all()
+    load_seconds = time.perf_counter() - started
+    last_output = rows[-1].output_data
+    db.close()
+    engine.dispose()
+
+    result = {"db_mb": db_path.stat().st_size / 1024 / 1024, "write_s": write_seconds, "load_s": load_seconds}
+    if name == "offloaded":
+        digest = last_output["artifacts"]["stdout"]["sha256"]
+        started = time.perf_counter()
+        store.read_bytes(digest, last_output["artifacts"]["stdout"]["size"] // 2, 64 * 1024)
+        result["bytes_ms"] = (time.perf_counter() - started) * 1000
+        digest = last_output["artifacts"]["results"]["sha256"]
+        started = time.perf_counter()
+        store.read_lines(digest, args.sqls - 100, 100)
+        result["lines_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--sqls", type=int, default=500, help="results entries per node")
+    parser.add_argument("--stdout-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArtifactStore(Path(directory) / "artifacts")
+        print(f"{'profile':>10} {'db MB':>8} {'write s':>8} {'load s':>8} {'bytes ms':>9} {'lines ms':>9}")
+        for name in ("inline", "offloaded"):
+            result = run_profile(Path(directory), name, args, store)
+            print(
+                f"{name:>10} {result['db_mb']:>8.1f} {result['write_s']:>8.2f} {result['load_s']:>8.3f} "
+                f"{result.get('bytes_ms', float('nan')):>9.2f} {result.get('lines_ms', float('nan')):>9.2f}"
+            )
+        blob_mb = sum(path.stat().st_size for path in (Path(directory) / "artifacts").rglob("*")) / 1024 / 1024
+        print(f"artifact store: {blob_mb:.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Benchmark of concurrent node writes and API-style reads against SQLite.
+
+Run from the backend directory:
+
+    python -m benchmarks.sqlite_concurrency [--nodes 16] [--readers 4] [--seconds 5]
+
+Each profile gets a fresh database file. ``--nodes`` threads play running
+workflow nodes: insert a node_executions row, then record its result, over
+and over. ``--readers`` threads play the executions page: list the latest
+executions and load the node rows of one of them. Reported are node
+executions and read requests per second and the operations that failed
+with "database is locked".
+
+Profiles:
+
+- ``baseline``: the previous setup; one default-journal engine, every node
+  change committed by the node thread itself.
+- ``tuned``: WAL and the other connection pragmas, a pool sized to the node
+  threads, reads on a separate query-only pool and node changes through the
+  single NodeExecutionWriter.
+"""
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.dependencies import create_sqlite_engine
+from app.models.database import Execution, NodeExecution, Workflow
+from app.models.setup import init_db
+from app.services.execution.node_writer import NodeExecutionWriter
+from app.utils.time import utc_now
+
+EXECUTIONS = 20
+
+
+def seed(session_factory: Callable[[], Session]) -> None:
+    db = session_factory()
+    try:
+        db.add(Workflow(id=1, name="bench", nodes=[], edges=[]))
+        for execution_id in range(1, EXECUTIONS + 1):
+            db.add(Execution(id=execution_id, workflow_id=1, status="running", started_at=utc_now()))
+        db.commit()
+    finally:
+        db.close()
+
+
+def new_node(execution_id: int, index: int) -> NodeExecution:
+    return NodeExecution(
+        execution_id=execution_id,
+        node_id=f"node-{index}",
+        node_type="shell",
+        status="running",
+        started_at=utc_now(),
+        input_data={"command": "echo bench", "index": index},
+    )
+
+
+def finish(node_execution: NodeExecution) -> None:
+    node_execution.status = "success"
+    node_execution.finished_at = utc_now()
+    node_execution.duration = 0
+    node_execution.output_data = {"exit_status": 0, "stdout": "bench\n" * 20}
+
+
+def node_loop_direct(session_factory, stop: threading.Event, counters: Dict[str, int], lock, worker: int) -> None:
+    db = session_factory()
+    index = 0
+    try:
+        while not stop.is_set():
+            index += 1
+            try:
+                node_execution = new_node(worker % EXECUTIONS + 1, index)
+                db.add(node_execution)
+                db.commit()
+                finish(node_execution)
+                db.commit()
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    counters["locked"] += 1
+                continue
+            with lock:
+                counters["nodes"] += 1
+    finally:
+        db.close()
+
+
+def node_loop_writer(session_factory, writer: NodeExecutionWriter, stop, counters, lock, worker: int) -> None:
+    index = 0
+    while not stop.is_set():
+        index += 1
+        try:
+            node_execution = new_node(worker % EXECUTIONS + 1, index)
+            node_execution.id = writer.insert(session_factory, node_execution).result()
+            finish(node_execution)
+            writer.update(session_factory, node_execution, ("status", "finished_at", "duration", "output_data"))
+        except OperationalError:
+            with lock:
+                counters["locked"] += 1
+            continue
+        with lock:
+            counters["nodes"] += 1
+
+
+def reader_loop(session_factory, stop: threading.Event, counters: Dict[str, int], lock, worker: int) -> None:
+    request = 0
+    while not stop.is_set():
+        request += 1
+        db = session_factory()
+        try:
+            db.query(Execution).order_by(Execution.created_at.desc()).limit(100).all()
+            db.query(NodeExecution).filter(
+                NodeExecution.execution_id == (worker + request) % EXECUTIONS + 1
+            ).order_by(NodeExecution.id.desc()).limit(200).all()
+        except OperationalError:
+            with lock:
+                counters["locked"] += 1
+            continue
+        finally:
+            db.close()
+        with lock:
+            counters["reads"] += 1
+
+
+def run_profile(name: str, directory: Path, nodes: int, readers: int, seconds: float) -> Dict[str, float]:
+    url = f"sqlite:///{directory / f'{name}.db'}"
+    writer = None
+    if name == "baseline":
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        read_engine = engine
+    else:
+        engine = create_sqlite_engine(url, pool_size=nodes + 4)
+        read_engine = create_sqlite_engine(url, pool_size=readers, query_only=True)
+        writer = NodeExecutionWriter()
+    init_db(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    read_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    seed(session_factory)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    counters = {"nodes": 0, "reads": 0, "locked": 0}
+    threads = []
+    for worker in range(nodes):
+        if writer is None:
+            target, args = node_loop_direct, (session_factory, stop, counters, lock, worker)
+        else:
+            target, args = node_loop_writer, (session_factory, writer, stop, counters, lock, worker)
+        threads.append(threading.Thread(target=target, args=args, daemon=True))
+    for worker in range(readers):
+        threads.append(threading.Thread(
+            target=reader_loop, args=(read_session_factory, stop, counters, lock, worker), daemon=True
+        ))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if writer is not None:
+        writer.stop()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    read_engine.dispose()
+    return {
+        "nodes_per_sec": counters["nodes"] / elapsed,
+        "reads_per_sec": counters["reads"] / elapsed,
+        "locked": counters["locked"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=16, help="concurrent node threads")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reader threads")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':>10} {'nodes/s':>10} {'reads/s':>10} {'locked':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("baseline", "tuned"):
+            result = run_profile(name, Path(directory), args.nodes, args.readers, args.seconds)
+            print(
+                f"{name:>10} {result['nodes_per_sec']:>10.1f} "
+                f"{result['reads_per_sec']:>10.1f} {result['locked']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
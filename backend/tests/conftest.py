@@ -5,7 +5,8 @@ sys.path.insert(0, 'backend')
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from app.models.database import Base
-from app.dependencies import get_db
+from app.dependencies import get_db, get_read_db
+from app.services.execution.dispatcher import ExecutionDispatcher, get_execution_dispatcher
 from app.main import app
 
 # Use in-memory database with shared cache for all tests
@@ -45,7 +46,13 @@ def db_session():
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def dispatcher():
+    """An execution dispatcher that is never started, so submitted executions stay queued."""
+    return ExecutionDispatcher(TestSessionLocal)
+
+
+@pytest.fixture(scope="function")
+def client(db_session, dispatcher):
     """Create a test client with database override."""
     def override_get_db():
         try:
@@ -54,6 +61,8 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_execution_dispatcher] = lambda: dispatcher
     from fastapi.testclient import TestClient
     test_client = TestClient(app)
     yield test_client
@@ -0,0 +1,79 @@
+import gzip
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, "backend")
+
+from app.services.execution.artifacts import ArtifactNotFound, ArtifactStore, offload_output
+
+
+def test_range_reads_decompress_across_chunks(tmp_path):
+    store = ArtifactStore(tmp_path, chunk_bytes=64)
+    text = "".join(f"line {index:03d}\n" for index in range(100))
+    data = text.encode()
+    reference = store.put(data)
+
+    assert reference["size"] == len(data) and reference["lines"] == 100
+    assert store.put(data) == reference
+    blob = tmp_path / reference["sha256"][:2] / f"{reference['sha256']}.gz"
+    assert gzip.decompress(blob.read_bytes()) == data
+    assert len(store.index(reference["sha256"])["chunks"]) > 10
+
+    assert store.read_bytes(reference["sha256"], 60, 20) == data[60:80]
+    assert store.read_bytes(reference["sha256"], len(data) - 5) == data[-5:]
+    assert store.read_bytes(reference["sha256"], len(data)) == b""
+    for start in (0, 6, 7, 42, 99):
+        assert store.read_lines(reference["sha256"], start, 3) == "".join(text.splitlines(True)[start:start + 3]).encode()
+    assert store.read_lines(reference["sha256"], 98) == b"line 098\nline 099\n"
+    assert store.read_lines(reference["sha256"], 100) == b""
+
+
+def test_offload_output_keeps_previews_and_reads_fields_back(tmp_path):
+    store = ArtifactStore(tmp_path, chunk_bytes=256)
+    results = [{"sql": f"select {index}", "stdout": "row\n" * 20} for index in range(50)]
+    output = {"exit_status": 0, "stdout": "a" * 5000, "stderr": "", "results": results}
+
+    offloaded = offload_output(output, store, min_bytes=1000, preview_chars=300)
+
+    assert output["stdout"] == "a" * 5000 and output["results"] == results
+    assert offloaded["exit_status"] == 0 and offloaded["stderr"] == ""
+    assert offloaded["stdout"] == "a" * 300
+    assert offloaded["results"] == results[:len(offloaded["results"])] and 0 < len(offloaded["results"]) < 50
+    assert set(offloaded["artifacts"]) == {"stdout", "results"}
+    assert offloaded["artifacts"]["results"]["encoding"] == "jsonl"
+    assert offloaded["artifacts"]["results"]["lines"] == 50
+
+    content, meta = store.read_field(offloaded, "stdout", offset=4990)
+    assert content == b"a" * 10 and meta["size"] == 5000
+    content, _ = store.read_field(offloaded, "results", start_line=49, line_count=5)
+    assert content.decode().count("\n") == 1 and "select 49" in content.decode()
+    content, meta = store.read_field(offloaded, "stderr")
+    assert content == b"" and meta["encoding"] == "text"
+
+
+def test_sweep_removes_unreferenced_blobs_past_the_grace_period(tmp_path):
+    store = ArtifactStore(tmp_path, chunk_bytes=64, gc_grace_seconds=60)
+    kept, reused, recent, orphan = (
+        store.put(f"{name}\n".encode() * 50)["sha256"] for name in ("kept", "reused", "recent", "orphan")
+    )
+    leftover = tmp_path / orphan[:2] / "tmpabc123"
+    leftover.write_bytes(b"partial")
+    old = time.time() - 120
+    for path in tmp_path.rglob("*"):
+        if path.is_file() and recent not in path.name:
+            os.utime(path, (old, old))
+    # Reusing a stored blob restarts its grace period
+    store.put(b"reused\n" * 50)
+
+    assert store.sweep({kept}) == 1
+    with pytest.raises(ArtifactNotFound):
+        store.index(orphan)
+    assert not leftover.exists()
+    for digest in (kept, reused, recent):
+        assert store.index(digest)["lines"] == 50
+
+    assert store.sweep(set(), candidates=[kept, orphan]) == 1
+    assert not (tmp_path / kept[:2] / f"{kept}.gz").exists()
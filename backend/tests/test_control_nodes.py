@@ -1,5 +1,6 @@
 import sys
 import threading
+import time
 
 sys.path.insert(0, "backend")
 
@@ -282,6 +283,38 @@ class TestParallelNode:
         assert statuses["task-b"] == "success"
         session.close()
 
+    def test_parallel_node_limits_concurrent_branches(self, tmp_path, monkeypatch):
+        session_factory = make_engine(tmp_path)
+        session = session_factory()
+        branches = [f"client-{index}" for index in range(6)]
+        execution = create_workflow(
+            session,
+            nodes=[{"id": "par", "type": "parallel", "config": {"max_concurrent": 2}}]
+            + [{"id": node_id, "type": "report", "config": {}} for node_id in branches],
+            edges=[{"from": "par", "to": node_id} for node_id in branches],
+        )
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def fake_execute_node(self, node_type, config, context):
+            if node_type != "parallel":
+                with lock:
+                    state["running"] += 1
+                    state["peak"] = max(state["peak"], state["running"])
+                time.sleep(0.05)
+                with lock:
+                    state["running"] -= 1
+            return {"exit_status": 0}
+
+        monkeypatch.setattr(ExecutionEngine, "_execute_node", fake_execute_node)
+        ExecutionEngine(session, session_factory=session_factory).execute_workflow(execution.id)
+
+        session.expire_all()
+        statuses = get_node_statuses(session, execution.id)
+        assert all(statuses[node_id] == "success" for node_id in branches)
+        assert state["peak"] == 2
+        session.close()
+
 
 class TestAssertNode:
 
@@ -344,6 +377,43 @@ class TestConditionHandlerUnit:
         assert result["branch"] == "true"
 
 
+class TestWaitHandlerUnit:
+
+    def test_wait_node_returns_promptly_when_execution_is_stopped(self):
+        import time
+        from types import SimpleNamespace
+        from app.services.execution.cancellation import get_cancellation_registry
+        from app.services.execution.handlers.control import ControlHandlersMixin
+        from app.services.execution.utils import UtilsMixin
+        from app.services.ssh_service import SSHResult
+
+        class WaitEngine(ControlHandlersMixin, UtilsMixin):
+            pass
+
+        engine = WaitEngine()
+        engine._try_resolve_server = lambda config, context: SimpleNamespace(
+            host="10.0.0.1", username="root", password="pw", port=22
+        )
+        engine.ssh_service = SimpleNamespace(
+            run_command=lambda **kwargs: SSHResult(exit_status=1, stdout="", stderr="not yet")
+        )
+        registry = get_cancellation_registry()
+        threading.Timer(0.2, registry.cancel, args=(4242,)).start()
+
+        started = time.monotonic()
+        try:
+            result = engine._execute_wait_node(
+                {"condition": "test -f /tmp/ready", "timeout": 60, "interval": 30, "_execution_id": 4242},
+                {},
+            )
+        finally:
+            registry.discard(4242)
+
+        assert time.monotonic() - started < 1
+        assert result["stopped"] is True
+        assert result["wait_attempts"] == 1
+
+
 class TestEdgeLabelTracking:
 
     def test_build_execution_graph_returns_edge_labels(self, tmp_path):
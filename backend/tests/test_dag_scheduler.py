@@ -0,0 +1,146 @@
+import gc
+import sys
+import time
+
+sys.path.insert(0, "backend")
+
+from app.services.execution.scheduler import (
+    BRANCH_NOT_SELECTED_REASON,
+    UPSTREAM_FAILED_REASON,
+    DagScheduler,
+)
+
+
+def build(node_ids, edges):
+    parents = {node_id: [] for node_id in node_ids}
+    children = {node_id: [] for node_id in node_ids}
+    for from_id, to_id in edges:
+        parents[to_id].append(from_id)
+        children[from_id].append(to_id)
+    return DagScheduler(list(node_ids), parents, children)
+
+
+def test_ready_nodes_follow_node_order_and_wait_for_all_parents():
+    scheduler = build(["b", "a", "join"], [("a", "join"), ("b", "join")])
+
+    assert scheduler.pop_ready() == ["b", "a"]
+    scheduler.complete("a", "success")
+    assert scheduler.pop_ready() == []
+    scheduler.complete("b", "success")
+    assert scheduler.pop_ready() == ["join"]
+
+
+def test_failure_skips_all_descendants_in_one_walk():
+    scheduler = build(
+        ["root", "other", "mid", "leaf"],
+        [("root", "mid"), ("mid", "leaf"), ("other", "leaf")],
+    )
+    scheduler.pop_ready()
+
+    skipped = scheduler.complete("root", "failed")
+
+    assert {item.node_id for item in skipped} == {"mid", "leaf"}
+    assert all(item.blocking and item.reason == UPSTREAM_FAILED_REASON for item in skipped)
+    assert scheduler.statuses["leaf"] == "skipped"
+    assert scheduler.complete("other", "success") == []
+    assert scheduler.pop_ready() == []
+
+
+def test_unselected_condition_branch_is_a_control_flow_skip():
+    scheduler = build(
+        ["cond", "then", "then-next", "else"],
+        [("cond", "then"), ("then", "then-next"), ("cond", "else")],
+    )
+    scheduler.pop_ready()
+
+    skipped = scheduler.complete("cond", "success", skip_children=["then"], skip_reason="took false")
+
+    assert [(item.node_id, item.reason, item.blocking) for item in skipped] == [
+        ("then", "took false", False),
+        ("then-next", BRANCH_NOT_SELECTED_REASON, False),
+    ]
+    assert scheduler.pop_ready() == ["else"]
+
+
+def test_loop_body_is_requeued_until_iterations_are_exhausted():
+    scheduler = build(["loop", "body", "after"], [("loop", "body"), ("body", "after")])
+    runs = []
+
+    ready = scheduler.pop_ready()
+    while ready:
+        for node_id in ready:
+            runs.append(node_id)
+            scheduler.complete(node_id, "success")
+            if node_id == "loop":
+                scheduler.start_loop("loop", 2)
+        scheduler.advance_loops()
+        ready = scheduler.pop_ready()
+
+    assert runs == ["loop", "body", "after", "body", "after"]
+    assert scheduler.pop_ready() == []
+    assert not scheduler.pending
+
+
+def test_cycle_leaves_nodes_pending_for_the_caller_to_skip():
+    scheduler = build(["start", "a", "b"], [("start", "a"), ("a", "b"), ("b", "a")])
+
+    assert scheduler.pop_ready() == ["start"]
+    scheduler.complete("start", "success")
+    assert scheduler.pop_ready() == []
+
+    skipped = scheduler.skip_pending("cycle")
+    assert [item.node_id for item in skipped] == ["a", "b"]
+
+
+def test_scheduling_cost_grows_linearly_with_node_count():
+    def run(node_count):
+        node_ids = [f"n{index}" for index in range(node_count)]
+        edges = [(node_ids[index - 1], node_ids[index]) for index in range(1, node_count)]
+        edges += [(node_ids[index - 2], node_ids[index]) for index in range(2, node_count)]
+        scheduler = build(node_ids, edges)
+        # keep collector pauses from the rest of the suite out of the timing
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            ready = scheduler.pop_ready()
+            while ready:
+                for node_id in ready:
+                    scheduler.complete(node_id, "success")
+                ready = scheduler.pop_ready()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        assert len(scheduler.statuses) == node_count
+        return elapsed
+
+    run(200)
+    small = min(run(1000) for _ in range(3))
+    large = min(run(4000) for _ in range(3))
+
+    # 4x nodes should cost about 4x time; the old rescanning loop was ~16x
+    assert large < small * 10
+
+
+def test_parallel_scope_admits_limited_branches_and_releases_on_finish():
+    scheduler = build(
+        ["par", "a", "a2", "b", "c", "join"],
+        [("par", "a"), ("a", "a2"), ("par", "b"), ("par", "c"), ("a2", "join"), ("b", "join"), ("c", "join")],
+    )
+    scheduler.add_parallel_scope("par", 2)
+
+    assert scheduler.pop_ready() == ["par"]
+    scheduler.complete("par", "success")
+    assert scheduler.pop_ready() == ["a", "b"]
+
+    scheduler.complete("a", "success")
+    # branch a is still running a2, so c keeps waiting
+    assert scheduler.pop_ready() == ["a2"]
+    scheduler.complete("b", "failed")
+    assert scheduler.pop_ready() == ["c"]
+
+    scheduler.complete("a2", "success")
+    scheduler.complete("c", "success")
+    assert scheduler.pop_ready() == []
+    assert scheduler.statuses["join"] == "skipped"
+    assert not scheduler.pending
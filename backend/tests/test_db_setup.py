@@ -194,3 +194,91 @@ class TestDatabaseSetup:
         row = conn.execute("SELECT name, host, tags, region FROM servers").fetchone()
         conn.close()
         assert row == ("legacy-server", "127.0.0.1", None, "私有云")
+
+    def test_sqlite_engine_applies_performance_pragmas(self, tmp_path):
+        """Verify that tuned engines run in WAL mode and read engines reject writes."""
+        from sqlalchemy import text
+        from sqlalchemy.exc import OperationalError
+        from app.config import DB_BUSY_TIMEOUT_MS
+        from app.dependencies import create_sqlite_engine
+
+        test_db_url = f"sqlite:///{tmp_path / 'tuned.db'}"
+        write_engine = create_sqlite_engine(test_db_url, pool_size=2)
+        read_engine = create_sqlite_engine(test_db_url, pool_size=2, query_only=True)
+        init_db(write_engine)
+
+        with write_engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == DB_BUSY_TIMEOUT_MS
+            conn.execute(text("INSERT INTO workflows (name) VALUES ('wal-test')"))
+            conn.commit()
+
+        with read_engine.connect() as conn:
+            assert conn.execute(text("SELECT name FROM workflows")).scalar() == "wal-test"
+            with pytest.raises(OperationalError):
+                conn.execute(text("DELETE FROM workflows"))
+
+    def test_get_read_db_uses_the_query_only_read_engine(self, tmp_path, monkeypatch):
+        """Verify that get_read_db sessions run in WAL mode with query_only and reject writes."""
+        from sqlalchemy import text
+        from sqlalchemy.exc import OperationalError
+        from sqlalchemy.orm import sessionmaker
+        from app import dependencies
+        from app.models.database import Workflow
+
+        test_db_url = f"sqlite:///{tmp_path / 'read.db'}"
+        write_engine = dependencies.create_sqlite_engine(test_db_url, pool_size=1)
+        init_db(write_engine)
+        with write_engine.connect() as conn:
+            conn.execute(text("INSERT INTO workflows (name) VALUES ('readable')"))
+            conn.commit()
+        monkeypatch.setattr(
+            dependencies, "ReadSessionLocal",
+            sessionmaker(autocommit=False, autoflush=False, bind=dependencies.create_read_engine(test_db_url))
+        )
+
+        sessions = dependencies.get_read_db()
+        db = next(sessions)
+        try:
+            assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert db.execute(text("PRAGMA query_only")).scalar() == 1
+            assert db.query(Workflow.name).scalar() == "readable"
+            db.add(Workflow(name="written"))
+            with pytest.raises(OperationalError, match="readonly"):
+                db.commit()
+        finally:
+            sessions.close()
+
+        with write_engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM workflows")).scalar() == 1
+
+    def test_init_db_runs_versioned_migrations_once(self, tmp_path):
+        """Verify that migrations add history indexes to an existing database and are recorded."""
+        from app.models.migrations import MIGRATIONS, applied_versions, run_migrations
+
+        test_db_path = tmp_path / "history.db"
+        conn = sqlite3.connect(test_db_path)
+        conn.execute(
+            """
+            CREATE TABLE executions (
+                id INTEGER PRIMARY KEY,
+                workflow_id INTEGER NOT NULL,
+                status VARCHAR(20),
+                created_at DATETIME
+            )
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        test_engine = create_engine(f"sqlite:///{test_db_path}", connect_args={"check_same_thread": False})
+        init_db(test_engine)
+
+        inspector = inspect(test_engine)
+        execution_indexes = {index["name"] for index in inspector.get_indexes("executions")}
+        assert {"ix_executions_status_created", "ix_executions_workflow_created"}.issubset(execution_indexes)
+        node_indexes = {index["name"]: index["column_names"] for index in inspector.get_indexes("node_executions")}
+        assert node_indexes["ix_node_executions_execution"] == ["execution_id", "id"]
+        assert applied_versions(test_engine) == {migration.version for migration in MIGRATIONS}
+        assert run_migrations(test_engine) == []
@@ -0,0 +1,117 @@
+import sys
+import threading
+import time
+
+sys.path.insert(0, "backend")
+
+from app.services.execution.dispatcher import ExecutionDispatcher
+
+
+class RecordingEngine:
+    """Stands in for ExecutionEngine; each execution runs one node on the shared executor."""
+
+    def __init__(self, log, gate, lock, state):
+        self.log = log
+        self.gate = gate
+        self.lock = lock
+        self.state = state
+
+    def execute_workflow(self, execution_id, node_executor=None):
+        with self.lock:
+            self.state["running"] += 1
+            self.state["peak"] = max(self.state["peak"], self.state["running"])
+            self.log.append(execution_id)
+        try:
+            node_executor.submit(self.gate.wait, 5).result()
+        finally:
+            with self.lock:
+                self.state["running"] -= 1
+
+
+def make_dispatcher(max_concurrent, gate):
+    log, lock, state = [], threading.Lock(), {"running": 0, "peak": 0}
+    dispatcher = ExecutionDispatcher(
+        session_factory=lambda: type("FakeSession", (), {"close": lambda self: None})(),
+        max_concurrent=max_concurrent,
+        node_concurrency=4,
+        engine_factory=lambda db, session_factory: RecordingEngine(log, gate, lock, state),
+    )
+    return dispatcher, log, state
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_running_executions_never_exceed_the_concurrency_limit():
+    gate = threading.Event()
+    dispatcher, log, state = make_dispatcher(max_concurrent=2, gate=gate)
+    dispatcher.start()
+    try:
+        for execution_id in range(1, 7):
+            dispatcher.submit(execution_id)
+
+        assert wait_until(lambda: dispatcher.stats()["running"] == 2)
+        stats = dispatcher.stats()
+        assert stats["queued"] == 4
+        assert stats["active_nodes"] == 2
+
+        gate.set()
+        assert wait_until(lambda: len(log) == 6 and dispatcher.stats()["running"] == 0)
+        assert state["peak"] == 2
+        assert dispatcher.stats()["avg_wait_seconds"] >= 0
+    finally:
+        gate.set()
+        dispatcher.shutdown()
+
+
+def test_queue_orders_by_priority_then_submission():
+    gate = threading.Event()
+    dispatcher, log, _ = make_dispatcher(max_concurrent=1, gate=gate)
+    for execution_id, priority in [(1, 0), (2, 0), (3, 5), (4, 0), (5, 5)]:
+        dispatcher.submit(execution_id, priority=priority)
+    dispatcher.submit(2)
+
+    assert dispatcher.stats()["queued_execution_ids"] == [3, 5, 1, 2, 4]
+    assert dispatcher.discard(4) is True
+    assert dispatcher.discard(4) is False
+
+    gate.set()
+    dispatcher.start()
+    try:
+        assert wait_until(lambda: len(log) == 4)
+        assert log == [3, 5, 1, 2]
+    finally:
+        dispatcher.shutdown()
+
+
+def test_waiting_work_does_not_hold_a_node_worker():
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.execution.dispatcher import SharedNodeExecutor
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    wait_pool = ThreadPoolExecutor(max_workers=1)
+    executor = SharedNodeExecutor(pool, wait_pool)
+    servers_free = threading.Event()
+    try:
+        gang = executor.submit_after(lambda: servers_free.wait(5) and "servers", lambda servers: f"ran on {servers}")
+        assert wait_until(lambda: executor.waiting == 1)
+        # the only node worker stays free for other nodes while the gang waits
+        assert executor.submit(lambda: "other node").result(timeout=1) == "other node"
+        assert not gang.cancel()
+
+        servers_free.set()
+        assert gang.result(timeout=5) == "ran on servers"
+        assert executor.waiting == 0
+
+        failed = executor.submit_after(lambda: 1 / 0, lambda _: "never")
+        assert isinstance(failed.exception(timeout=5), ZeroDivisionError)
+    finally:
+        servers_free.set()
+        pool.shutdown()
+        wait_pool.shutdown()
@@ -40,6 +40,17 @@ class FakeClusterSSH:
         })
         return {"status": "success", "ssh_port": port}
 
+    def edit_file(self, host, username, password, remote_path, transform, backup_path=None, port=22, timeout=30):
+        read_result = self.read_file(host, username, password, remote_path, port, timeout)
+        content = transform(read_result["content"])
+        self.writes.append({
+            "host": host,
+            "remote_path": remote_path,
+            "content": content,
+            "backup_path": backup_path,
+        })
+        return {"status": "success", "content": content, "changed": True, "ssh_port": port}
+
 
 def test_cluster_deploy_deploys_and_writes_role_configs(db_session):
     db_session.add_all([
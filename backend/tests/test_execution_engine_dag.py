@@ -93,6 +93,105 @@ def test_dag_join_waits_for_all_upstreams_and_runs_roots_in_parallel(tmp_path, m
     session.close()
 
 
+
+def test_execution_publishes_node_transitions_and_output_to_event_bus(tmp_path, monkeypatch):
+    from app.services.execution.events import get_event_bus
+
+    session_factory = make_engine(tmp_path)
+    session = session_factory()
+    execution = create_workflow(
+        session,
+        nodes=[
+            {"id": "first", "type": "report", "config": {}},
+            {"id": "second", "type": "report", "config": {}},
+        ],
+        edges=[{"from": "first", "to": "second"}],
+    )
+    bus = get_event_bus()
+    bus.discard(execution.id)
+
+    def fake_execute_node(self, node_type, config, context):
+        publish = self._output_publisher(config)
+        publish("stdout", f"hello from {config['_node_id']}\n")
+        return {"exit_status": 0 if config["_node_id"] == "first" else 1}
+
+    monkeypatch.setattr(ExecutionEngine, "_execute_node", fake_execute_node)
+    ExecutionEngine(session, session_factory=session_factory).execute_workflow(execution.id)
+
+    stream = bus.get(execution.id)
+    events, gap = stream.since(0)
+    assert stream.closed and not gap
+    assert [event.seq for event in events] == list(range(1, len(events) + 1))
+    assert [(event.type, event.data.get("node_id"), event.data["status"] if "status" in event.data else None)
+            for event in events] == [
+        ("execution", None, "running"),
+        ("node", "first", "running"),
+        ("output", "first", None),
+        ("node", "first", "success"),
+        ("node", "second", "running"),
+        ("output", "second", None),
+        ("node", "second", "failed"),
+        ("execution", None, "failed"),
+    ]
+    assert events[2].data["text"] == "hello from first\n"
+    # node events stay small: no input/output blobs
+    assert "input_data" not in events[1].data and "output_data" not in events[3].data
+    bus.discard(execution.id)
+    session.close()
+
+
+
+def test_live_workflow_state_is_checkpointed_while_running(tmp_path, monkeypatch):
+    from app.services.execution import engine as engine_module
+    from app.services.execution.workflow_state import get_workflow_states
+
+    session_factory = make_engine(tmp_path)
+    session = session_factory()
+    execution = create_workflow(
+        session,
+        nodes=[
+            {"id": "deploy", "type": "report", "config": {}},
+            {"id": "check-a", "type": "report", "config": {}},
+            {"id": "check-b", "type": "report", "config": {}},
+        ],
+        edges=[{"from": "deploy", "to": "check-a"}, {"from": "deploy", "to": "check-b"}],
+    )
+    monkeypatch.setattr(engine_module, "WORKFLOW_STATE_CHECKPOINT_SECONDS", 0)
+    seen = {}
+    checked = threading.Event()
+
+    def fake_execute_node(self, node_type, config, context):
+        if config["_node_id"] == "check-b":
+            # finishing first would trigger another checkpoint
+            checked.wait(5)
+        if config["_node_id"] == "check-a":
+            live = get_workflow_states().get(config["_execution_id"]).snapshot()
+            seen["live"] = {node["id"]: node["status"] for node in live["nodes"]}
+            reader = session_factory()
+            try:
+                checkpoint = reader.get(Execution, config["_execution_id"]).summary["workflow_state"]
+            finally:
+                reader.close()
+            seen["checkpoint"] = {node["id"]: node["status"] for node in checkpoint["nodes"]}
+            seen["sequence"] = [(node["id"], node["sequence"]) for node in checkpoint["nodes"]]
+            checked.set()
+        return {"exit_status": 0}
+
+    monkeypatch.setattr(ExecutionEngine, "_execute_node", fake_execute_node)
+    ExecutionEngine(session, session_factory=session_factory).execute_workflow(execution.id)
+
+    assert seen["live"]["deploy"] == "success" and seen["live"]["check-a"] == "running"
+    # the checkpoint was written before the checks were dispatched
+    assert seen["checkpoint"] == {"deploy": "success", "check-a": "not-run", "check-b": "not-run"}
+    assert seen["sequence"] == [("deploy", "1"), ("check-a", "2-1"), ("check-b", "2-2")]
+    assert get_workflow_states().get(execution.id) is None
+    session.expire_all()
+    final = session.get(Execution, execution.id).summary["workflow_state"]
+    assert {node["status"] for node in final["nodes"]} == {"success"}
+    assert {edge["status"] for edge in final["edges"]} == {"passed"}
+    session.close()
+
+
 def test_dag_skips_join_when_any_upstream_fails(tmp_path, monkeypatch):
     session_factory = make_engine(tmp_path)
     session = session_factory()
@@ -234,3 +333,169 @@ def test_stop_request_prevents_downstream_scheduling(tmp_path, monkeypatch):
     assert executed_nodes == ["start"]
     assert node_statuses["after"] == "skipped"
     session.close()
+
+
+def test_stop_interrupts_polling_node_without_db_polling(tmp_path, monkeypatch):
+    session_factory = make_engine(tmp_path)
+    session = session_factory()
+    execution = create_workflow(
+        session,
+        nodes=[
+            {"id": "wait-ready", "type": "wait", "config": {}},
+            {"id": "after", "type": "report", "config": {}},
+        ],
+        edges=[
+            {"from": "wait-ready", "to": "after"},
+        ],
+    )
+
+    def fake_execute_node(self, node_type, config, context):
+        if self._sleep_unless_stopped(config, 30):
+            return self._stopped_result()
+        return {"exit_status": 0}
+
+    db_checks = []
+    original_is_stop_requested = ExecutionEngine._is_stop_requested
+
+    def counting_is_stop_requested(self, execution_id, check_db=True):
+        if check_db:
+            db_checks.append(execution_id)
+        return original_is_stop_requested(self, execution_id, check_db=check_db)
+
+    monkeypatch.setattr(ExecutionEngine, "_execute_node", fake_execute_node)
+    monkeypatch.setattr(ExecutionEngine, "_is_stop_requested", counting_is_stop_requested)
+
+    def stop_later():
+        time.sleep(0.3)
+        stop_session = session_factory()
+        try:
+            ExecutionEngine(stop_session, session_factory=session_factory).stop_execution(execution.id)
+        finally:
+            stop_session.close()
+
+    threading.Thread(target=stop_later).start()
+    started = time.monotonic()
+    ExecutionEngine(session, session_factory=session_factory).execute_workflow(execution.id)
+    elapsed = time.monotonic() - started
+
+    session.expire_all()
+    refreshed = session.query(Execution).filter(Execution.id == execution.id).first()
+    node_statuses = {
+        item.node_id: item.status
+        for item in session.query(NodeExecution).filter(NodeExecution.execution_id == execution.id).all()
+    }
+
+    assert elapsed < 1.5
+    assert refreshed.status == "stopped"
+    assert node_statuses == {"wait-ready": "failed", "after": "skipped"}
+    assert len(db_checks) <= 2
+    session.close()
+
+
+def test_stop_terminates_registered_remote_processes(tmp_path, monkeypatch):
+    from app.services.execution.remote_processes import RemoteProcess, get_remote_process_registry
+    from app.services.ssh_service import SSHResult, SSHService
+
+    session_factory = make_engine(tmp_path)
+    session = session_factory()
+    execution = create_workflow(session, nodes=[{"id": "bench", "type": "report", "config": {}}], edges=[])
+
+    commands = []
+    kill_gate = threading.Event()
+
+    class FakeSSH:
+        quote = staticmethod(SSHService.quote)
+
+        def run_command(self, host, username, password, command, port=22, timeout=30):
+            commands.append((host, command))
+            kill_gate.wait(5)
+            return SSHResult(exit_status=0, stdout="killed\n", stderr="")
+
+    def fake_execute_node(self, node_type, config, context):
+        get_remote_process_registry().register(config["_execution_id"], RemoteProcess(
+            node_id="bench",
+            server_id=3,
+            host="10.0.0.3",
+            username="root",
+            password="pw",
+            port=22,
+            pid_path="/tmp/iot-benchmark-runs/1/bench/benchmark.pid",
+        ))
+        if self._sleep_unless_stopped(config, 30):
+            return self._stopped_result()
+        return {"exit_status": 0}
+
+    monkeypatch.setattr(ExecutionEngine, "_execute_node", fake_execute_node)
+    stop_response = {}
+
+    def stop_later():
+        time.sleep(0.3)
+        stop_session = session_factory()
+        try:
+            started = time.monotonic()
+            stopped = ExecutionEngine(stop_session, session_factory=session_factory).stop_execution(execution.id)
+            stop_response.update(elapsed=time.monotonic() - started, status=stopped.status)
+        finally:
+            stop_session.close()
+            kill_gate.set()
+
+    stopper = threading.Thread(target=stop_later)
+    stopper.start()
+    engine = ExecutionEngine(session, session_factory=session_factory)
+    engine.ssh_service = FakeSSH()
+    engine.execute_workflow(execution.id)
+    stopper.join(timeout=5)
+
+    session.expire_all()
+    refreshed = session.query(Execution).filter(Execution.id == execution.id).first()
+
+    # /stop returns without waiting for the remote kill, which the worker runs and reports
+    assert stop_response["status"] == "stopped"
+    assert stop_response["elapsed"] < 0.5
+    assert refreshed.status == "stopped"
+    assert refreshed.summary["stopped_at"]
+    assert refreshed.summary["terminated_processes"] == [{
+        "node_id": "bench",
+        "server_id": 3,
+        "host": "10.0.0.3",
+        "pid_path": "/tmp/iot-benchmark-runs/1/bench/benchmark.pid",
+        "result": "killed",
+    }]
+    assert len(commands) == 1
+    assert "benchmark.pid" in commands[0][1] and "kill -TERM" in commands[0][1]
+    assert get_remote_process_registry().pop_all(execution.id) == []
+    session.close()
+
+
+def test_shell_node_registers_its_process_group_while_running():
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+    from app.services.execution.remote_processes import get_remote_process_registry
+    from app.services.ssh_service import SSHResult, SSHService
+
+    seen = {}
+
+    class FakeSSH:
+        quote = staticmethod(SSHService.quote)
+
+        def run_command_stream(self, host, username, password, command, port=22, timeout=30, on_output=None, log_path=None):
+            seen["command"] = command
+            seen["registered"] = get_remote_process_registry().pop_all(77)
+            for process in seen["registered"]:
+                get_remote_process_registry().register(77, process)
+            return SSHResult(exit_status=0, stdout="ok", stderr="")
+
+    engine = ExecutionEngine(MagicMock())
+    engine.ssh_service = FakeSSH()
+    server = SimpleNamespace(id=5, name="s5", host="10.0.0.5", username="root", password="pw", port=22, region="私有云")
+    engine._resolve_server_with_region = lambda config, context: server
+    engine._node_log_path = lambda config: None
+
+    result = engine._execute_shell_node({"command": "sleep 5", "_execution_id": 77, "_node_id": "shell-1"}, {})
+
+    assert result["exit_status"] == 0
+    [process] = seen["registered"]
+    assert process.server_id == 5 and process.node_id == "shell-1"
+    assert f"echo $$ > '{process.pid_path}'" in seen["command"]
+    assert seen["command"].endswith("\nsleep 5")
+    assert get_remote_process_registry().pop_all(77) == []
@@ -3,8 +3,11 @@ import sys
 sys.path.insert(0, 'backend')
 import pytest
 from unittest.mock import MagicMock, patch
-from app.models.database import Server, Execution, NodeExecution, Workflow
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.database import Base, Server, Execution, NodeExecution, Workflow
 from app.services.execution_engine import ExecutionEngine
+from app.services.server_leases import ServerLeaseManager
 
 
 @pytest.fixture
@@ -19,6 +22,24 @@ def engine(db_session):
     return ExecutionEngine(db_session)
 
 
+@pytest.fixture
+def lease_engine():
+    """An ExecutionEngine on a real in-memory database, for lease-backed scheduling."""
+    sql_engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(sql_engine)
+    db = sessionmaker(bind=sql_engine)()
+    db.add_all([Workflow(id=1, name="wf"), *(Execution(id=index, workflow_id=1) for index in (1, 2, 3, 99))])
+    db.commit()
+    yield ExecutionEngine(db), db
+    db.close()
+
+
+def add_servers(db, servers):
+    db.add_all(servers)
+    db.commit()
+
+
+
 class TestResolveServerWithSchedule:
     """Tests for workflow-level fixed/random scheduling."""
 
@@ -90,138 +111,388 @@ class TestResolveServerWithSchedule:
         )
 
         assert result is benchmark_server
-        engine._resolve_idle_server_by_region.assert_called_once_with("私有云")
+        engine._resolve_idle_server_by_region.assert_called_once()
+        assert engine._resolve_idle_server_by_region.call_args.args[0] == "私有云"
 
-    def test_random_mode_selects_idle_schedulable_server_from_workflow_region(self, engine, db_session):
-        mock_servers = [
+    def test_random_mode_selects_idle_schedulable_server_from_workflow_region(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [
             Server(id=3, name="region-server-1", host="192.168.1.3", region="公司-上层", schedulable=True),
             Server(id=4, name="region-server-2", host="192.168.1.4", region="公司-上层", schedulable=True),
-        ]
-        db_session.query.return_value.filter.return_value.all.return_value = mock_servers
-        engine._compute_busy_server_ids = MagicMock(return_value=[])
+            Server(id=5, name="other-region", host="192.168.1.5", region="私有云", schedulable=True),
+            Server(id=6, name="unschedulable", host="192.168.1.6", region="公司-上层", schedulable=False),
+        ])
 
         result = engine._resolve_server_for_schedule(
-            {"_schedule_mode": "random", "_schedule_region": "公司-上层"},
+            {"_schedule_mode": "random", "_schedule_region": "公司-上层", "_execution_id": 1, "_node_id": "n1"},
             {"_schedule_mode": "random", "_schedule_region": "公司-上层"}
         )
 
         assert result is not None
         assert result.region == "公司-上层"
         assert result.id in [3, 4]
+        assert ServerLeaseManager(db).busy_server_ids() == {result.id}
 
-    def test_random_mode_returns_none_when_no_idle_servers(self, engine, db_session):
-        db_session.query.return_value.filter.return_value.filter.return_value.all.return_value = []
-        engine._compute_busy_server_ids = MagicMock(return_value=[1, 2, 3])
+    def test_random_mode_returns_none_when_no_idle_servers(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [Server(id=1, name="busy", host="192.168.1.1", region="公有云", schedulable=True)])
+        ServerLeaseManager(db).acquire(db.get(Server, 1), execution_id=99, node_id="other")
 
         result = engine._resolve_server_for_schedule(
-            {"_schedule_mode": "random", "_schedule_region": "公有云"},
+            {"_schedule_mode": "random", "_schedule_region": "公有云", "_execution_id": 1, "_node_id": "n1"},
             {"_schedule_mode": "random", "_schedule_region": "公有云"}
         )
 
         assert result is None
 
-    def test_random_mode_excludes_busy_servers(self, engine, db_session):
-        mock_servers = [
-            Server(id=7, name="idle-server", host="192.168.1.7", region="私有云", schedulable=True),
-        ]
-        db_session.query.return_value.filter.return_value.filter.return_value.all.return_value = mock_servers
-        engine._compute_busy_server_ids = MagicMock(return_value=[1, 2, 3, 4, 5, 6])
+    def test_random_mode_excludes_busy_servers(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"server-{index}", host=f"192.168.1.{index}", region="私有云", schedulable=True)
+            for index in range(1, 8)
+        ])
+        leases = ServerLeaseManager(db)
+        for index in range(1, 7):
+            assert leases.acquire(db.get(Server, index), execution_id=99, node_id=f"n{index}")
 
         result = engine._resolve_server_for_schedule(
-            {"_schedule_mode": "random", "_schedule_region": "私有云"},
+            {"_schedule_mode": "random", "_schedule_region": "私有云", "_execution_id": 1, "_node_id": "n1"},
             {"_schedule_mode": "random", "_schedule_region": "私有云"}
         )
 
         assert result is not None
         assert result.id == 7
 
+    def test_random_mode_keeps_the_server_already_leased_by_the_node(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"server-{index}", host=f"192.168.1.{index}", region="私有云", schedulable=True)
+            for index in range(1, 5)
+        ])
+        config = {"_schedule_mode": "random", "_schedule_region": "私有云", "_execution_id": 1, "_node_id": "n1"}
+
+        first = engine._resolve_server_for_schedule(dict(config), {})
+        # a handler resolving again for the same node must not grab a second server
+        second = engine._resolve_server_for_schedule(dict(config), {})
+
+        assert second.id == first.id
+        assert ServerLeaseManager(db).busy_server_ids() == {first.id}
+
+
+class TestServerLeases:
+    """Tests for ServerLeaseManager, which replaced the running-node input_data scan."""
+
+    def test_no_leases_means_no_busy_servers(self, lease_engine):
+        _, db = lease_engine
+        add_servers(db, [Server(id=1, name="s1", host="192.168.1.1")])
+
+        assert ServerLeaseManager(db).busy_server_ids() == set()
+
+    def test_exclusive_lease_is_atomic_per_server(self, lease_engine):
+        _, db = lease_engine
+        add_servers(db, [Server(id=1, name="s1", host="192.168.1.1")])
+        leases = ServerLeaseManager(db)
+        server = db.get(Server, 1)
+
+        assert leases.acquire(server, execution_id=1, node_id="a") is True
+        assert leases.acquire(server, execution_id=2, node_id="b") is False
+        # re-acquiring as the same holder renews instead of failing
+        assert leases.acquire(server, execution_id=1, node_id="a") is True
+        # shared leases (fixed scheduling) only record usage
+        assert leases.acquire(server, execution_id=3, node_id="c", exclusive=False) is True
+        assert leases.busy_server_ids() == {1}
+
+    def test_release_and_expiry_free_servers(self, lease_engine):
+        _, db = lease_engine
+        add_servers(db, [
+            Server(id=1, name="s1", host="192.168.1.1"),
+            Server(id=2, name="s2", host="192.168.1.2"),
+        ])
+        leases = ServerLeaseManager(db)
+        leases.acquire(db.get(Server, 1), execution_id=1, node_id="a")
+        leases.acquire(db.get(Server, 2), execution_id=2, node_id="b")
+
+        assert leases.release(1, "a") == 1
+        assert leases.busy_server_ids() == {2}
+
+        expired = ServerLeaseManager(db, ttl_seconds=-1)
+        assert expired.heartbeat(2) == 1
+        assert leases.busy_server_ids() == set()
+        assert leases.acquire(db.get(Server, 2), execution_id=3, node_id="c") is True
+        assert leases.purge_expired() == 1
+
+    def test_cluster_node_servers_are_leased(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=10, name="cn", host="192.168.1.10"),
+            Server(id=11, name="dn1", host="192.168.1.11"),
+            Server(id=12, name="dn2", host="192.168.1.12"),
+        ])
+
+        engine._lease_node_servers(1, "cluster", {
+            "config_nodes": [{"server_id": 10}],
+            "data_nodes": [{"server_id": 11}, {"server_id": 12}],
+        })
+
+        assert ServerLeaseManager(db).busy_server_ids() == {10, 11, 12}
 
-class TestComputeBusyServerIds:
-    """Tests for _compute_busy_server_ids method."""
 
-    def test_compute_busy_server_ids_no_running_executions(self, engine, db_session):
-        """Test that empty list is returned when no running executions."""
-        db_session.query.return_value.filter.return_value.all.return_value = []
 
-        result = engine._compute_busy_server_ids()
-
-        assert result == []
-
-    def test_compute_busy_server_ids_with_running_executions(self, engine, db_session):
-        """Test that busy server IDs are computed from running node executions."""
-        # Mock running execution
-        mock_execution = Execution(id=1, workflow_id=1, status="running")
-        db_session.query.return_value.filter.return_value.all.side_effect = [
-            [mock_execution],  # First call for running executions
-            # Second call for node executions
-            [NodeExecution(execution_id=1, node_id="node-1", status="running", input_data={"server_id": 1})],
-        ]
-
-        result = engine._compute_busy_server_ids()
-
-        assert 1 in result
-
-    def test_compute_busy_server_ids_multiple_executions(self, engine, db_session):
-        """Test that busy server IDs from multiple executions are collected."""
-        mock_executions = [
-            Execution(id=1, workflow_id=1, status="running"),
-            Execution(id=2, workflow_id=2, status="running"),
-        ]
-        # New implementation uses single query with .in_() filter
-        mock_node_executions = [
-            NodeExecution(execution_id=1, node_id="n1", status="running", input_data={"server_id": 1}),
-            NodeExecution(execution_id=2, node_id="n2", status="running", input_data={"server_id": 2}),
-        ]
-        # Mock the query chain for execution IDs
-        mock_query = db_session.query.return_value
-        mock_filter = mock_query.filter.return_value
-        mock_filter.all.return_value = mock_executions
-
-        # Mock the query chain for node_executions with .in_() filter
-        mock_ne_query = db_session.query.return_value
-        mock_ne_filter = mock_ne_query.filter.return_value
-        mock_ne_filter.all.return_value = mock_node_executions
-
-        result = engine._compute_busy_server_ids()
-
-        assert 1 in result
-        assert 2 in result
-
-    def test_compute_busy_server_ids_no_server_id_in_input_data(self, engine, db_session):
-        """Test that node executions without server_id in input_data are ignored."""
-        mock_execution = Execution(id=1, workflow_id=1, status="running")
-        db_session.query.return_value.filter.return_value.all.side_effect = [
-            [mock_execution],
-            [NodeExecution(execution_id=1, node_id="n1", status="running", input_data={})],
-        ]
-
-        result = engine._compute_busy_server_ids()
-
-        assert result == []
-
-    def test_compute_busy_server_ids_from_cluster_nodes(self, engine, db_session):
-        """Test that cluster topology node server IDs are also marked busy."""
-        mock_execution = Execution(id=1, workflow_id=1, status="running")
-        db_session.query.return_value.filter.return_value.all.side_effect = [
-            [mock_execution],
-            [
-                NodeExecution(
-                    execution_id=1,
-                    node_id="cluster",
-                    status="running",
-                    input_data={
-                        "config_nodes": [{"server_id": 10}],
-                        "data_nodes": [{"server_id": 11}, {"server_id": 12}],
-                    },
-                )
-            ],
-        ]
-
-        result = engine._compute_busy_server_ids()
-
-        assert sorted(result) == [10, 11, 12]
+@pytest.fixture
+def metrics_cache():
+    from app.services.metrics_cache import get_metrics_cache
+    cache = get_metrics_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def put_load(cache, server_id, cpu, memory, disk_free=0):
+    cache.put(server_id, {"cpu_percent": cpu, "memory": {"percent": memory}, "disk": {"free": disk_free}})
+
+
+class TestPlacement:
+    """Tests for load-aware ranking of idle servers."""
+
+    def test_least_loaded_picks_the_quietest_server_and_records_why(self, lease_engine, metrics_cache):
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 5)
+        ])
+        put_load(metrics_cache, 1, cpu=90, memory=50)
+        put_load(metrics_cache, 2, cpu=10, memory=20)
+        put_load(metrics_cache, 3, cpu=30, memory=30)
+        config = {"_schedule_mode": "random", "_schedule_region": "公司", "_execution_id": 1, "_node_id": "n1"}
+
+        server = engine._resolve_server_for_schedule(config, {})
+
+        assert server.id == 2
+        placement = config["_placement"]
+        assert placement["strategy"] == "least_loaded"
+        assert placement["selected"] == [2]
+        # server 4 has no metrics and ranks after every measured server
+        assert [item["server_id"] for item in placement["candidates"]] == [2, 3, 1, 4]
+        assert placement["candidates"][0]["cpu_percent"] == 10
+
+    def test_anti_affinity_keeps_benchmark_off_the_database_host(self, lease_engine, metrics_cache):
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 4)
+        ])
+        put_load(metrics_cache, 1, cpu=1, memory=1)
+        put_load(metrics_cache, 2, cpu=5, memory=5)
+        put_load(metrics_cache, 3, cpu=80, memory=80)
+        context = {
+            "_schedule_mode": "random",
+            "_schedule_region": "公司",
+            "data_nodes": [{"server_id": 1, "host": "10.0.0.1"}],
+        }
+        config = {
+            "_schedule_mode": "random", "_schedule_region": "公司",
+            "_execution_id": 1, "_node_id": "bench", "_node_type": "iot_benchmark_run",
+        }
+
+        server = engine._resolve_server_for_schedule(config, context)
+
+        assert server.id == 2
+        assert config["_placement"]["avoided"] == [1]
+
+    def test_bin_pack_prefers_servers_with_recent_work(self, lease_engine):
+        from datetime import timedelta
+        from app.utils.time import utc_now
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 4)
+        ])
+        finished = utc_now()
+        db.add_all([
+            NodeExecution(execution_id=2, node_id="a", node_type="shell", status="success", input_data={"server_id": 3},
+                          started_at=finished - timedelta(minutes=30), finished_at=finished),
+            NodeExecution(execution_id=2, node_id="b", node_type="shell", status="success", input_data={"server_id": 1},
+                          started_at=finished - timedelta(minutes=5), finished_at=finished),
+        ])
+        db.commit()
+        config = {
+            "_schedule_mode": "random", "_schedule_region": "公司",
+            "_execution_id": 1, "_node_id": "n1", "placement_strategy": "bin_pack",
+        }
+
+        server = engine._resolve_server_for_schedule(config, {})
+
+        assert server.id == 3
+        assert config["_placement"]["candidates"][0]["recent_node_seconds"] == pytest.approx(1800, abs=1)
+
+    def test_open_circuit_hosts_are_skipped(self, lease_engine):
+        from app.services.ssh_service import get_circuit_breaker
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 3)
+        ])
+        get_circuit_breaker().trip("10.0.0.1")
+        try:
+            config = {"_schedule_mode": "random", "_schedule_region": "公司", "_execution_id": 1, "_node_id": "n1"}
+            server = engine._resolve_server_for_schedule(config, {})
+
+            assert server.id == 2
+            assert config["_placement"]["unreachable"] == [1]
+        finally:
+            get_circuit_breaker().reset()
+
+    def test_unknown_strategy_is_rejected(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [Server(id=1, name="s1", host="10.0.0.1", region="公司", schedulable=True)])
+
+        with pytest.raises(ValueError, match="Unsupported placement strategy"):
+            engine._resolve_server_for_schedule(
+                {"_schedule_mode": "random", "_schedule_region": "公司", "_execution_id": 1,
+                 "_node_id": "n1", "placement_strategy": "fastest"},
+                {}
+            )
 
 
+class TestClusterReservation:
+    """Tests for all-or-nothing reservation of cluster servers in random mode."""
+
+    def test_acquire_many_is_all_or_nothing(self, lease_engine):
+        _, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 4)
+        ])
+        leases = ServerLeaseManager(db)
+        leases.acquire(db.get(Server, 3), execution_id=99, node_id="other")
+
+        assert leases.acquire_many("公司", 3, execution_id=1, node_id="cluster") is None
+        assert leases.busy_server_ids() == {3}
+
+        reserved = leases.acquire_many("公司", 2, execution_id=1, node_id="cluster")
+        assert sorted(server.id for server in reserved) == [1, 2]
+        # the group survives a successful node and is dropped with the execution
+        leases.release(1, "cluster", keep_execution_scoped=True)
+        assert leases.busy_server_ids() == {1, 2, 3}
+        leases.release(1)
+        assert leases.busy_server_ids() == {3}
+
+    def test_cluster_entries_are_bound_to_reserved_servers(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 5)
+        ])
+        config = {
+            "_schedule_mode": "random",
+            "_schedule_region": "公司",
+            "config_nodes": [{"server_id": 7}],
+            "data_nodes": [{"server_id": 7}, {"server_id": 8}, {"node_role": "datanode"}],
+        }
+
+        bound = engine._reserve_cluster_servers(1, "cluster", config)
+
+        cn, dn1, dn2, dn3 = bound["config_nodes"] + bound["data_nodes"]
+        assert cn["server_id"] == dn1["server_id"]
+        assert len({cn["server_id"], dn2["server_id"], dn3["server_id"]}) == 3
+        assert dn2["host"] == f"10.0.0.{dn2['server_id']}"
+        assert config["data_nodes"][2] == {"node_role": "datanode"}
+        assert ServerLeaseManager(db).busy_server_ids() == {cn["server_id"], dn2["server_id"], dn3["server_id"]}
+
+    def test_cluster_larger_than_region_fails_fast(self, lease_engine):
+        engine, db = lease_engine
+        add_servers(db, [Server(id=1, name="s1", host="10.0.0.1", region="公司", schedulable=True)])
+
+        with pytest.raises(ValueError, match="has only 1 schedulable"):
+            engine._reserve_cluster_servers(1, "cluster", {
+                "_schedule_mode": "random",
+                "_schedule_region": "公司",
+                "config_nodes": [{}],
+                "data_nodes": [{}],
+            })
+
+    def test_reservations_queue_in_arrival_order(self, tmp_path):
+        import threading
+        import time
+        from app.services.server_leases import ServerReservationQueue
+
+        sql_engine = create_engine(f"sqlite:///{tmp_path / 'leases.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(sql_engine)
+        session_factory = sessionmaker(bind=sql_engine)
+        db = session_factory()
+        db.add_all([Workflow(id=1, name="wf"), *(Execution(id=index, workflow_id=1) for index in (1, 2, 99))])
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in (1, 2)
+        ])
+        ServerLeaseManager(db).acquire(db.get(Server, 2), execution_id=99, node_id="other")
+        queue = ServerReservationQueue(poll_interval=0.05)
+        results = {}
+
+        def reserve(name, execution_id, count):
+            session = session_factory()
+            servers = queue.reserve(session, "公司", count, execution_id, "cluster", timeout=5)
+            results[name] = (time.monotonic(), sorted(server.id for server in servers))
+            session.close()
+
+        big = threading.Thread(target=reserve, args=("big", 1, 2))
+        big.start()
+        while queue.waiting("公司") < 1:
+            time.sleep(0.01)
+        small = threading.Thread(target=reserve, args=("small", 2, 1))
+        small.start()
+        while queue.waiting("公司") < 2:
+            time.sleep(0.01)
+        # server 1 is idle, but the small request must not jump ahead of the big one
+        time.sleep(0.2)
+        assert results == {}
+
+        ServerLeaseManager(db).release(99)
+        big.join(timeout=5)
+        assert results["big"][1] == [1, 2]
+        ServerLeaseManager(db).release(1)
+        small.join(timeout=5)
+        assert results["small"][1] in ([1], [2])
+        assert results["small"][0] > results["big"][0]
+        db.close()
+
+    def test_single_server_picks_wait_behind_queued_cluster(self, tmp_path):
+        import threading
+        import time
+        from app.services.server_leases import get_server_reservation_queue
+
+        sql_engine = create_engine(f"sqlite:///{tmp_path / 'leases.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(sql_engine)
+        session_factory = sessionmaker(bind=sql_engine)
+        db = session_factory()
+        db.add_all([Workflow(id=1, name="wf"), *(Execution(id=index, workflow_id=1) for index in (1, 2, 99))])
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in (1, 2)
+        ])
+        leases = ServerLeaseManager(db)
+        leases.acquire(db.get(Server, 2), execution_id=99, node_id="other")
+        queue = get_server_reservation_queue()
+        reserved = []
+
+        def reserve():
+            session = session_factory()
+            reserved.extend(server.id for server in queue.reserve(session, "公司", 2, 1, "cluster", timeout=5))
+            session.close()
+
+        gang = threading.Thread(target=reserve)
+        gang.start()
+        while queue.waiting("公司") < 1:
+            time.sleep(0.01)
+        # server 1 is idle, but a single pick would keep the queued cluster waiting
+        assert leases.acquire_idle("公司", execution_id=2, node_id="single") is None
+
+        leases.release(99)
+        gang.join(timeout=5)
+        assert sorted(reserved) == [1, 2]
+        assert queue.waiting("公司") == 0
+        db.close()
+
 class TestNodeRequiresServer:
     """Tests for _node_requires_server method."""
 
@@ -387,3 +658,66 @@ class TestMergeConfigWithContext:
         merged = engine._merge_config_with_context(config, context)
 
         assert merged["region"] == "公司"
+
+
+class TestExecutionResourceMonitor:
+    """Tests for per-execution resource sampling of leased servers."""
+
+    def test_samples_every_leased_server_tagged_with_running_nodes(self, lease_engine, metrics_cache):
+        from app.models.database import ResourceSample
+        from app.services.execution.resource_monitor import ExecutionResourceMonitor, resource_timeseries
+
+        engine, db = lease_engine
+        add_servers(db, [
+            Server(id=index, name=f"s{index}", host=f"10.0.0.{index}", region="公司", schedulable=True)
+            for index in range(1, 4)
+        ])
+        # cluster reservation (kept after its node) plus the benchmark client's own lease
+        assert ServerLeaseManager(db).acquire_many("公司", 2, 1, "deploy") is not None
+        reserved = ServerLeaseManager(db).busy_server_ids()
+        client_server = ({1, 2, 3} - reserved).pop()
+        ServerLeaseManager(db).acquire(db.get(Server, client_server), 1, "bench", exclusive=True)
+        ServerLeaseManager(db).release(1, "deploy", keep_execution_scoped=True)
+
+        rounds = []
+
+        def sample(service, target, consumer):
+            if len(rounds) > 1 and target.server_id == client_server:
+                return None  # client unreachable on the second tick
+            return {
+                "cpu_percent": 10.0 * target.server_id,
+                "memory": {"percent": 50.0},
+                "disk": {"percent": 20.0},
+                "load_avg": {"1m": 1.5},
+                "disk_io": {"sda": {"read_bytes_per_sec": 100.0, "write_bytes_per_sec": 300.0, "util_percent": 40.0},
+                            "sdb": {"read_bytes_per_sec": 1.0, "write_bytes_per_sec": 2.0, "util_percent": 90.0}},
+                "network": {"eth0": {"rx_bytes_per_sec": 7.0, "tx_bytes_per_sec": 9.0}},
+                "interval_seconds": 2.0,
+            }
+
+        monitor = ExecutionResourceMonitor(interval=60, sample=sample)
+        factory = sessionmaker(bind=db.get_bind())
+        try:
+            monitor.track(1, "bench", factory, None)
+            rounds.append(1)
+            assert monitor.sample_once() == 3
+            rounds.append(2)
+            assert monitor.sample_once() == 2
+            monitor.untrack(1, "bench")
+            assert monitor.sample_once() == 0
+        finally:
+            monitor.stop()
+
+        rows = db.query(ResourceSample).filter(ResourceSample.execution_id == 1).all()
+        assert len(rows) == 5
+        assert all(row.node_ids == ["bench"] for row in rows)
+        assert {row.disk_read_bytes_per_sec for row in rows} == {101.0}
+        assert {row.disk_util_percent for row in rows} == {90.0}
+        assert metrics_cache.get(client_server, max_age=60)["cpu_percent"] == 10.0 * client_server
+
+        series = resource_timeseries(db, 1)
+        assert len(series["timestamps"]) == 2
+        assert [server["server_id"] for server in series["servers"]] == [1, 2, 3]
+        client = next(server for server in series["servers"] if server["server_id"] == client_server)
+        assert client["series"]["cpu_percent"] == [10.0 * client_server, None]
+        assert client["node_ids"] == [["bench"], None]
@@ -2,7 +2,7 @@
 import sys
 sys.path.insert(0, 'backend')
 import pytest
-from app.models.database import Execution, NodeExecution
+from app.models.database import Execution, NodeExecution, Workflow
 
 @pytest.fixture(autouse=True)
 def setup_workflow(client):
@@ -56,6 +56,281 @@ def test_delete_execution(client, db_session):
         NodeExecution.execution_id == execution_id
     ).count() == 0
 
+def test_delete_execution_removes_unreferenced_artifacts(client, db_session, tmp_path, monkeypatch):
+    from app.services.execution import artifacts
+
+    store = artifacts.ArtifactStore(tmp_path, chunk_bytes=1024, gc_grace_seconds=0)
+    monkeypatch.setattr(artifacts, "_store", store)
+    shared = artifacts.offload_output({"stdout": "shared\n" * 1000}, store, min_bytes=100)
+    own = artifacts.offload_output({"stdout": "own\n" * 1000}, store, min_bytes=100)
+    # Both executions reference the shared blob
+    own["artifacts"]["stderr"] = shared["artifacts"]["stdout"]
+    executions = [Execution(workflow_id=1, status="completed") for _ in range(2)]
+    db_session.add_all(executions)
+    db_session.commit()
+    db_session.add_all([
+        NodeExecution(execution_id=executions[0].id, node_id="n1", node_type="shell", output_data=own),
+        NodeExecution(execution_id=executions[1].id, node_id="n1", node_type="shell", output_data=shared),
+    ])
+    db_session.commit()
+    own_digest = own["artifacts"]["stdout"]["sha256"]
+    shared_digest = shared["artifacts"]["stdout"]["sha256"]
+
+    assert client.delete(f"/api/executions/{executions[0].id}").status_code == 204
+    with pytest.raises(artifacts.ArtifactNotFound):
+        store.index(own_digest)
+    assert store.read_bytes(shared_digest, 0, 7) == b"shared\n"
+
+    assert client.delete(f"/api/executions/{executions[1].id}").status_code == 204
+    assert list(tmp_path.rglob("*.*")) == []
+
 def test_delete_execution_not_found(client):
     response = client.delete("/api/executions/999")
     assert response.status_code == 404
+
+def test_get_node_execution_log(client, db_session, tmp_path):
+    log_file = tmp_path / "node-1.log"
+    log_file.write_text("full output\n", encoding="utf-8")
+    execution = Execution(workflow_id=1, status="completed")
+    db_session.add(execution)
+    db_session.commit()
+    node_execution = NodeExecution(
+        execution_id=execution.id,
+        node_id="node-1",
+        node_type="shell",
+        status="success",
+        log_path=str(log_file),
+    )
+    db_session.add(node_execution)
+    db_session.commit()
+
+    response = client.get(f"/api/executions/{execution.id}/nodes/{node_execution.id}/log")
+    assert response.status_code == 200
+    assert response.text == "full output\n"
+
+    log_file.unlink()
+    response = client.get(f"/api/executions/{execution.id}/nodes/{node_execution.id}/log")
+    assert response.status_code == 404
+
+def test_create_execution_is_queued_with_priority(client, dispatcher):
+    first = client.post("/api/executions", json={"workflow_id": 1}).json()["id"]
+    urgent = client.post("/api/executions", json={"workflow_id": 1, "priority": 10}).json()["id"]
+
+    response = client.get("/api/executions/queue")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["queued"] == 2
+    assert data["running"] == 0
+    assert data["queued_execution_ids"] == [urgent, first]
+
+    client.post(f"/api/executions/{first}/stop")
+    assert dispatcher.stats()["queued_execution_ids"] == [urgent]
+
+def test_get_execution_resources_aligns_series(client, db_session):
+    from datetime import timedelta
+    from app.models.database import ResourceSample, Server
+    from app.utils.time import utc_now
+
+    execution = Execution(workflow_id=1, status="running")
+    db_session.add_all([
+        execution,
+        Server(id=1, name="iotdb-1", host="10.0.0.1"),
+        Server(id=2, name="bench-1", host="10.0.0.2"),
+    ])
+    db_session.commit()
+    first = utc_now()
+    second = first + timedelta(seconds=2)
+    db_session.add_all([
+        NodeExecution(execution_id=execution.id, node_id="bench", node_type="iot_benchmark_start",
+                      status="running", started_at=first),
+        ResourceSample(execution_id=execution.id, server_id=1, node_ids=["bench"], sampled_at=first, cpu_percent=10.0),
+        ResourceSample(execution_id=execution.id, server_id=2, node_ids=["bench"], sampled_at=first, cpu_percent=20.0),
+        ResourceSample(execution_id=execution.id, server_id=1, node_ids=["bench"], sampled_at=second, cpu_percent=80.0),
+    ])
+    db_session.commit()
+
+    response = client.get(f"/api/executions/{execution.id}/resources")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["timestamps"]) == 2
+    assert [server["server_name"] for server in data["servers"]] == ["iotdb-1", "bench-1"]
+    assert data["servers"][0]["series"]["cpu_percent"] == [10.0, 80.0]
+    assert data["servers"][1]["series"]["cpu_percent"] == [20.0, None]
+    assert data["nodes"][0]["node_id"] == "bench"
+    assert data["nodes"][0]["finished_at"] is None
+    assert client.get("/api/executions/999/resources").status_code == 404
+
+def test_execution_events_resume_from_last_event_id(client, db_session):
+    from app.services.execution.events import get_event_bus
+
+    execution = Execution(workflow_id=1, status="running")
+    db_session.add(execution)
+    db_session.commit()
+    bus = get_event_bus()
+    bus.discard(execution.id)
+    for status in ("running", "success"):
+        bus.publish(execution.id, "node", {"node_id": "n1", "status": status})
+    bus.publish_output(execution.id, "n1", "stdout", "done\n")
+    bus.close(execution.id)
+
+    response = client.get(f"/api/executions/{execution.id}/events", headers={"Last-Event-ID": "1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    body = response.text
+    assert "id: 1\n" not in body
+    assert "id: 2\nevent: node\n" in body and "id: 3\nevent: output\n" in body
+    assert body.rstrip().endswith('event: end\ndata: {"last_seq": 3}')
+
+    # a client that is ahead of this stream (e.g. it saw a previous server process) is told to reload
+    reset = client.get(f"/api/executions/{execution.id}/events?after=10").text
+    assert 'event: reset\ndata: {"after": 10}' in reset and "id: 1\n" in reset
+    bus.discard(execution.id)
+
+    # finished and nothing buffered: the current state and the end marker
+    execution.status = "completed"
+    db_session.commit()
+    body = client.get(f"/api/executions/{execution.id}/events").text
+    assert body.startswith('event: execution\ndata: {"id": %d, "status": "completed"' % execution.id)
+    assert body.endswith('event: end\ndata: {"last_seq": 0}\n\n')
+    assert client.get("/api/executions/999/events").status_code == 404
+
+
+def test_execution_events_only_open_a_stream_for_active_executions(client, db_session, dispatcher):
+    import threading
+    from app.services.execution.events import get_event_bus
+
+    orphaned = Execution(workflow_id=1, status="running")
+    queued = Execution(workflow_id=1, status="pending")
+    db_session.add_all([orphaned, queued])
+    db_session.commit()
+    bus = get_event_bus()
+
+    # running in the database but not in this process (e.g. before a restart): state, then end
+    body = client.get(f"/api/executions/{orphaned.id}/events").text
+    assert '"status": "running"' in body and body.endswith('event: end\ndata: {"last_seq": 0}\n\n')
+    assert bus.get(orphaned.id) is None
+
+    # queued here: a live stream is opened, and the runner publishes to and closes it
+    dispatcher.submit(queued.id)
+    closer = threading.Timer(0.5, bus.close, args=(queued.id,))
+    closer.start()
+    body = client.get(f"/api/executions/{queued.id}/events").text
+    closer.join()
+    assert body.startswith("retry: 3000\n\n") and body.endswith('event: end\ndata: {"last_seq": 0}\n\n')
+    bus.discard(queued.id)
+
+def test_get_execution_state_prefers_live_then_checkpoint(client, db_session):
+    from app.services.execution.workflow_state import LiveWorkflowState, get_workflow_states
+
+    workflow = db_session.get(Workflow, 1)
+    workflow.nodes = [{"id": "a", "type": "shell", "config": {}}, {"id": "b", "type": "shell", "config": {}}]
+    workflow.edges = [{"from": "a", "to": "b"}]
+    execution = Execution(workflow_id=1, status="pending")
+    db_session.add(execution)
+    db_session.commit()
+
+    # not started: every node not-run, built from the workflow definition
+    pending = client.get(f"/api/executions/{execution.id}/state").json()
+    assert [(node["id"], node["status"]) for node in pending["nodes"]] == [("a", "not-run"), ("b", "not-run")]
+
+    live = LiveWorkflowState(pending["nodes"], [{"from": "a", "to": "b"}])
+    live.apply({"id": 7, "node_id": "a", "status": "running", "started_at": "2026-01-01T00:00:00+00:00"})
+    get_workflow_states().register(execution.id, live)
+    try:
+        running = client.get(f"/api/executions/{execution.id}/state").json()
+    finally:
+        get_workflow_states().discard(execution.id)
+    assert running["revision"] == 1
+    assert running["nodes"][0]["status"] == "running" and running["nodes"][0]["node_execution_id"] == 7
+    assert running["edges"] == [{"from": "a", "to": "b", "label": None, "status": "pending"}]
+
+    execution.summary = {"workflow_state": {"version": 1, "nodes": [], "edges": [], "revision": 4}}
+    db_session.commit()
+    assert client.get(f"/api/executions/{execution.id}/state").json()["revision"] == 4
+    assert client.get("/api/executions/999/state").status_code == 404
+
+def test_list_executions_keyset_pages_with_projection(client, db_session):
+    from datetime import timedelta
+    from app.utils.time import utc_now
+
+    created_at = utc_now()
+    for index in range(5):
+        # two executions share a timestamp; the id breaks the tie
+        db_session.add(Execution(
+            workflow_id=1,
+            status="completed",
+            created_at=created_at + timedelta(seconds=min(index, 3)),
+            summary={"workflow_state": {"nodes": [{"id": "n"}] * 50}},
+        ))
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "fields": "status,created_at"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/executions", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert all(set(item) == {"id", "status", "created_at"} for item in page)
+        seen.extend(item["id"] for item in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+    full = client.get("/api/executions", params={"limit": 1}).json()
+    assert full[0]["id"] == 5 and full[0]["summary"]["workflow_state"]["nodes"]
+
+
+def test_get_node_executions_pages_and_projects(client, db_session):
+    execution = Execution(workflow_id=1, status="completed")
+    db_session.add(execution)
+    db_session.commit()
+    for index in range(3):
+        db_session.add(NodeExecution(
+            execution_id=execution.id, node_id=f"n{index}", node_type="shell", status="success",
+            output_data={"stdout": "x" * 1000}
+        ))
+    db_session.commit()
+
+    first = client.get(f"/api/executions/{execution.id}/nodes", params={"limit": 2, "fields": "node_id,status"})
+    assert [item["node_id"] for item in first.json()] == ["n0", "n1"]
+    assert set(first.json()[0]) == {"id", "node_id", "status"}
+    rest = client.get(f"/api/executions/{execution.id}/nodes", params={
+        "limit": 2, "cursor": first.headers["X-Next-Cursor"]
+    })
+    assert [item["node_id"] for item in rest.json()] == ["n2"]
+    assert rest.json()[0]["output_data"] == {"stdout": "x" * 1000}
+
+
+def test_get_node_execution_output_reads_offloaded_ranges(client, db_session, tmp_path, monkeypatch):
+    from app.services.execution import artifacts
+
+    store = artifacts.ArtifactStore(tmp_path, chunk_bytes=1024)
+    monkeypatch.setattr(artifacts, "_store", store)
+    stdout = "".join(f"out {index}\n" for index in range(5000))
+    output = artifacts.offload_output({"exit_status": 0, "stdout": stdout}, store)
+    execution = Execution(workflow_id=1, status="completed")
+    db_session.add(execution)
+    db_session.commit()
+    node_execution = NodeExecution(
+        execution_id=execution.id, node_id="n1", node_type="shell", status="success", output_data=output
+    )
+    db_session.add(node_execution)
+    db_session.commit()
+    url = f"/api/executions/{execution.id}/nodes/{node_execution.id}/output"
+
+    response = client.get(f"{url}/stdout", params={"start_line": 4998})
+    assert response.status_code == 200
+    assert response.text == "out 4998\nout 4999\n"
+    assert response.headers["X-Output-Lines"] == "5000"
+    assert response.headers["X-Output-Size"] == str(len(stdout))
+    response = client.get(f"{url}/stdout", params={"offset": 10, "length": 5})
+    assert response.text == stdout[10:15]
+    assert client.get(f"{url}/exit_status").text == "0"
+    assert client.get(f"{url}/missing").status_code == 404
+    assert client.get(f"{url}/stdout", params={"offset": 1, "start_line": 1}).status_code == 400
@@ -35,6 +35,14 @@ class FakeBenchmarkSSH:
         })
         return {"status": "success"}
 
+    def edit_file(self, host, username, password, remote_path, transform, backup_path=None, port=22, timeout=30):
+        content = transform(self.config_content)
+        self.writes.append({
+            "remote_path": remote_path,
+            "content": content,
+        })
+        return {"status": "success", "content": content, "changed": True}
+
     def quote(self, value):
         return shlex.quote(str(value))
 
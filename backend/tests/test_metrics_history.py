@@ -0,0 +1,73 @@
+import sys
+sys.path.insert(0, "backend")
+
+import pytest
+
+from app.services.metrics_history import HistoryTier, MetricsHistoryStore, RingSeries
+
+TIERS = (HistoryTier("raw", 5, 24), HistoryTier("1m", 60, 30), HistoryTier("10m", 600, 10))
+
+
+def sample(cpu, memory=0.0, disk=0.0):
+    return {"cpu_percent": cpu, "memory": {"percent": memory}, "disk": {"percent": disk}}
+
+
+def test_ring_series_keeps_only_the_newest_points_in_order():
+    series = RingSeries(capacity=4, fields=("cpu_percent",))
+    for second in range(10):
+        series.append(float(second), {"cpu_percent": second * 10.0})
+
+    times, columns = series.window(0, 100)
+
+    assert list(times) == [6.0, 7.0, 8.0, 9.0]
+    assert list(columns["cpu_percent"]) == [60.0, 70.0, 80.0, 90.0]
+    assert series.oldest() == 6.0
+    assert list(series.window(7, 9)[0]) == [7.0, 8.0]
+    assert series.nbytes == 4 * 8 * 2
+
+
+def test_samples_cascade_into_minute_and_ten_minute_averages():
+    store = MetricsHistoryStore(tiers=TIERS)
+    # 21 minutes of 5s samples; cpu equals the minute index
+    for tick in range(21 * 12):
+        store.record(1, sample(cpu=float(tick // 12), memory=50.0), timestamp=tick * 5.0)
+
+    minutes = store.query(1, 0, 3600, step=60)
+    assert minutes["tier"] == "1m"
+    assert minutes["timestamps"][:3] == [0.0, 60.0, 120.0]
+    assert minutes["series"]["cpu_percent"][:3] == [0.0, 1.0, 2.0]
+    assert minutes["series"]["memory_percent"][0] == 50.0
+    # the 21st minute is still an open bucket
+    assert len(minutes["timestamps"]) == 20
+
+    # memory per server never grows past the preallocated rings
+    assert store.nbytes(1) == sum(tier.capacity for tier in TIERS) * 8 * 4
+
+    # once the minute ring no longer reaches back, ten-minute averages answer
+    short = MetricsHistoryStore(tiers=(TIERS[0], HistoryTier("1m", 60, 5), TIERS[2]))
+    for tick in range(22 * 12):
+        short.record(1, sample(cpu=float(tick // 12)), timestamp=tick * 5.0)
+    tens = short.query(1, 0, 3600, step=600)
+    assert tens["tier"] == "10m"
+    assert tens["series"]["cpu_percent"] == [4.5, 14.5]
+
+
+def test_query_uses_raw_points_while_retained_and_averages_into_step():
+    store = MetricsHistoryStore(tiers=TIERS)
+    for tick in range(600):
+        store.record(7, sample(cpu=float(tick % 2) * 100), timestamp=1000.0 + tick * 5)
+
+    recent = store.query(7, 3900, 4000)
+    assert recent["tier"] == "raw"
+    assert recent["timestamps"][0] == 3900.0
+    assert len(recent["timestamps"]) == 20
+
+    averaged = store.query(7, 3900, 4000, step=10)
+    assert averaged["series"]["cpu_percent"] == [pytest.approx(50.0)] * 10
+
+    # raw only keeps the last 2 minutes, so an older range falls back to the minute tier
+    older = store.query(7, 2400, 3000)
+    assert older["tier"] == "1m"
+    assert older["timestamps"][0] == 2400.0
+
+    assert store.query(99, 0, 10)["timestamps"] == []
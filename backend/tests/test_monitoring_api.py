@@ -179,7 +179,9 @@ class TestMonitoringAPI:
             "port": 22
         })
 
-        with patch('app.services.monitoring_service.MonitoringService.get_remote_status') as mock_remote:
+        from app.services.metrics_cache import get_metrics_cache
+        get_metrics_cache().clear()
+        with patch('app.services.monitoring_service.MonitoringService.sample_remote_status') as mock_remote:
             mock_remote.return_value = {
                 "server_id": 1,
                 "server_name": "test-remote",
@@ -194,6 +196,36 @@ class TestMonitoringAPI:
             assert "cpu_percent" in data
             assert "memory" in data
             assert "disk" in data
+            assert data["sampled_at"] is not None
+
+            # later reads are served from the cache without another SSH round trip
+            assert client.get("/api/monitoring/remote/1/status").json()["cpu_percent"] == 25.5
+            assert mock_remote.call_count == 1
+        get_metrics_cache().clear()
+
+    def test_get_remote_history(self, client):
+        """Test GET /api/monitoring/remote/{server_id}/history returns collected points"""
+        import time
+        from app.services.metrics_history import get_metrics_history
+        client.post("/api/servers", json={"name": "test-history", "host": "192.168.1.2", "port": 22})
+        history = get_metrics_history()
+        history.clear()
+        # all points inside one already-finished minute, so no 1m bucket closes
+        minute = time.time() // 60 * 60
+        for offset in (50, 45, 40):
+            history.record(1, {"cpu_percent": 30.0, "memory": {"percent": 40.0}, "disk": {"percent": 50.0}},
+                           timestamp=minute - offset)
+
+        response = client.get("/api/monitoring/remote/1/history")
+        history.clear()
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tier"] == "raw"
+        assert len(data["timestamps"]) == 3
+        assert data["series"]["cpu_percent"] == [30.0, 30.0, 30.0]
+        assert client.get("/api/monitoring/remote/999/history").status_code == 404
+        assert client.get("/api/monitoring/remote/1/history?from=2026-01-02T00:00:00&to=2026-01-01T00:00:00").status_code == 400
 
     def test_get_remote_processes_success(self, client):
         """Test GET /api/monitoring/remote/{server_id}/processes with existing server"""
@@ -218,4 +250,74 @@ class TestMonitoringAPI:
             assert response.status_code == 200
             data = response.json()
             assert "processes" in data
-            assert isinstance(data["processes"], list)
\ No newline at end of file
+            assert isinstance(data["processes"], list)
+
+class TestMetricsCollector:
+    """Tests for the background remote metrics collector"""
+
+    def make_collector(self, samples):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from app.models.database import Base, Server
+        from app.services.metrics_cache import ServerMetricsCache
+        from app.services.metrics_collector import MetricsCollector
+        from app.services.metrics_history import MetricsHistoryStore
+
+        engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        db.add_all([
+            Server(id=1, name="a", host="10.0.0.1"),
+            Server(id=2, name="b", host="10.0.0.2"),
+        ])
+        db.commit()
+        db.close()
+
+        service = MagicMock()
+        service.sample_remote_status.side_effect = lambda host, **kwargs: samples.get(host)
+        service.empty_remote_status.side_effect = lambda host, server_id, server_name: {
+            "server_id": server_id, "server_name": server_name, "host": host, "cpu_percent": 0.0
+        }
+        cache = ServerMetricsCache()
+        cache.put(99, {"cpu_percent": 1.0})
+        collector = MetricsCollector(
+            session_factory, interval=60, cache=cache, service=service, history=MetricsHistoryStore()
+        )
+        return collector, service, cache, session_factory
+
+    def test_collect_all_samples_each_server_once(self):
+        """Test one collection round samples every server and drops deleted ones"""
+        collector, service, cache, _ = self.make_collector({"10.0.0.1": {"cpu_percent": 12.0}})
+
+        assert collector.collect_all() == 1
+        assert service.sample_remote_status.call_count == 2
+        assert cache.get(1) == {"cpu_percent": 12.0}
+        assert cache.get(2) is None
+        assert cache.get(99) is None
+
+    def test_concurrent_reads_share_one_sample(self):
+        """Test simultaneous API reads for one server trigger a single SSH sample"""
+        import threading
+        import time
+        from app.models.database import Server
+
+        collector, service, _, session_factory = self.make_collector({})
+
+        def slow_sample(host, **kwargs):
+            time.sleep(0.1)
+            return {"cpu_percent": 40.0}
+
+        service.sample_remote_status.side_effect = slow_sample
+        db = session_factory()
+        server = db.get(Server, 1)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(collector.get_status(server))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        db.close()
+
+        assert service.sample_remote_status.call_count == 1
+        assert all(item["cpu_percent"] == 40.0 and item["sampled_at"] for item in results)
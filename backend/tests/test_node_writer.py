@@ -0,0 +1,137 @@
+import sys
+import threading
+
+sys.path.insert(0, "backend")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Execution, NodeExecution, Workflow
+from app.services.execution.node_writer import NodeExecutionWriter
+
+
+def make_session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'writer.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda connection: commits.append(1))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    session = session_factory()
+    session.add(Workflow(id=1, name="writer-test", nodes=[], edges=[]))
+    session.add(Execution(id=1, workflow_id=1, status="running"))
+    session.commit()
+    session.close()
+    commits.clear()
+    return session_factory, commits
+
+
+class GatedFactory:
+    """Session factory whose first call blocks until released, holding the writer mid-batch."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        return self.session_factory()
+
+
+def node(node_id, status="running"):
+    return NodeExecution(execution_id=1, node_id=node_id, node_type="shell", status=status, input_data={})
+
+
+def test_writes_queued_behind_a_commit_share_one_transaction(tmp_path):
+    session_factory, commits = make_session_factory(tmp_path)
+    factory = GatedFactory(session_factory)
+    writer = NodeExecutionWriter(batch_size=100)
+    try:
+        first = writer.insert(factory, node("first"))
+        assert factory.entered.wait(5)
+        skipped = [writer.insert(factory, node(f"skip-{index}", "skipped")) for index in range(50)]
+        factory.release.set()
+        writer.flush(timeout=5)
+    finally:
+        writer.stop()
+
+    ids = [first.result()] + [future.result() for future in skipped]
+    assert len(set(ids)) == 51
+    assert len(commits) == 2
+    session = session_factory()
+    assert session.query(NodeExecution).filter(NodeExecution.status == "skipped").count() == 50
+    session.close()
+
+
+def test_pending_updates_are_visible_until_committed(tmp_path):
+    session_factory, _ = make_session_factory(tmp_path)
+    writer = NodeExecutionWriter()
+    recorded = []
+    try:
+        running = node("a")
+        running.id = writer.insert(session_factory, running).result(timeout=5)
+
+        factory = GatedFactory(session_factory)
+        writer.insert(factory, node("b"))
+        assert factory.entered.wait(5)
+        running.status = "success"
+        running.output_data = {"exit_status": 0}
+        writer.update(session_factory, running, ("status",))
+        writer.update(session_factory, running, ("output_data",), on_commit=recorded.append)
+        assert writer.pending(1) == {running.id: {"status": "success", "output_data": {"exit_status": 0}}}
+
+        factory.release.set()
+        writer.flush(timeout=5)
+    finally:
+        writer.stop()
+
+    assert writer.pending(1) == {}
+    assert recorded == [running.id]
+    session = session_factory()
+    stored = session.get(NodeExecution, running.id)
+    assert (stored.status, stored.output_data) == ("success", {"exit_status": 0})
+    session.close()
+
+
+def test_failed_change_in_a_batch_does_not_drop_the_others(tmp_path):
+    session_factory, _ = make_session_factory(tmp_path)
+    session = session_factory()
+    session.add(Execution(id=2, workflow_id=1, status="running"))
+    session.commit()
+    session.close()
+    writer = NodeExecutionWriter()
+    try:
+        poisoned = node("poisoned")
+        poisoned.id = writer.insert(session_factory, poisoned).result(timeout=5)
+        healthy = NodeExecution(execution_id=2, node_id="healthy", node_type="shell", status="running", input_data={})
+        healthy.id = writer.insert(session_factory, healthy).result(timeout=5)
+
+        factory = GatedFactory(session_factory)
+        writer.insert(factory, node("gate"))
+        assert factory.entered.wait(5)
+        poisoned.status = "success"
+        poisoned.output_data = {"value": object()}
+        bad = writer.update(session_factory, poisoned, ("status", "output_data"))
+        healthy.status = "success"
+        healthy.output_data = {"exit_status": 0}
+        good = writer.update(session_factory, healthy, ("status", "output_data"))
+        factory.release.set()
+        writer.flush(timeout=5)
+    finally:
+        writer.stop()
+
+    assert good.result() == healthy.id
+    assert bad.exception() is not None
+    assert writer.pending(1) == {} and writer.pending(2) == {}
+    session = session_factory()
+    stored_healthy = session.get(NodeExecution, healthy.id)
+    assert (stored_healthy.status, stored_healthy.output_data) == ("success", {"exit_status": 0})
+    stored_poisoned = session.get(NodeExecution, poisoned.id)
+    assert stored_poisoned.status == "failed"
+    assert stored_poisoned.error_message.startswith("Failed to record node result")
+    session.close()
@@ -0,0 +1,124 @@
+import sys
+sys.path.insert(0, "backend")
+
+import pytest
+
+from app.services.proc_sampler import ConsumerKey, ProcDeltaSampler, parse_proc_snapshot
+
+
+def proc_output(uptime, cpu, cores, disk, net, loadavg="0.50 0.40 0.30 1/200 999"):
+    stat = [f"cpu  {' '.join(map(str, cpu))}"]
+    stat += [f"cpu{index} {' '.join(map(str, core))}" for index, core in enumerate(cores)]
+    stat += ["intr 12345 0 0", "ctxt 6789"]
+    return "\n".join([
+        "===UPTIME===", f"{uptime} 100.00",
+        "===STAT===", *stat,
+        "===MEMINFO===",
+        "MemTotal:        8000000 kB",
+        "MemFree:         1000000 kB",
+        "MemAvailable:    6000000 kB",
+        "HugePages_Total:       0",
+        "===DISKSTATS===",
+        f"   8       0 sda {disk[0]} 0 {disk[1]} 10 {disk[2]} 0 {disk[3]} 20 0 {disk[4]} 30",
+        f"   8       1 sda1 {disk[0]} 0 {disk[1]} 10 {disk[2]} 0 {disk[3]} 20 0 {disk[4]} 30",
+        "   7       0 loop0 5 0 10 0 0 0 0 0 0 0 0",
+        "===BLOCK===", "loop0", "sda",
+        "===NETDEV===",
+        "Inter-|   Receive                            |  Transmit",
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed",
+        "    lo: 999 9 0 0 0 0 0 0 999 9 0 0 0 0 0 0",
+        f"  eth0: {net[0]} {net[2]} 0 0 0 0 0 0 {net[1]} {net[3]} 0 0 0 0 0 0",
+        "===LOADAVG===", loadavg,
+        "===DF===", "/dev/sda1 100000000000 25000000000 75000000000 25% /",
+    ])
+
+
+def test_first_sample_reports_levels_and_boot_average_cpu():
+    snapshot = parse_proc_snapshot(proc_output(1000.0, [300, 0, 100, 600, 0, 0, 0, 0], [[300, 0, 100, 600, 0, 0, 0, 0]],
+                                               disk=[10, 100, 20, 200, 50], net=[1000, 2000, 10, 20]))
+    assert "loop0" not in snapshot.disks and "lo" not in snapshot.network
+    # the partition repeats its disk's IO and is left out
+    assert list(snapshot.disks) == ["sda"]
+
+    status = ProcDeltaSampler().sample(1, proc_output(
+        1000.0, [300, 0, 100, 600, 0, 0, 0, 0], [[300, 0, 100, 600, 0, 0, 0, 0]],
+        disk=[10, 100, 20, 200, 50], net=[1000, 2000, 10, 20]
+    ))
+
+    assert status["cpu_percent"] == 40.0
+    assert status["memory"] == {
+        "total": 8000000 * 1024, "available": 6000000 * 1024, "percent": 25.0,
+        "used": 2000000 * 1024, "free": 1000000 * 1024,
+    }
+    assert status["disk"] == {"total": 100000000000, "used": 25000000000, "free": 75000000000, "percent": 25.0}
+    assert status["load_avg"] == {"1m": 0.5, "5m": 0.4, "15m": 0.3}
+    assert status["disk_io"] == {} and status["network"] == {}
+    assert status["interval_seconds"] is None
+
+
+def test_rates_come_from_deltas_between_consecutive_samples():
+    sampler = ProcDeltaSampler()
+    sampler.sample(1, proc_output(
+        1000.0, [100, 0, 0, 900, 0, 0, 0, 0], [[50, 0, 0, 450, 0, 0, 0, 0], [50, 0, 0, 450, 0, 0, 0, 0]],
+        disk=[10, 100, 20, 200, 50], net=[1000, 2000, 10, 20]
+    ))
+    # 2 seconds later: core 0 fully busy, core 1 idle, with 100 iowait ticks counted as idle
+    status = sampler.sample(1, proc_output(
+        1002.0, [300, 0, 0, 1000, 100, 0, 0, 0], [[250, 0, 0, 450, 0, 0, 0, 0], [50, 0, 0, 550, 100, 0, 0, 0]],
+        disk=[30, 4196, 60, 8392, 1050], net=[3000, 6000, 30, 60]
+    ))
+
+    assert status["interval_seconds"] == 2.0
+    assert status["cpu_percent"] == 50.0
+    assert status["cpu_cores"] == [100.0, 0.0]
+    assert status["disk_io"]["sda"] == {
+        "reads_per_sec": 10.0,
+        "read_bytes_per_sec": pytest.approx(2048 * 512),
+        "writes_per_sec": 20.0,
+        "write_bytes_per_sec": pytest.approx(4096 * 512),
+        "util_percent": 50.0,
+    }
+    assert status["network"]["eth0"] == {
+        "rx_bytes_per_sec": 1000.0, "tx_bytes_per_sec": 2000.0,
+        "rx_packets_per_sec": 10.0, "tx_packets_per_sec": 20.0,
+    }
+
+    # a reboot resets the counters; the next sample must not produce negative rates
+    rebooted = sampler.sample(1, proc_output(
+        5.0, [10, 0, 0, 90, 0, 0, 0, 0], [[10, 0, 0, 90, 0, 0, 0, 0]],
+        disk=[1, 8, 1, 8, 1], net=[10, 10, 1, 1]
+    ))
+    assert rebooted["interval_seconds"] is None and rebooted["network"] == {}
+
+    with pytest.raises(ValueError):
+        parse_proc_snapshot("===MEMINFO===\nMemTotal: 1 kB")
+
+
+def test_consumers_keep_their_own_previous_snapshot():
+    sampler = ProcDeltaSampler()
+    cores = [[0, 0, 0, 0, 0, 0, 0, 0]]
+
+    def at(uptime, busy):
+        return proc_output(
+            uptime, [busy, 0, 0, 1000 - busy, 0, 0, 0, 0], cores,
+            disk=[10, 100, 20, 200, 50], net=[1000, 2000, 10, 20]
+        )
+
+    monitor = ConsumerKey("execution:1", 7)
+    sampler.sample(monitor, at(1000.0, 100))
+    sampler.sample(7, at(1000.0, 100))
+    # the collector samples again half a second before the monitor's next tick
+    assert sampler.sample(7, at(1001.5, 100))["interval_seconds"] == 1.5
+    assert sampler.sample(monitor, at(1002.0, 300))["interval_seconds"] == 2.0
+
+    sampler.retain([7])
+    assert sampler.sample(monitor, at(1004.0, 300))["interval_seconds"] == 2.0
+    sampler.forget_consumer("execution:1")
+    assert sampler.sample(monitor, at(1006.0, 300))["interval_seconds"] is None
+    sampler.retain([])
+    assert sampler.sample(monitor, at(1008.0, 300))["interval_seconds"] is None
+
+    # callers sampling a bare host keep their rates across collector rounds
+    sampler.sample(("10.0.0.7", 22), at(1008.0, 300))
+    sampler.retain([])
+    assert sampler.sample(("10.0.0.7", 22), at(1010.0, 300))["interval_seconds"] == 2.0
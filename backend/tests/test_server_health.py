@@ -0,0 +1,56 @@
+import sys
+sys.path.insert(0, "backend")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, Server
+from app.services.server_health import ServerHealthProber
+from app.services.ssh_service import HostCircuitBreaker, SSHPortCache
+
+
+def make_session_factory():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_probe_round_updates_status_and_circuits(monkeypatch):
+    session_factory = make_session_factory()
+    db = session_factory()
+    db.add_all([
+        Server(id=1, name="up", host="10.0.0.1", port=2222, status="offline"),
+        Server(id=2, name="down", host="10.0.0.2", status="online"),
+    ])
+    db.commit()
+    db.close()
+
+    port_cache = SSHPortCache()
+    monkeypatch.setattr("app.services.server_health.get_port_cache", lambda: port_cache)
+    breaker = HostCircuitBreaker()
+    probed = {}
+
+    def probe(host, ports, timeout):
+        probed[host] = ports
+        return (2222, None) if host == "10.0.0.1" else (None, "timed out")
+
+    prober = ServerHealthProber(session_factory, breaker=breaker, probe=probe)
+    results = prober.probe_all()
+
+    assert {result.server_id: result.reachable for result in results} == {1: True, 2: False}
+    assert probed == {"10.0.0.1": (22, 2222), "10.0.0.2": (22,)}
+    assert breaker.is_open("10.0.0.2") and not breaker.is_open("10.0.0.1")
+    assert port_cache.get("10.0.0.1", 2222) == 2222
+    db = session_factory()
+    assert {server.id: server.status for server in db.query(Server)} == {1: "online", 2: "offline"}
+    # the working port is persisted so the port cache can be warmed after a restart
+    assert {server.id: server.ssh_port for server in db.query(Server)} == {1: 2222, 2: None}
+    db.close()
+
+    # the host coming back closes its circuit on the next round
+    prober._probe = lambda host, ports, timeout: (22, None)
+    prober.probe_all()
+    assert not breaker.is_open("10.0.0.2")
+    db = session_factory()
+    assert {server.id: server.ssh_port for server in db.query(Server)} == {1: 22, 2: 22}
+    db.close()
@@ -91,8 +91,9 @@ def test_server_list_is_busy():
     """Test server list returns is_busy computed field"""
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
-    from app.models.database import Base, Server, Workflow, Execution, NodeExecution
-    from app.api.servers import list_servers, _compute_busy_servers
+    from app.models.database import Base, Server, Workflow, Execution
+    from app.api.servers import list_servers
+    from app.services.server_leases import ServerLeaseManager
     from app.utils.time import utc_now
 
     engine = create_engine("sqlite:///:memory:")
@@ -122,21 +123,10 @@ def test_server_list_is_busy():
     db.commit()
     db.refresh(execution)
 
-    # Create running node_execution linked to server
-    node_exec = NodeExecution(
-        execution_id=execution.id,
-        node_id="node1",
-        node_type="shell",
-        status="running",
-        started_at=utc_now(),
-        input_data={"server_id": server.id}
-    )
-    db.add(node_exec)
-    db.commit()
-
-    # Test _compute_busy_servers helper
-    busy_ids = _compute_busy_servers(db)
-    assert server.id in busy_ids
+    # A running node holds a lease on the server
+    leases = ServerLeaseManager(db)
+    assert leases.acquire(server, execution.id, "node1")
+    assert server.id in leases.busy_server_ids()
 
     # Test server list response
     servers_list = list_servers(db)
@@ -145,9 +135,8 @@ def test_server_list_is_busy():
     assert len(servers_list) == 1
     assert servers_list[0].is_busy == True
 
-    # Mark node_execution as completed
-    node_exec.status = "success"
-    db.commit()
+    # Node finished and released its lease
+    leases.release(execution.id, "node1")
 
     servers_list2 = list_servers(db)
     assert servers_list2[0].is_busy == False
@@ -178,8 +167,9 @@ def test_get_server_returns_is_busy():
     """Test get_server returns is_busy computed field"""
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
-    from app.models.database import Base, Server, Workflow, Execution, NodeExecution
+    from app.models.database import Base, Server, Workflow, Execution
     from app.api.servers import get_server
+    from app.services.server_leases import ServerLeaseManager
     from app.utils.time import utc_now
 
     engine = create_engine("sqlite:///:memory:")
@@ -208,16 +198,7 @@ def test_get_server_returns_is_busy():
     db.commit()
     db.refresh(execution)
 
-    node_exec = NodeExecution(
-        execution_id=execution.id,
-        node_id="node1",
-        node_type="shell",
-        status="running",
-        started_at=utc_now(),
-        input_data={"server_id": server.id}
-    )
-    db.add(node_exec)
-    db.commit()
+    ServerLeaseManager(db).acquire(server, execution.id, "node1")
 
     # Get server with running execution
     result2 = get_server(server.id, db)
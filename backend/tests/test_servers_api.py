@@ -148,3 +148,47 @@ def test_execute_command_missing_command(client):
     client.post("/api/servers", json={"name": "test", "host": "192.168.1.1"})
     response = client.post("/api/servers/1/execute", json={})
     assert response.status_code == 400
+
+def test_test_connection_persists_resolved_ssh_port(client, monkeypatch):
+    from app.services.ssh_service import get_port_cache
+
+    class CustomPortSSHService:
+        def run_command(self, **kwargs):
+            return SSHResult(exit_status=0, stdout="ok", stderr="", ssh_port=2222)
+
+    monkeypatch.setattr("app.api.servers.SSHService", CustomPortSSHService)
+    client.post("/api/servers", json={"name": "custom-port", "host": "192.168.1.9", "port": 2222})
+
+    response = client.post("/api/servers/1/test")
+
+    assert response.json()["ssh_port"] == 2222
+    assert client.get("/api/servers/1").json()["ssh_port"] == 2222
+    assert get_port_cache().get("192.168.1.9", 2222) == 2222
+    get_port_cache().invalidate("192.168.1.9", 2222)
+
+def test_execute_batch_runs_on_all_servers(client, monkeypatch):
+    from app.services.ssh_service import get_port_cache
+
+    class FanoutSSHService:
+        def run_on_many(self, targets, command, max_parallel=8, timeout=30):
+            for target in reversed(targets):
+                if target.host == "192.168.1.2":
+                    yield target, SSHResult(exit_status=-1, stdout="", stderr="", error="timeout")
+                else:
+                    yield target, SSHResult(exit_status=0, stdout=command, stderr="", ssh_port=22)
+
+    monkeypatch.setattr("app.api.servers.SSHService", FanoutSSHService)
+    client.post("/api/servers", json={"name": "server1", "host": "192.168.1.1"})
+    client.post("/api/servers", json={"name": "server2", "host": "192.168.1.2"})
+
+    response = client.post("/api/servers/execute-batch", json={"server_ids": [1, 2, 1], "command": "java -version"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (1, 1)
+    assert [item["server_name"] for item in data["results"]] == ["server2", "server1"]
+    assert data["results"][1]["stdout"] == "java -version"
+
+    response = client.post("/api/servers/execute-batch", json={"server_ids": [1, 99], "command": "ls"})
+    assert response.status_code == 404
+    get_port_cache().invalidate("192.168.1.1", 22)
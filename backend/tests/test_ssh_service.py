@@ -1,8 +1,15 @@
 # backend/tests/test_ssh_service.py
 import sys
 sys.path.insert(0, 'backend')
+import pytest
 from app.services.ssh_service import SSHService
 
+
+@pytest.fixture(autouse=True)
+def reachable_ports(monkeypatch):
+    """Fake hosts: every port probe succeeds unless a test sets its own probe."""
+    monkeypatch.setattr(SSHService, "_probe_port", lambda self, host, port: None)
+
 def test_ssh_service_exists():
     """Test SSHService can be instantiated"""
     service = SSHService()
@@ -23,4 +30,528 @@ def test_ssh_result_structure():
     from app.services.ssh_service import SSHResult
     result = SSHResult(exit_status=0, stdout="OK", stderr="")
     assert result.exit_status == 0
-    assert result.stdout == "OK"
\ No newline at end of file
+    assert result.stdout == "OK"
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def send_ignore(self):
+        if not self.active:
+            raise EOFError("transport closed")
+
+
+class FakeChannel:
+    def recv_exit_status(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class FakeStream:
+    def __init__(self, data=b""):
+        self.data = data
+        self.channel = FakeChannel()
+
+    def read(self):
+        return self.data
+
+
+class FakeClient:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.closed = False
+        self.commands = []
+
+    def get_transport(self):
+        return self.transport
+
+    def exec_command(self, command, timeout=None):
+        self.commands.append(command)
+        return FakeStream(), FakeStream(b"ok\n"), FakeStream()
+
+    def close(self):
+        self.closed = True
+        self.transport.active = False
+
+
+def make_pool(**kwargs):
+    from app.services.ssh_service import SSHConnectionPool
+
+    opened = []
+
+    def connect(host, port, username, password, timeout):
+        client = FakeClient()
+        opened.append(client)
+        return client
+
+    return SSHConnectionPool(connect_factory=connect, **kwargs), opened
+
+
+def test_pool_reuses_released_connection():
+    from app.services.ssh_service import SSHService
+
+    pool, opened = make_pool()
+    service = SSHService(pool=pool)
+
+    first = service.run_command("10.0.0.1", "root", "pw", "echo 1")
+    second = service.run_command("10.0.0.1", "root", "pw", "echo 2")
+
+    assert first.stdout == "ok\n"
+    assert second.exit_status == 0
+    assert len(opened) == 1
+    assert opened[0].commands == ["echo 1", "echo 2"]
+    assert pool.stats() == {"idle": 1, "in_use": 0, "hosts": 1}
+
+
+def test_pool_replaces_unhealthy_connection():
+    pool, opened = make_pool()
+
+    client = pool.acquire("10.0.0.1", 22, "root", "pw")
+    pool.release(client)
+    opened[0].transport.active = False
+
+    replacement = pool.acquire("10.0.0.1", 22, "root", "pw")
+
+    assert replacement is not opened[0]
+    assert len(opened) == 2
+    assert opened[0].closed
+
+
+def test_pool_caps_connections_per_host():
+    import pytest
+    from app.services.ssh_service import SSHPoolTimeout
+
+    pool, opened = make_pool(max_per_host=1)
+
+    held = pool.acquire("10.0.0.1", 22, "root", "pw")
+    with pytest.raises(SSHPoolTimeout):
+        pool.acquire("10.0.0.1", 22, "root", "pw", timeout=0.05)
+
+    other_host = pool.acquire("10.0.0.2", 22, "root", "pw")
+    pool.release(held)
+    reused = pool.acquire("10.0.0.1", 22, "root", "pw", timeout=0.05)
+
+    assert reused is held
+    assert other_host is not held
+    assert len(opened) == 2
+
+
+def test_pool_evicts_idle_connections_after_ttl():
+    pool, opened = make_pool(idle_ttl=0)
+
+    client = pool.acquire("10.0.0.1", 22, "root", "pw")
+    pool.release(client)
+
+    assert pool.prune() == 1
+    assert opened[0].closed
+    assert pool.stats()["idle"] == 0
+
+
+def test_connect_client_caches_resolved_port_and_skips_probe():
+    from app.services.ssh_service import SSHPortCache, SSHService
+
+    pool, opened = make_pool()
+    service = SSHService(pool=pool, port_cache=SSHPortCache())
+    probes = []
+
+    def probe(host, port):
+        probes.append(port)
+        return None if port == 2222 else OSError("connection refused")
+
+    service._probe_port = probe
+
+    client, ssh_port, error = service._connect_client("10.0.0.1", "root", "pw", port=2222)
+    service.release_client(client)
+    again, again_port, _ = service._connect_client("10.0.0.1", "root", "pw", port=2222)
+
+    assert error is None
+    assert ssh_port == 2222 and again_port == 2222
+    assert probes == [22, 2222]
+    assert service.port_cache.get("10.0.0.1", 2222) == 2222
+    assert again is client
+
+
+def test_connect_client_invalidates_cached_port_on_failure():
+    from app.services.ssh_service import SSHConnectionPool, SSHPortCache, SSHService
+
+    attempts = []
+
+    def connect(host, port, username, password, timeout):
+        attempts.append(port)
+        if port == 2222:
+            raise OSError("sshd moved")
+        return FakeClient()
+
+    cache = SSHPortCache()
+    cache.seed([("10.0.0.1", 2222, 2222)])
+    service = SSHService(pool=SSHConnectionPool(connect_factory=connect), port_cache=cache)
+    service._probe_port = lambda host, port: None if port == 22 else OSError("refused")
+
+    client, ssh_port, error = service._connect_client("10.0.0.1", "root", "pw", port=2222)
+
+    assert error is None
+    assert ssh_port == 22
+    assert attempts == [2222, 22]
+    assert cache.get("10.0.0.1", 2222) == 22
+
+
+def test_cached_port_failure_probes_candidates_and_retries_cached_port():
+    from app.services.ssh_service import SSHConnectionPool, SSHPortCache, SSHService
+
+    attempts = []
+
+    def connect(host, port, username, password, timeout):
+        attempts.append(port)
+        if len(attempts) == 1:
+            raise OSError("connection reset")
+        return FakeClient()
+
+    probes = []
+
+    def probe(host, port):
+        probes.append(port)
+        return None if port == 2222 else OSError("refused")
+
+    cache = SSHPortCache()
+    cache.seed([("10.0.0.1", 2222, 2222)])
+    service = SSHService(pool=SSHConnectionPool(connect_factory=connect), port_cache=cache)
+    service._probe_port = probe
+
+    client, ssh_port, error = service._connect_client("10.0.0.1", "root", "pw", port=2222)
+
+    assert error is None and ssh_port == 2222
+    # the dead port 22 is ruled out by the short probe instead of a full connect timeout
+    assert probes == [2222, 22]
+    assert attempts == [2222, 2222]
+    assert cache.get("10.0.0.1", 2222) == 2222
+
+
+def test_full_pool_keeps_cached_port_and_session_releases_client():
+    from app.services.ssh_service import SSHPoolTimeout, SSHPortCache, SSHService
+
+    pool, opened = make_pool(max_per_host=1)
+    cache = SSHPortCache()
+    cache.seed([("10.0.0.1", 2222, 2222)])
+    service = SSHService(pool=pool, port_cache=cache)
+    probes = []
+    service._probe_port = lambda host, port: probes.append(port)
+
+    with service.client_session("10.0.0.1", "root", "pw", port=2222) as (held, _, _):
+        _, _, error = service._connect_client("10.0.0.1", "root", "pw", port=2222, timeout=0.05)
+
+    # a busy pool says nothing about the port: no re-probe, no other port, cache kept
+    assert isinstance(error, SSHPoolTimeout)
+    assert probes == []
+    assert cache.get("10.0.0.1", 2222) == 2222
+    assert len(opened) == 1
+    assert pool.stats() == {"idle": 1, "in_use": 0, "hosts": 1}
+
+
+def test_circuit_opens_after_network_failures_and_fails_fast():
+    import paramiko
+    from app.services.ssh_service import HostCircuitBreaker, SSHCircuitOpen, SSHConnectionPool, SSHPortCache, SSHService
+
+    attempts = []
+    errors = {"10.0.0.9": OSError("timed out"), "10.0.0.8": paramiko.AuthenticationException("bad password")}
+
+    def connect(host, port, username, password, timeout):
+        attempts.append(host)
+        raise errors[host]
+
+    clock = [0.0]
+    breaker = HostCircuitBreaker(failure_threshold=2, reset_seconds=60, clock=lambda: clock[0])
+    service = SSHService(pool=SSHConnectionPool(connect_factory=connect), port_cache=SSHPortCache(), breaker=breaker)
+
+    for _ in range(3):
+        service._connect_client("10.0.0.9", "root", "pw")
+        service._connect_client("10.0.0.8", "root", "pw")
+    _, _, error = service._connect_client("10.0.0.9", "root", "pw")
+
+    assert isinstance(error, SSHCircuitOpen)
+    assert attempts.count("10.0.0.9") == 2
+    # authentication failures mean the host is up and never trip the circuit
+    assert attempts.count("10.0.0.8") == 3
+    assert breaker.state("10.0.0.8") == "closed"
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    from app.services.ssh_service import HostCircuitBreaker
+
+    clock = [0.0]
+    breaker = HostCircuitBreaker(failure_threshold=1, reset_seconds=60, clock=lambda: clock[0])
+    breaker.record_failure("h")
+    assert not breaker.allow("h")
+
+    clock[0] = 61
+    assert breaker.allow("h")
+    assert not breaker.allow("h")
+    breaker.record_failure("h")
+    assert breaker.state("h") == "open"
+
+    clock[0] = 122
+    assert breaker.allow("h")
+    breaker.record_success("h")
+    assert breaker.state("h") == "closed"
+    assert breaker.allow("h")
+
+
+def test_half_open_trial_settles_on_non_network_errors():
+    import paramiko
+    from app.services.ssh_service import HostCircuitBreaker, SSHConnectionPool, SSHPoolTimeout, SSHPortCache, SSHService
+
+    outcome = [SSHPoolTimeout("pool busy")]
+
+    def connect(host, port, username, password, timeout):
+        raise outcome[0]
+
+    clock = [0.0]
+    breaker = HostCircuitBreaker(failure_threshold=1, reset_seconds=60, clock=lambda: clock[0])
+    service = SSHService(pool=SSHConnectionPool(connect_factory=connect), port_cache=SSHPortCache(), breaker=breaker)
+    breaker.trip("10.0.0.7")
+
+    # an inconclusive trial re-opens the circuit instead of leaving it half open
+    clock[0] = 61
+    _, _, error = service._connect_client("10.0.0.7", "root", "pw")
+    assert isinstance(error, SSHPoolTimeout)
+    assert breaker.state("10.0.0.7") == "open"
+    assert not breaker.allow("10.0.0.7")
+
+    # the host answering with an authentication failure is reachable: the circuit closes
+    clock[0] = 122
+    outcome[0] = paramiko.AuthenticationException("bad password")
+    _, _, error = service._connect_client("10.0.0.7", "root", "pw")
+    assert isinstance(error, paramiko.AuthenticationException)
+    assert breaker.state("10.0.0.7") == "closed"
+
+
+class FakeSFTPFile:
+    def __init__(self, sftp, path, mode):
+        self.sftp = sftp
+        self.path = path
+        self.mode = mode
+        self.buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if "w" in self.mode:
+            self.sftp.files[self.path] = self.buffer
+
+    def read(self):
+        content = self.sftp.files[self.path]
+        return content if isinstance(content, bytes) else content.encode()
+
+    def write(self, data):
+        self.buffer = data if self.buffer is None else self.buffer + data
+
+
+class FakeSFTP:
+    def __init__(self, files):
+        self.files = dict(files)
+        self.renames = []
+        self.closed = False
+
+    def lstat(self, path):
+        import stat as stat_module
+        from types import SimpleNamespace
+        return SimpleNamespace(st_mode=stat_module.S_IFREG | 0o640)
+
+    def stat(self, path):
+        return self.lstat(path)
+
+    def file(self, path, mode="r"):
+        return FakeSFTPFile(self, path, mode)
+
+    def chmod(self, path, mode):
+        pass
+
+    def posix_rename(self, src, dst):
+        self.renames.append(dst)
+        self.files[dst] = self.files.pop(src)
+
+    def close(self):
+        self.closed = True
+
+
+def test_edit_file_reads_backs_up_and_writes_in_one_session():
+    from app.services.ssh_service import SSHService
+
+    pool, opened = make_pool()
+    service = SSHService(pool=pool)
+    sftp = FakeSFTP({"/conf/app.properties": "a=1\n"})
+    sessions = []
+
+    def open_sftp():
+        sessions.append(sftp)
+        return sftp
+
+    client = pool.acquire("10.0.0.1", 22, "root", "pw")
+    client.open_sftp = open_sftp
+    pool.release(client)
+
+    result = service.edit_file(
+        "10.0.0.1", "root", "pw", "/conf/app.properties",
+        transform=lambda content: content.replace("a=1", "a=2"),
+        backup_path="/conf/app.properties.bak",
+    )
+
+    assert result["status"] == "success"
+    assert result["changed"] is True
+    assert len(sessions) == 1 and sftp.closed
+    assert sftp.files == {"/conf/app.properties": "a=2\n", "/conf/app.properties.bak": b"a=1\n"}
+    assert sftp.renames == ["/conf/app.properties.bak", "/conf/app.properties"]
+    assert len(opened) == 1
+
+
+def test_edit_file_backup_keeps_original_bytes():
+    from app.services.ssh_service import SSHService
+
+    pool, _ = make_pool()
+    service = SSHService(pool=pool)
+    original = b"a=1\n# \xff\xfe latin-1 comment: caf\xe9\n"
+    sftp = FakeSFTP({"/conf/app.properties": original})
+    client = pool.acquire("10.0.0.1", 22, "root", "pw")
+    client.open_sftp = lambda: sftp
+    pool.release(client)
+
+    result = service.edit_file(
+        "10.0.0.1", "root", "pw", "/conf/app.properties",
+        transform=lambda content: content.replace("a=1", "a=2"),
+        backup_path="/conf/app.properties.bak",
+    )
+
+    assert result["status"] == "success"
+    assert sftp.files["/conf/app.properties.bak"] == original
+
+
+class FakeStreamingChannel:
+    def __init__(self, stdout_chunks, stderr_chunks, exit_status=0, late_chunks=None):
+        self.stdout_chunks = list(stdout_chunks)
+        self.stderr_chunks = list(stderr_chunks)
+        self.exit_status = exit_status
+        # (stdout, stderr) output that lands together with the exit status, after the ready checks
+        self.late_chunks = late_chunks
+        self.closed = False
+
+    @property
+    def eof_received(self):
+        return not self.stdout_chunks and not self.stderr_chunks and self.late_chunks is None
+
+    def recv_ready(self):
+        return bool(self.stdout_chunks)
+
+    def recv(self, size):
+        return self.stdout_chunks.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr_chunks)
+
+    def recv_stderr(self, size):
+        return self.stderr_chunks.pop(0)
+
+    def exit_status_ready(self):
+        if self.late_chunks is not None:
+            late_stdout, late_stderr = self.late_chunks
+            self.stdout_chunks.extend(late_stdout)
+            self.stderr_chunks.extend(late_stderr)
+            self.late_chunks = None
+            return True
+        return not self.stdout_chunks and not self.stderr_chunks
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+def test_run_command_stream_keeps_bounded_preview_and_spills_to_log(tmp_path):
+    from app.services.ssh_service import SSHService
+
+    pool, opened = make_pool()
+    service = SSHService(pool=pool)
+    client = pool.acquire("10.0.0.1", 22, "root", "pw")
+    # "é" 被拆在两个块之间，验证增量解码
+    channel = FakeStreamingChannel([b"line-1\n" * 100, b"caf\xc3", b"\xa9\n"], [b"warn\n"], exit_status=3)
+    stdout = FakeStream()
+    stdout.channel = channel
+    client.exec_command = lambda command, timeout=None: (FakeStream(), stdout, FakeStream())
+    pool.release(client)
+
+    chunks = []
+    log_path = tmp_path / "logs" / "node.log"
+    result = service.run_command_stream(
+        "10.0.0.1", "root", "pw", "tail big.log",
+        on_output=lambda stream, text: chunks.append((stream, text)),
+        log_path=str(log_path),
+        preview_limit=20,
+    )
+
+    full_stdout = "line-1\n" * 100 + "café\n"
+    assert result.exit_status == 3
+    assert result.truncated is True
+    assert result.stdout.startswith(full_stdout[:20])
+    assert result.stdout.endswith(full_stdout[-20:])
+    assert "chars omitted" in result.stdout
+    assert result.stderr == "warn\n"
+    assert result.log_path == str(log_path)
+    assert log_path.read_text(encoding="utf-8") == "line-1\n" * 100 + "warn\ncafé\n"
+    assert "".join(text for stream, text in chunks if stream == "stdout") == full_stdout
+    assert channel.closed
+    assert pool.stats()["in_use"] == 0
+
+
+def test_run_command_stream_drains_output_buffered_when_exit_status_arrives():
+    from app.services.ssh_service import SSHService
+
+    pool, _ = make_pool()
+    service = SSHService(pool=pool)
+    client = pool.acquire("10.0.0.1", 22, "root", "pw")
+    channel = FakeStreamingChannel(
+        [b"first\n"], [b"err-1\n"], late_chunks=([b"second\n", b"last\n"], [b"err-2\n"])
+    )
+    stdout = FakeStream()
+    stdout.channel = channel
+    client.exec_command = lambda command, timeout=None: (FakeStream(), stdout, FakeStream())
+    pool.release(client)
+
+    result = service.run_command_stream("10.0.0.1", "root", "pw", "run.sh")
+
+    assert result.exit_status == 0
+    assert result.stdout == "first\nsecond\nlast\n"
+    assert result.stderr == "err-1\nerr-2\n"
+
+
+def test_run_on_many_yields_results_as_hosts_finish():
+    import threading
+    from app.services.ssh_service import SSHResult, SSHService, SSHTarget
+
+    release_slow = threading.Event()
+
+    class FanoutService(SSHService):
+        def run_command(self, host, username, password, command, port=22, timeout=30):
+            if host == "slow":
+                release_slow.wait(5)
+                return SSHResult(exit_status=-1, stdout="", stderr="", error="timed out")
+            if host == "broken":
+                raise RuntimeError("boom")
+            return SSHResult(exit_status=0, stdout=f"{host}:{command}", stderr="")
+
+    service = FanoutService(pool=make_pool()[0])
+    targets = [SSHTarget(host=host, key=index) for index, host in enumerate(["slow", "a", "broken", "b"])]
+
+    results = service.run_on_many(targets, "uptime", max_parallel=4)
+    first_three = [next(results) for _ in range(3)]
+    release_slow.set()
+    last = next(results)
+
+    assert {target.host for target, _ in first_three} == {"a", "broken", "b"}
+    assert dict((target.host, result.error) for target, result in first_three)["broken"] == "boom"
+    assert last[0].host == "slow" and last[0].key == 0
+    assert last[1].error == "timed out"
@@ -83,3 +83,24 @@ def test_delete_workflow_with_executions(client):
 
     response = client.get("/api/workflows/1")
     assert response.status_code == 404
+
+def test_list_workflows_with_cursor_and_fields(client):
+    for index in range(3):
+        client.post("/api/workflows", json={
+            "name": f"paged-{index}",
+            "nodes": [{"id": "n1", "type": "shell", "config": {"command": "ls", "server_id": 1}}],
+            "edges": [],
+        })
+
+    first = client.get("/api/workflows", params={"limit": 2, "fields": "name"})
+    assert first.status_code == 200
+    assert first.json() == [{"id": 1, "name": "paged-0"}, {"id": 2, "name": "paged-1"}]
+    second = client.get("/api/workflows", params={
+        "limit": 2, "fields": "name,nodes", "cursor": first.headers["X-Next-Cursor"]
+    })
+    assert [item["name"] for item in second.json()] == ["paged-2"]
+    assert second.json()[0]["nodes"][0]["id"] == "n1"
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/api/workflows", params={"fields": "name,secret"}).status_code == 400
+    assert client.get("/api/workflows", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -10,10 +10,14 @@ import type {
   WorkflowUpdate,
   Execution,
   ExecutionCreate,
+  ExecutionListParams,
   NodeExecution,
+  NodeOutputRangeParams,
+  ExecutionResources,
   MonitoringStatus,
   ProcessInfo,
   RemoteMonitoringStatus,
+  RemoteMetricsHistory,
   RemoteProcessesResponse,
   KillProcessResult,
   IoTDBFileInfo,
@@ -95,7 +99,8 @@ export const workflowsApi = {
 
 // Executions API
 export const executionsApi = {
-  list: (params?: { workflow_id?: number; status?: string; limit?: number }): Promise<Execution[]> =>
+  // fields: comma-separated projection; cursor: X-Next-Cursor of the previous page
+  list: (params?: ExecutionListParams): Promise<Execution[]> =>
     apiClient.get('/executions', { params }),
 
   get: (id: number): Promise<Execution> =>
@@ -111,7 +116,31 @@ export const executionsApi = {
     apiClient.delete(`/executions/${id}`),
 
   getNodes: (id: number): Promise<NodeExecution[]> =>
-    apiClient.get(`/executions/${id}/nodes`)
+    apiClient.get(`/executions/${id}/nodes`),
+
+  // Range of a node output field; lists come back as one JSON document per line
+  nodeOutput: (
+    id: number,
+    nodeExecutionId: number,
+    field: string,
+    params?: NodeOutputRangeParams
+  ): Promise<string> =>
+    apiClient.get(`/executions/${id}/nodes/${nodeExecutionId}/output/${field}`, {
+      params,
+      responseType: 'text',
+      transformResponse: (data) => data
+    }),
+
+  resources: (id: number): Promise<ExecutionResources> =>
+    apiClient.get(`/executions/${id}/resources`),
+
+  // workflow_state snapshot: live while running, the last checkpoint otherwise
+  state: (id: number): Promise<Record<string, unknown>> =>
+    apiClient.get(`/executions/${id}/state`),
+
+  // Server-Sent Events stream; consumed with EventSource (see useExecutionEvents)
+  eventsUrl: (id: number, after = 0): string =>
+    `/api/executions/${id}/events${after > 0 ? `?after=${after}` : ''}`
 }
 
 // Monitoring API
@@ -128,6 +157,9 @@ export const monitoringApi = {
   remoteProcesses: (serverId: number, params?: { limit?: number; sort_by?: 'cpu' | 'memory' }): Promise<RemoteProcessesResponse> =>
     apiClient.get(`/monitoring/remote/${serverId}/processes`, { params }),
 
+  remoteHistory: (serverId: number, params?: { from?: string; to?: string; step?: number }): Promise<RemoteMetricsHistory> =>
+    apiClient.get(`/monitoring/remote/${serverId}/history`, { params }),
+
   killProcess: (pid: number): Promise<KillProcessResult> =>
     apiClient.post(`/monitoring/local/process/${pid}/kill`)
 }
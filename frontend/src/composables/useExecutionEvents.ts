@@ -0,0 +1,90 @@
+import { onUnmounted } from 'vue'
+import { executionsApi } from '@/api'
+import type {
+  Execution,
+  ExecutionStatusEvent,
+  NodeExecution,
+  NodeExecutionEvent,
+  NodeOutputEvent
+} from '@/types'
+
+export interface ExecutionEventHandlers {
+  onExecution?: (event: ExecutionStatusEvent) => void
+  onNode?: (event: NodeExecutionEvent) => void
+  onOutput?: (event: NodeOutputEvent) => void
+  // Events were missed (buffer overrun or server restart): reload the full state
+  onReset?: () => void
+  // Every event has been delivered: the execution finished, or it is not live in this server process
+  onEnd?: () => void
+  // The stream could not be opened or was dropped for good; fall back to polling
+  onError?: () => void
+}
+
+export const applyExecutionEvent = (execution: Execution | null, event: ExecutionStatusEvent): Execution | null => {
+  if (!execution || execution.id !== event.id) return execution
+  return { ...execution, ...event }
+}
+
+// Node events carry no input/output blobs, so known fields of an existing record are kept
+export const applyNodeEvent = (
+  nodeExecutions: NodeExecution[],
+  executionId: number,
+  event: NodeExecutionEvent
+): NodeExecution[] => {
+  const index = nodeExecutions.findIndex(item => item.id === event.id)
+  if (index === -1) {
+    return [
+      ...nodeExecutions,
+      { ...event, execution_id: executionId, input_data: null, output_data: null, retry_count: 0 }
+    ]
+  }
+  const next = nodeExecutions.slice()
+  next[index] = { ...next[index], ...event }
+  return next
+}
+
+export function useExecutionEvents(handlers: ExecutionEventHandlers) {
+  let source: EventSource | null = null
+
+  const unsubscribe = () => {
+    if (source) {
+      source.close()
+      source = null
+    }
+  }
+
+  const subscribe = (executionId: number) => {
+    unsubscribe()
+    if (typeof EventSource === 'undefined') {
+      handlers.onError?.()
+      return
+    }
+    const current = new EventSource(executionsApi.eventsUrl(executionId))
+    source = current
+    const on = <T>(type: string, handler?: (data: T) => void) => {
+      current.addEventListener(type, (message) => {
+        if (source !== current) return
+        handler?.(JSON.parse((message as MessageEvent).data) as T)
+      })
+    }
+    on<ExecutionStatusEvent>('execution', handlers.onExecution)
+    on<NodeExecutionEvent>('node', handlers.onNode)
+    on<NodeOutputEvent>('output', handlers.onOutput)
+    on('reset', () => handlers.onReset?.())
+    on('end', () => {
+      unsubscribe()
+      handlers.onEnd?.()
+    })
+    // EventSource reconnects by itself (resuming via Last-Event-ID); only a closed source is final
+    current.onerror = () => {
+      if (source === current && current.readyState === EventSource.CLOSED) {
+        unsubscribe()
+        handlers.onError?.()
+      }
+    }
+  }
+
+  onUnmounted(unsubscribe)
+
+  return { subscribe, unsubscribe }
+}
@@ -1,7 +1,15 @@
 import { defineStore } from 'pinia'
 import { ref } from 'vue'
-import type { Execution, ExecutionCreate, NodeExecution } from '@/types'
+import type {
+  Execution,
+  ExecutionCreate,
+  ExecutionListParams,
+  ExecutionStatusEvent,
+  NodeExecution,
+  NodeExecutionEvent
+} from '@/types'
 import { executionsApi } from '@/api'
+import { applyExecutionEvent, applyNodeEvent } from '@/composables/useExecutionEvents'
 
 export const useExecutionsStore = defineStore('executions', () => {
   const executions = ref<Execution[]>([])
@@ -10,7 +18,7 @@ export const useExecutionsStore = defineStore('executions', () => {
   const loading = ref(false)
   const error = ref<string | null>(null)
 
-  async function fetchExecutions(params?: { workflow_id?: number; status?: string; limit?: number }) {
+  async function fetchExecutions(params?: ExecutionListParams) {
     loading.value = true
     error.value = null
     try {
@@ -105,6 +113,20 @@ export const useExecutionsStore = defineStore('executions', () => {
     }
   }
 
+  // Apply pushed diffs from the execution event stream
+  function applyExecutionStatusEvent(event: ExecutionStatusEvent) {
+    currentExecution.value = applyExecutionEvent(currentExecution.value, event)
+    const index = executions.value.findIndex(e => e.id === event.id)
+    if (index !== -1) {
+      executions.value[index] = { ...executions.value[index], ...event }
+    }
+  }
+
+  function applyNodeExecutionEvent(executionId: number, event: NodeExecutionEvent) {
+    if (currentExecution.value?.id !== executionId) return
+    nodeExecutions.value = applyNodeEvent(nodeExecutions.value, executionId, event)
+  }
+
   function clearCurrentExecution() {
     currentExecution.value = null
     nodeExecutions.value = []
@@ -122,6 +144,8 @@ export const useExecutionsStore = defineStore('executions', () => {
     stopExecution,
     deleteExecution,
     fetchNodeExecutions,
+    applyExecutionStatusEvent,
+    applyNodeExecutionEvent,
     clearCurrentExecution
   }
 })
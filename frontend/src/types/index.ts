@@ -608,12 +608,42 @@ export interface Execution {
   created_at: string
 }
 
+export interface ExecutionListParams {
+  workflow_id?: number
+  status?: string
+  limit?: number
+  cursor?: string
+  // comma-separated response fields; id is always returned
+  fields?: string
+}
+
+// Fields the execution list needs; summary is loaded with the selected execution
+export const EXECUTION_LIST_FIELDS =
+  'workflow_id,status,trigger_type,triggered_by,started_at,finished_at,duration,result,created_at'
+
 export interface ExecutionCreate {
   workflow_id: number
   trigger_type?: TriggerType
   triggered_by?: string | null
 }
 
+// output_data.artifacts[field]: the full value of an output field kept in the artifact store;
+// output_data[field] itself holds a preview (head of the text, leading list items)
+export interface NodeOutputArtifact {
+  sha256: string
+  size: number
+  lines: number
+  encoding: 'text' | 'jsonl'
+}
+
+// Byte range (offset/length) or, when start_line is set, line range of an output field
+export interface NodeOutputRangeParams {
+  offset?: number
+  length?: number
+  start_line?: number
+  line_count?: number
+}
+
 export type NodeExecutionStatus = 'pending' | 'running' | 'success' | 'failed' | 'skipped'
 
 export interface NodeExecution {
@@ -632,6 +662,52 @@ export interface NodeExecution {
   retry_count: number
 }
 
+// Live execution events (GET /api/executions/{id}/events, Server-Sent Events)
+export type ExecutionStatusEvent = Pick<
+  Execution, 'id' | 'status' | 'result' | 'started_at' | 'finished_at' | 'duration'
+>
+
+export type NodeExecutionEvent = Pick<
+  NodeExecution,
+  'id' | 'node_id' | 'node_type' | 'status' | 'started_at' | 'finished_at' | 'duration' | 'error_message' | 'log_path'
+>
+
+export interface NodeOutputEvent {
+  node_id: string
+  stream: 'stdout' | 'stderr'
+  text: string
+}
+
+export type ExecutionResourceMetric =
+  | 'cpu_percent'
+  | 'memory_percent'
+  | 'disk_percent'
+  | 'load_1m'
+  | 'disk_read_bytes_per_sec'
+  | 'disk_write_bytes_per_sec'
+  | 'disk_util_percent'
+  | 'net_rx_bytes_per_sec'
+  | 'net_tx_bytes_per_sec'
+
+export interface ExecutionResources {
+  execution_id: number
+  interval_seconds: number
+  timestamps: string[]
+  servers: Array<{
+    server_id: number
+    server_name: string | null
+    node_ids: Array<string[] | null>
+    series: Record<ExecutionResourceMetric, Array<number | null>>
+  }>
+  nodes: Array<{
+    node_id: string
+    node_type: string
+    status: string
+    started_at: string
+    finished_at: string | null
+  }>
+}
+
 // Monitoring related types
 
 export interface MemoryInfo {
@@ -666,6 +742,39 @@ export interface RemoteMonitoringStatus extends MonitoringStatus {
   server_id: number | null
   server_name: string | null
   host: string
+  cpu_cores: number[]
+  load_avg: { '1m': number; '5m': number; '15m': number }
+  disk_io: Record<string, {
+    reads_per_sec: number
+    read_bytes_per_sec: number
+    writes_per_sec: number
+    write_bytes_per_sec: number
+    util_percent: number
+  }>
+  network: Record<string, {
+    rx_bytes_per_sec: number
+    tx_bytes_per_sec: number
+    rx_packets_per_sec: number
+    tx_packets_per_sec: number
+  }>
+  interval_seconds: number | null
+  sampled_at: string | null
+}
+
+export interface RemoteMetricsHistory {
+  server_id: number
+  server_name: string
+  from: string
+  to: string
+  tier: 'raw' | '1m' | '10m'
+  resolution: number
+  step: number
+  timestamps: number[]
+  series: {
+    cpu_percent: number[]
+    memory_percent: number[]
+    disk_percent: number[]
+  }
 }
 
 export interface RemoteProcessesResponse {